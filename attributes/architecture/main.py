@@ -1,11 +1,16 @@
+import array
+import collections
+import concurrent.futures
+import hashlib
 import os
-import re
-import subprocess
 import json
+import tempfile
 
-import networkx
 from pygments import lexers, token, util
 
+from lib import scanner
+from lib import utilities
+
 TOKENTYPE_WHITELIST = [
     token.Name,
     token.Name.Attribute,
@@ -24,12 +29,10 @@ TOKENTYPE_WHITELIST = [
     token.Name.Variable.Global,
     token.Name.Variable.Instance
 ]
-SUPPORTED_LANGUAGES = []
+SUPPORTED_LANGUAGES = list(scanner.TYPES.keys())
 
-# Regular expression to parse the list of languages supported by ack as listed
-#  by ack --help-types
-#  Pattern: "    --[no]python"
-RE_ACK_LANGUAGES = re.compile('(?:^\s{4}--\[no\])(\w*)')
+# Minimum number of files per task submitted to the process pool.
+CHUNKSIZE = 256
 
 # Map GHTorrent's projects.language to ACK compatible language (if necessary).
 ACK_LANGUAGE_MAP = {
@@ -42,20 +45,6 @@ ACK_LANGUAGE_MAP = {
 }
 
 
-def init(cursor):
-    global SUPPORTED_LANGUAGES
-
-    ack_process2 = subprocess.Popen(
-        ['ack', '--help-types'], stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
-
-    lines, _ = [x.decode('utf-8') for x in ack_process2.communicate()]
-    for line in lines.split('\n'):
-        match = RE_ACK_LANGUAGES.match(line)
-        if match:
-            SUPPORTED_LANGUAGES.append(match.group(1))
-
-
 def run(project_id, repo_path, cursor, **options):
     result = 0
 
@@ -77,35 +66,44 @@ def run(project_id, repo_path, cursor, **options):
         ack_language = ACK_LANGUAGE_MAP[ack_language]
 
     # Edge case if the repository language is not supported by us.
-    if (ack_language not in SUPPORTED_LANGUAGES) and (language.lower() != 'javascript'):
+    if ack_language not in SUPPORTED_LANGUAGES:
         return False, result
 
-    file_paths = []
-    if language.lower() == 'javascript':
-        for root, dirs, files in os.walk(repo_path):
-            for _file in files:
-                if _file.endswith(".js"):
-                    file_paths.append(os.path.join(root, _file))
-    else:
-        ack_process = subprocess.Popen(
-            ['ack', '-f', "--{0}".format(ack_language), repo_path],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        lines, _ = [
-            x.decode(errors='replace') for x in ack_process.communicate()
-        ]
-        file_paths = [line for line in lines.split('\n') if line.strip()]
+    (index, under) = scanner.lookup(repo_path)
+    entries = index.select(types=[ack_language], under=under)
+    file_paths = [os.path.join(index.path, entry.path) for entry in entries]
     # Immediately fail the attribute if `minimumFiles` is not met.
     if len(file_paths) < options.get('minimumFiles', 2):
         return False, result
 
-    graph = networkx.Graph()
+    graph = Components()
     if language.lower() == 'javascript':
         # JavaScript: Use external utility
-        success = build_js_graph(repo_path, file_paths, graph)
+        if isinstance(index, scanner.TreeIndex):
+            # js-callgraph only reads from disk, so the files analyzed are
+            #   written out of the git repository.
+            with tempfile.TemporaryDirectory() as directory:
+                file_paths = index.export(entries, directory)
+                success = build_js_graph(
+                    os.path.join(directory, under) if under else directory,
+                    file_paths, graph
+                )
+        else:
+            success = build_js_graph(repo_path, file_paths, graph)
     else:
         lexer = lexers.get_lexer_by_name(language)
-        success = build_graph(repo_path, graph, lexer)
+        processes = min(
+            options.get('processes', 1), os.cpu_count() or 1
+        )
+        target = None
+        if options.get('earlyExit', False):
+            target = options['threshold'] * len(file_paths)
+        (success, stopped) = build_graph(
+            file_paths, graph, lexer, options.get('maximumFanOut', None),
+            processes, target
+        )
+        if success and stopped:
+            return True, utilities.LowerBound(get_connectedness(graph))
     if success:
         monolithicity = get_connectedness(graph)
     else:
@@ -116,7 +114,7 @@ def run(project_id, repo_path, cursor, **options):
 def build_js_graph(repo_path, file_paths, graph):
     # add nodes
     for file_path in file_paths:
-        graph.add_node(Node(file_path))
+        graph.add(file_path)
     name = repo_path.split('/')[-1]  # get name of the repository
     # compute and store call graph as json using js-callgraph
     graph_process = f"gtimeout 1000 js-callgraph --cg {repo_path} --output {name}_graph.json >/dev/null 2>&1"
@@ -130,8 +128,7 @@ def build_js_graph(repo_path, file_paths, graph):
                 target_file = call['target']['file']  # identify the target of the call
                 # both source and target should be nodes in the call graph, i.e., .js files
                 if source_file.endswith(".js") and target_file.endswith(".js"):
-                    graph.add_edge(Node(source_file), Node(target_file))  # add edge
-            graph.to_undirected()  # just in case, transform into undirected (should be undirected by default anyway)
+                    graph.union(source_file, target_file)  # add edge
         os.remove('{}_graph.json'.format(name))  # delete the json representation of the call graph
         return True
     except IOError as err:
@@ -139,7 +136,8 @@ def build_js_graph(repo_path, file_paths, graph):
         return False
 
 
-def build_graph(file_paths, graph, lexer):
+def build_graph(
+        file_paths, graph, lexer, fanout=None, processes=1, target=None):
     """
     for each file in the set of files
         create a node and add it to the graph
@@ -157,72 +155,212 @@ def build_graph(file_paths, graph, lexer):
         for each token in the resulting tokens
             check if the token is using a symbol
             if true:
-                search the graph for the node that has the symbol definition
-                create a relationship from the current file to the node with
+                look up the nodes that have the symbol definition
+                create a relationship from the current file to the nodes with
                 the symbol definition
+
+    Symbol definitions are looked up in an index from symbol to the nodes
+    defining it. References to symbols defined in more than `fanout` files
+    are ignored when `fanout` is specified.
+
+    Files are tokenized by a pool of `processes` processes when more than one
+    is specified. Only the symbols of each file are sent back to be merged
+    into the graph.
+
+    References are no longer resolved once the largest component contains at
+    least `target` files when `target` is specified.
+
+    Returns a 2-tuple of whether the graph was built and whether it was
+    stopped short of resolving every reference because of `target`.
+    """
+    if processes > 1 and len(file_paths) > CHUNKSIZE:
+        chunksize = max(CHUNKSIZE, len(file_paths) // (processes * 4) + 1)
+        chunks = [
+            file_paths[i:i + chunksize]
+            for i in range(0, len(file_paths), chunksize)
+        ]
+        symbols = list()
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            for _symbols in executor.map(
+                tokenize, chunks, [lexer] * len(chunks)
+            ):
+                symbols.extend(_symbols)
+    else:
+        symbols = tokenize(file_paths, lexer)
+
+    definitions = collections.defaultdict(list)
+    for (file_path, defines, _) in symbols:
+        id_ = graph.add(file_path)
+        for symbol in defines:
+            definitions[symbol].append(id_)
+
+    for (file_path, defines, references) in symbols:
+        caller = graph.add(file_path)
+        if 'DEBUG' in os.environ:
+            print('{0}\n{1}\n{2}'.format(
+                file_path, '=' * len(file_path), '\n'.join(defines)
+            ))
+
+        for reference in references:
+            # Checked before a reference is resolved so that a graph which
+            #   reaches the target with its last reference is complete.
+            if target is not None and graph.maximum >= target:
+                return True, True
+            callees = definitions.get(reference, None)
+            if not callees:
+                continue
+            if fanout is not None and len(callees) > fanout:
+                continue
+            for callee in callees:
+                if callee != caller:
+                    graph.union_ids(caller, callee)
+    return True, False
+
+
+def tokenize(file_paths, lexer):
+    """Return the symbols defined and referenced in each file.
+
+    Symbols of contents that were tokenized before are retrieved from
+    lib.utilities.SYMBOL_CACHE when it is set.
+
+    Parameters
+    ----------
+    file_paths : list
+        Absolute paths of the files to tokenize.
+    lexer : pygments.lexer.Lexer
+        Lexer to tokenize the files with.
+
+    Returns
+    -------
+    symbols : list
+        List of 3-tuples of the path of a file, the set of symbols it
+        defines and the set of symbols it references. Files that cannot be
+        read or decoded have no symbols.
     """
+    contents = dict()
     for file_path in file_paths:
-        node = Node(file_path)
-        graph.add_node(node)
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                contents = file.read()
-
-            tokens = lexer.get_tokens(contents)
-            for item in tokens:
-                token_type = item[0]
-                symbol = item[1]
-                if token_type in [token.Name.Function, token.Name.Class]:
-                    node.defines.add(symbol)
-                elif token_type in TOKENTYPE_WHITELIST:
-                    node.references.add(symbol)
-            if 'DEBUG' in os.environ:
-                print(node)
-        except FileNotFoundError as e:
-            continue
-        except UnicodeDecodeError:
-            continue
-
-    for caller in graph.nodes_iter():
-        for reference in caller.references:
-            for callee in graph.nodes_iter():
-                if callee is not caller and reference in callee.defines:
-                    graph.add_edge(caller, callee)
-    return True
+            contents[file_path] = scanner.read(file_path)
+        except FileNotFoundError:
+            contents[file_path] = None
+
+    symbol_cache = utilities.SYMBOL_CACHE
+    digests = dict()
+    cached = dict()
+    if symbol_cache is not None:
+        for (file_path, _contents) in contents.items():
+            if _contents is not None:
+                digests[file_path] = hashlib.sha1(_contents).hexdigest()
+        cached = symbol_cache.get(lexer.name, set(digests.values()))
+
+    symbols = list()
+    fresh = dict()
+    for file_path in file_paths:
+        digest = digests.get(file_path, None)
+        if digest in cached:
+            (defines, references) = cached[digest]
+        else:
+            (defines, references) = get_symbols(contents[file_path], lexer)
+            if digest is not None:
+                fresh[digest] = (defines, references)
+        symbols.append((file_path, defines, references))
+
+    if symbol_cache is not None:
+        symbol_cache.put(lexer.name, fresh)
+    return symbols
+
+
+def get_symbols(contents, lexer):
+    """Return the set of symbols defined and the set of symbols referenced
+    in contents (bytes). Contents that cannot be decoded have no symbols."""
+    defines = set()
+    references = set()
+    if contents is None:
+        return defines, references
+    try:
+        contents = contents.decode('utf-8')
+    except UnicodeDecodeError:
+        return defines, references
 
+    tokens = lexer.get_tokens(contents)
+    for item in tokens:
+        token_type = item[0]
+        symbol = item[1]
+        if token_type in [token.Name.Function, token.Name.Class]:
+            defines.add(symbol)
+        elif token_type in TOKENTYPE_WHITELIST:
+            references.add(symbol)
+    return defines, references
 
-def get_connectedness(graph):
-    components = list(networkx.connected_component_subgraphs(graph))
-    # N = networkx.nx_agraph.to_agraph(graph)
-    # N.layout(prog='dot')
-    # N.draw("file.png")
-    components.sort(key=lambda i: len(i.nodes()), reverse=True)
-    largest_component = components[0]
 
+def get_connectedness(graph):
     connectedness = 0
-    if graph.nodes() and len(graph.nodes()) > 0:
-        connectedness = len(largest_component.nodes()) / len(graph.nodes())
+    if len(graph) > 0:
+        connectedness = graph.largest() / len(graph)
 
     return connectedness
 
 
-class Node():
-    def __init__(self, path):
-        self.path = path
-        self.defines = set()
-        self.references = set()
+class Components(object):
+    """Connected components of an undirected graph of files.
 
-    def __hash__(self):
-        return hash(self.path)
-
-    def __eq__(self, other):
-        return self.path == other.path
+    Components are maintained with a union-find structure over integer file
+    ids as edges are discovered, so neither the edges nor the components
+    themselves are ever stored.
+    """
+    def __init__(self):
+        self.ids = dict()
+        self.maximum = 0
+        self._parents = array.array('l')
+        self._sizes = array.array('l')
+
+    def add(self, key):
+        """Return the id of the file identified by key, adding the file as a
+        component of its own if it is not in the graph."""
+        id_ = self.ids.get(key, None)
+        if id_ is None:
+            id_ = len(self._parents)
+            self.ids[key] = id_
+            self._parents.append(id_)
+            self._sizes.append(1)
+            self.maximum = max(self.maximum, 1)
+        return id_
+
+    def find(self, id_):
+        """Return the id of the root of the component containing id_."""
+        root = id_
+        while self._parents[root] != root:
+            root = self._parents[root]
+        while self._parents[id_] != root:
+            (self._parents[id_], id_) = (root, self._parents[id_])
+        return root
+
+    def union(self, key, other):
+        """Connect the files identified by key and other."""
+        self.union_ids(self.add(key), self.add(other))
+
+    def union_ids(self, id_, other):
+        """Connect the files with ids id_ and other."""
+        root = self.find(id_)
+        other = self.find(other)
+        if root == other:
+            return
+        if self._sizes[root] < self._sizes[other]:
+            (root, other) = (other, root)
+        self._parents[other] = root
+        self._sizes[root] += self._sizes[other]
+        self.maximum = max(self.maximum, self._sizes[root])
+
+    def connected(self, key, other):
+        return self.find(self.ids[key]) == self.find(self.ids[other])
+
+    def largest(self):
+        """Return the number of files in the largest component."""
+        return self.maximum
+
+    def __len__(self):
+        return len(self._parents)
 
-    def __str__(self):
-        symbol_str = '\r' + '\n'.join(self.defines)
-        return "{0}\n{1}\n{2}".format(
-            self.path, '=' * len(self.path), symbol_str
-        )
 
 if __name__ == '__main__':
     import importlib
@@ -243,7 +381,6 @@ if __name__ == '__main__':
     connection.connect()
 
     cursor = connection.cursor()
-    init(None)
     result = run(sys.argv[1], sys.argv[2], cursor, threshold=0.75)
     cursor.close()
 
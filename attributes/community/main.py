@@ -14,24 +14,55 @@ QUERY = '''
     GROUP BY c.author_id
     ORDER BY COUNT(*) DESC
 '''
+# Query counts the number of distinct authors contributing to each project in
+#   a list of projects.
+BULK_QUERY = '''
+    SELECT pc.project_id, c.author_id, COUNT(*)
+    FROM commits c JOIN project_commits pc
+      ON pc.commit_id = c.id
+    WHERE pc.project_id IN ({0})
+    GROUP BY pc.project_id, c.author_id
+    ORDER BY pc.project_id, COUNT(*) DESC
+'''
 
 
 def run(project_id, repo_path, cursor, **options):
-    num_core_contributors = 0
-
     cursor.execute(QUERY.format(project_id))
     rows = cursor.fetchall()
     if cursor.rowcount == 0:    # Non-existent history
-        return False, num_core_contributors
+        return False, 0
+
+    return get_core_contributors([row[1] for row in rows], **options)
 
-    commits = collections.OrderedDict()
-    for row in rows:
-        commits[row[0]] = row[1]
-    num_commits = sum(commits.values())
+
+def bulk_run(cursor, project_ids, **options):
+    cursor.execute(
+        BULK_QUERY.format(','.join(str(int(i)) for i in project_ids))
+    )
+    commits = collections.defaultdict(list)
+    for (project_id, _, count) in cursor.fetchall():
+        commits[project_id].append(count)
+
+    results = dict()
+    for project_id in project_ids:
+        if project_id not in commits:   # Non-existent history
+            results[project_id] = (False, 0)
+        else:
+            results[project_id] = get_core_contributors(
+                commits[project_id], **options
+            )
+    return results
+
+
+def get_core_contributors(commits, **options):
+    """Return the result given the number of commits of each author of a
+    project, in descending order."""
+    num_core_contributors = 0
+    num_commits = sum(commits)
 
     cutoff = options.get('cutoff', 1.0)
     aggregate = 0
-    for (_, v) in commits.items():
+    for v in commits:
         num_core_contributors += 1
         aggregate += v
         if (aggregate / num_commits) >= cutoff:
@@ -1,5 +1,7 @@
 import os
 
+from lib import scanner
+
 
 class CiDiscoverer(object):
     """Base class for all CiDiscoverer classes"""
@@ -28,7 +30,7 @@ class CiDiscoverer(object):
     def __travis__(self, path):
         config = os.path.join(path, '.travis.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -36,7 +38,7 @@ class CiDiscoverer(object):
     def __appveyor__(self, path):
         config = os.path.join(path, 'appveyor.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -44,7 +46,7 @@ class CiDiscoverer(object):
     def __magnumci__(self, path):
         config = os.path.join(path, '.magnum.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -52,7 +54,7 @@ class CiDiscoverer(object):
     def __circleci__(self, path):
         config = os.path.join(path, 'circle.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -60,7 +62,7 @@ class CiDiscoverer(object):
     def __houndci__(self, path):
         config = os.path.join(path, '.hound.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -68,7 +70,7 @@ class CiDiscoverer(object):
     def __shippable__(self, path):
         config = os.path.join(path, 'shippable.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -76,7 +78,7 @@ class CiDiscoverer(object):
     def __solanoci__(self, path):
         config = os.path.join(path, 'solano.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -84,7 +86,7 @@ class CiDiscoverer(object):
     def __wercker__(self, path):
         config = os.path.join(path, 'wercker.yml')
 
-        if os.path.exists(config) and os.path.getsize(config) > 0:
+        if scanner.getsize(config):
             return True
 
         return False
@@ -43,10 +43,10 @@ def run(project_id, repo_path, cursor, **options):
                      and json_response['license'] else False
 
     if not result:
-        for pattern in LICENSE_PATTERNS:
-            if utilities.search(pattern, repo_path, ignorecase=True):
-                result = True
-                break
+        matches = utilities.search_all(
+            LICENSE_PATTERNS, repo_path, ignorecase=True
+        )
+        result = any(matches.values())
 
     return result, result
 
@@ -2,43 +2,38 @@ import sys
 
 from dateutil import relativedelta
 
+from lib import stats
+
 
 def run(project_id, repo_path, cursor, **options):
-    avg_issues = 0
+    return get_average_issues(stats.get(cursor, project_id), **options)
 
-    cursor.execute(
-        '''
-            SELECT MIN(c.created_at), MAX(c.created_at)
-            FROM commits c
-                JOIN project_commits pc ON pc.commit_id = c.id
-            WHERE pc.project_id = {0} and c.created_at > 0
-        '''.format(project_id)
-    )
 
-    result = cursor.fetchone()
-    first_commit_date = result[0]
-    last_commit_date = result[1]
+def bulk_run(cursor, project_ids, **options):
+    _stats = stats.get_all(cursor, project_ids)
+    return {
+        project_id: get_average_issues(_stats.get(project_id), **options)
+        for project_id in project_ids
+    }
 
-    if first_commit_date is None or last_commit_date is None:
-        return False, avg_issues
 
-    cursor.execute(
-        '''
-            SELECT COUNT(*)
-            FROM issues i
-            WHERE i.repo_id = {0}
-        '''.format(project_id)
-    )
+def get_average_issues(_stats, **options):
+    avg_issues = 0
 
-    result = cursor.fetchone()
-    num_issues = result[0]
+    if (
+        _stats is None or _stats.first_commit_date is None or
+        _stats.last_commit_date is None
+    ):
+        return False, avg_issues
 
     # Compute the number of months between the first and last commit
-    delta = relativedelta.relativedelta(last_commit_date, first_commit_date)
+    delta = relativedelta.relativedelta(
+        _stats.last_commit_date, _stats.first_commit_date
+    )
     num_months = delta.years * 12 + delta.months
 
     if num_months >= options.get('minimumDurationInMonths', 1):
-        avg_issues = num_issues / num_months
+        avg_issues = _stats.num_issues / num_months
     else:
         return False, avg_issues
 
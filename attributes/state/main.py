@@ -2,32 +2,34 @@ import sys
 from datetime import datetime
 
 from lib import dateutil
+from lib import stats
 from lib import utilities
 
-QUERY = '''
-    SELECT MAX(c.created_at)
-    FROM commits c
-        JOIN project_commits pc ON pc.commit_id = c.id
-    WHERE pc.project_id = {0} and c.created_at > 0
-'''
-
 
 def run(project_id, repo_path, cursor, **options):
+    return get_state(stats.get(cursor, project_id), **options)
+
+
+def bulk_run(cursor, project_ids, **options):
+    _stats = stats.get_all(cursor, project_ids)
+    return {
+        project_id: get_state(_stats.get(project_id), **options)
+        for project_id in project_ids
+    }
+
+
+def get_state(_stats, **options):
     bresult = False
     rresult = 'dormant'
 
-    cursor.execute(QUERY.format(project_id))
-    result = cursor.fetchone()
-    last_commit_date = result[0]
-
-    if last_commit_date is not None:
+    if _stats is not None and _stats.last_commit_date is not None:
         # Compute the delta between the last commit in the database and today.
         # Note: today may be the date the GHTorrent dump was published by
         #       ghtorrent.org
         today = options.get('today', datetime.today().date())
         if isinstance(today, str):
             today = datetime.strptime(today, '%Y-%m-%d')
-        delta = dateutil.relativedelta(today, last_commit_date)
+        delta = dateutil.relativedelta(today, _stats.last_commit_date)
         threshold = utilities.parse_datetime_delta(options['threshold'])
         bresult = delta <= threshold
         if bresult:
@@ -1,5 +1,8 @@
+import functools
 import os
 
+from lib import matcher
+from lib import scanner
 from lib import utilities
 
 TEST_DIRECTORIES = ['test', 'tests', 'spec']
@@ -79,6 +82,24 @@ def get_test_discoverer(language):
         raise Exception('Test discoverer for %s is not defined.' % language)
 
 
+def framework(pattern, whole=False):
+    """Decorate a method of a TestDiscoverer returning the proportion of the
+    source code, of sloc lines, using a unit testing framework identified by
+    pattern.
+
+    Frameworks listed in the frameworks of a discoverer are searched for
+    together by discover(), in a single pass over the source code.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self, path, sloc):
+            return self.measure(path, sloc, pattern, whole=whole)
+        wrapper.pattern = pattern
+        wrapper.whole = whole
+        return wrapper
+    return decorator
+
+
 class TestDiscoverer(object):
     """Base class for all TestDiscoverer classes"""
     def __init__(self):
@@ -104,23 +125,19 @@ class TestDiscoverer(object):
         proportion = 0
         if sloc > 0:
             # Pass 1: Look for a unit testing frameworks
-            for framework in self.frameworks:
-                proportion += framework(path, sloc)
+            proportion = self.measure_all(path, sloc, self.frameworks)
 
             # Pass 2: Look for files in conventional test directories
             # NOTE: Second pass is necessary only when the proportion of unit
             # tests from Pass 1 is less than 1%
             if proportion < 0.01:
                 _path = None
-                done = False
-                for (root, dnames, _) in os.walk(path):
-                    for item in TEST_DIRECTORIES:
-                        if item in dnames:
-                            _path = os.path.join(root, item)
-                            done = True
-                            break
-                    if done:
-                        break
+                (index, under) = scanner.lookup(path)
+                directory = index.find_directory(
+                    TEST_DIRECTORIES, under=under
+                )
+                if directory:
+                    _path = os.path.join(index.path, directory)
 
                 files = None
                 if _path:
@@ -137,10 +154,29 @@ class TestDiscoverer(object):
         return proportion
 
     def measure(self, path, sloc, pattern, whole=False):
-        proportion = 0
         files = utilities.search(
             pattern, path, whole=whole, include=self.extensions
         )
+        return self._get_proportion(path, sloc, files)
+
+    def measure_all(self, path, sloc, frameworks):
+        """Return the sum of the proportions of the source code using each of
+        the frameworks, methods decorated with framework(), searching for all
+        of them at once."""
+        regexes = [
+            matcher.get_whole(f.pattern) if f.whole else f.pattern
+            for f in frameworks
+        ]
+        files = utilities.search_all(
+            list(set(regexes)), path, include=self.extensions
+        )
+        return sum(
+            self._get_proportion(path, sloc, files[regex])
+            for regex in regexes
+        )
+
+    def _get_proportion(self, path, sloc, files):
+        proportion = 0
         if files:
             # SLOC of test code
             _slotc = utilities.get_loc(path, files=files)
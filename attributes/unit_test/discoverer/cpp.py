@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class CppTestDiscoverer(TestDiscoverer):
@@ -14,25 +14,25 @@ class CppTestDiscoverer(TestDiscoverer):
             self.__stout_gtest__
         ]
 
+    @framework('#include <assert.h>', whole=True)
     def __assert__(self, path, sloc):
-        pattern = '#include <assert.h>'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
 
+    @framework((
+        '(BOOST_TEST_ALTERNATIVE_INIT_API|boost/test/unit_test.hpp|'
+        'boost/test/included/unit_test.hpp|BOOST_TEST_DYN_LINK)'
+    ), whole=True)
     def __boost__(self, path, sloc):
-        pattern = (
-            '(BOOST_TEST_ALTERNATIVE_INIT_API|boost/test/unit_test.hpp|'
-            'boost/test/included/unit_test.hpp|BOOST_TEST_DYN_LINK)'
-        )
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
 
+    @framework('#include "catch.hpp"', whole=True)
     def __catch__(self, path, sloc):
-        pattern = '#include "catch.hpp"'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
 
+    @framework('#include (<|")(gtest/)?gtest.h(>|")', whole=True)
     def __gtest__(self, path, sloc):
-        pattern = '#include (<|")(gtest/)?gtest.h(>|")'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
 
+    @framework('#include <stout/gtest.hpp>', whole=True)
     def __stout_gtest__(self, path, sloc):
-        pattern = '#include <stout/gtest.hpp>'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
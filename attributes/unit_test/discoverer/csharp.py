@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class CSharpTestDiscoverer(TestDiscoverer):
@@ -12,14 +12,14 @@ class CSharpTestDiscoverer(TestDiscoverer):
             self.__xunit__,
         ]
 
+    @framework('using NUnit.Framework;')
     def __nunit__(self, path, sloc):
-        pattern = 'using NUnit.Framework;'
-        return self.measure(path, sloc, pattern)
+        pass
 
+    @framework('using Microsoft.VisualStudio.TestTools.UnitTesting;')
     def __vs_unit_testing__(self, path, sloc):
-        pattern = 'using Microsoft.VisualStudio.TestTools.UnitTesting;'
-        return self.measure(path, sloc, pattern)
+        pass
 
+    @framework('using Xunit;')
     def __xunit__(self, path, sloc):
-        pattern = 'using Xunit;'
-        return self.measure(path, sloc, pattern)
+        pass
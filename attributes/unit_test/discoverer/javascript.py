@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class JavaScriptTestDiscoverer(TestDiscoverer):
@@ -11,12 +11,10 @@ class JavaScriptTestDiscoverer(TestDiscoverer):
             self.__qunit__
         ]
 
-    # Qunit
+    @framework('QUnit.test\(.*\)')
     def __qunit__(self, path, sloc):
-        pattern = 'QUnit.test\(.*\)'
-        return self.measure(path, sloc, pattern)
+        """Qunit"""
 
-    # Mocha, Jest, Jasmine
+    @framework('(describe\()(.*),(.*)\(\)')
     def __mocha__(self, path, sloc):
-        pattern = '(describe\()(.*),(.*)\(\)'
-        return self.measure(path, sloc, pattern)
+        """Mocha, Jest, Jasmine"""
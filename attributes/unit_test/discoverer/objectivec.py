@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class ObjectiveCTestDiscoverer(TestDiscoverer):
@@ -10,6 +10,6 @@ class ObjectiveCTestDiscoverer(TestDiscoverer):
             self.__xctest__
         ]
 
+    @framework('XCTest.h', whole=True)
     def __xctest__(self, path, sloc):
-        pattern = 'XCTest.h'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
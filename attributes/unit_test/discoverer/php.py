@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class PhpTestDiscoverer(TestDiscoverer):
@@ -10,6 +10,6 @@ class PhpTestDiscoverer(TestDiscoverer):
             self.__phpunit__
         ]
 
+    @framework('PHPUnit_(Framework|Extensions_Database)_TestCase')
     def __phpunit__(self, path, sloc):
-        pattern = 'PHPUnit_(Framework|Extensions_Database)_TestCase'
-        return self.measure(path, sloc, pattern)
+        pass
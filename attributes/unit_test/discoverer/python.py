@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class PythonTestDiscoverer(TestDiscoverer):
@@ -12,14 +12,14 @@ class PythonTestDiscoverer(TestDiscoverer):
             self.__unittest__,
         ]
 
+    @framework('((from|import)(\s)(django\.test))')
     def __django_test__(self, path, sloc):
-        pattern = '((from|import)(\s)(django\.test))'
-        return self.measure(path, sloc, pattern)
+        pass
 
+    @framework('((from|import)(\s)(nose))')
     def __nose__(self, path, sloc):
-        pattern = '((from|import)(\s)(nose))'
-        return self.measure(path, sloc, pattern)
+        pass
 
+    @framework('((from|import)(\s)(unittest))')
     def __unittest__(self, path, sloc):
-        pattern = '((from|import)(\s)(unittest))'
-        return self.measure(path, sloc, pattern)
+        pass
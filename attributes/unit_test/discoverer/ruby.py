@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class RubyTestDiscoverer(TestDiscoverer):
@@ -12,14 +12,14 @@ class RubyTestDiscoverer(TestDiscoverer):
             self.__ruby_unit_testing__,
         ]
 
+    @framework('(MiniTest::Unit::TestCase|Minitest::Test)', whole=True)
     def __minitest__(self, path, sloc):
-        pattern = '(MiniTest::Unit::TestCase|Minitest::Test)'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
 
+    @framework('(describe)(.*)(do)')
     def __rspec__(self, path, sloc):
-        pattern = '(describe)(.*)(do)'
-        return self.measure(path, sloc, pattern)
+        pass
 
+    @framework('Test::Unit::TestCase', whole=True)
     def __ruby_unit_testing__(self, path, sloc):
-        pattern = 'Test::Unit::TestCase'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
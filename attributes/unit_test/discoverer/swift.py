@@ -1,4 +1,4 @@
-from attributes.unit_test.discoverer import TestDiscoverer
+from attributes.unit_test.discoverer import TestDiscoverer, framework
 
 
 class SwiftTestDiscoverer(TestDiscoverer):
@@ -10,6 +10,6 @@ class SwiftTestDiscoverer(TestDiscoverer):
             self.__xctest__
         ]
 
+    @framework('XCTest', whole=True)
     def __xctest__(self, path, sloc):
-        pattern = 'XCTest'
-        return self.measure(path, sloc, pattern, whole=True)
+        pass
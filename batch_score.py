@@ -1,13 +1,35 @@
 #!/usr/bin/env python3
 
 import argparse
+import hashlib
 import os
 import sys
 import traceback
 
-from lib import core, utilities, run
+from lib import (
+    budget, cache, checkouts, core, metrics, prefetch, utilities, run
+)
 from lib.attributes import Attributes
 from lib.database import Database
+from lib.samples import Checkpoint, Samples
+
+# Name of the file, under the repositories root, persisting cached results.
+CACHE_FILE = '.reaper.sqlite'
+# Default capacity, in MiB, of the cache of symbols extracted from source code.
+SYMBOL_CACHE_SIZE = 1024
+# Name of the file, under the repositories root, recording the projects whose
+#   results were saved. Formatted with a digest of the sample file path and
+#   the results table, so that runs over other samples or tables keep theirs.
+CHECKPOINT_FILE = '.reaper.checkpoint.{0}'
+# Name of the file, under the repositories root, the timings of a run are
+#   appended to.
+METRICS_FILE = '.reaper.metrics.jsonl'
+# Name of the file, under the repositories root, recording the size and last
+#   use of the checkouts kept within the disk quota.
+CHECKOUTS_FILE = '.reaper.checkouts.json'
+# Name of the directory, under the repositories root, holding the mirrors of
+#   repositories when the clone mode is 'mirror' or 'tree'.
+MIRROR_DIRECTORY = '.mirrors'
 
 
 def process_arguments():
@@ -26,6 +48,63 @@ def process_arguments():
         dest='cleanup',
         help='Delete cloned repositories from the disk when done.'
     )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        dest='cache',
+        help=(
+            'Reuse results of source attributes computed in previous runs for'
+            ' the same source tree.'
+        )
+    )
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        dest='pipeline',
+        help=(
+            'Fetch, evaluate and save projects in concurrent stages, each with'
+            ' a pool of processes of its own.'
+        )
+    )
+    parser.add_argument(
+        '--budget',
+        action='store_true',
+        dest='budget',
+        help=(
+            'Predict the cost of attributes from runtimes recorded in previous'
+            ' runs to start the longest projects first and to shorten'
+            ' timeouts.'
+        )
+    )
+    parser.add_argument(
+        '--metrics',
+        action='store_true',
+        dest='metrics',
+        help=(
+            'Record the time taken by cloning, each attribute and database'
+            ' queries for every project, and summarize them when done.'
+        )
+    )
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        dest='prefetch',
+        default=0,
+        required=False,
+        help=(
+            'Number of projects whose repositories are cloned in the'
+            ' background ahead of their analysis.'
+        )
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        dest='resume',
+        help=(
+            'Skip the projects whose results were saved by a previous run'
+            ' that did not finish.'
+        )
+    )
     parser.add_argument(
         '-c',
         '--config',
@@ -51,7 +130,6 @@ def process_arguments():
     parser.add_argument(
         '-s',
         '--repositories-sample',
-        type=argparse.FileType('r'),
         dest='repositories_sample',
         help='A file containing newline-separated GHTorrent project ids'
     )
@@ -106,29 +184,113 @@ def main():
         # TODO: Refactor
         core.config = config
         utilities.TOKENIZER = core.Tokenizer()
+        utilities.LOC_COUNTER = config['options'].get('loc', 'cloc')
+        utilities.LOC_PROCESSES = config['options'].get('locProcesses', 1)
+        utilities.CLONE_MODE = config['options'].get('cloneMode', 'full')
+        utilities.MIRROR_ROOT = os.path.join(
+            args.repositories_root, MIRROR_DIRECTORY
+        )
 
         database = Database(config['options']['datasource'])
         globaloptions = {
             'today': config['options']['today'],
             'timeout': config['options']['timeout']
         }
+        if not os.path.exists(args.repositories_root):
+            os.makedirs(args.repositories_root, exist_ok=True)
+
+        _cache = None
+        if args.cache:
+            _cache = cache.Cache(
+                os.path.join(args.repositories_root, CACHE_FILE)
+            )
+            utilities.SYMBOL_CACHE = cache.SymbolCache(
+                os.path.join(args.repositories_root, CACHE_FILE),
+                config['options'].get('symbolCacheSize', SYMBOL_CACHE_SIZE) *
+                1024 * 1024
+            )
+
+        _budget = None
+        if args.budget:
+            _budget = budget.Budget(
+                os.path.join(args.repositories_root, CACHE_FILE),
+                config['options'].get('budgetSlack', budget.SLACK)
+            )
+
+        _checkouts = None
+        if 'diskQuota' in config['options']:
+            # Mirrors are kept outside of the checkouts, where the quota
+            #   would not bound them.
+            if utilities.CLONE_MODE in ['mirror', 'tree']:
+                raise Exception(
+                    'cloneMode {0} cannot be used with diskQuota.'.format(
+                        utilities.CLONE_MODE
+                    )
+                )
+            _checkouts = checkouts.Checkouts(
+                args.repositories_root,
+                os.path.join(args.repositories_root, CHECKOUTS_FILE),
+                int(config['options']['diskQuota'] * 1024 * 1024 * 1024)
+            )
+
         attributes = Attributes(
             manifest['attributes'], database, args.cleanup, args.key_string,
-            **globaloptions
+            _cache, config['options'].get('backend', 'process'),
+            config['options'].get('concurrentAttributes', False), _budget,
+            _checkouts, **globaloptions
         )
 
-        if not os.path.exists(args.repositories_root):
-            os.makedirs(args.repositories_root, exist_ok=True)
-
         table = 'reaper_results'
         if args.goldenset:
             table = 'reaper_goldenset'
 
+        digest = hashlib.sha1('{0}\0{1}'.format(
+            os.path.abspath(args.repositories_sample), table
+        ).encode()).hexdigest()[:12]
+        checkpoint = Checkpoint(os.path.join(
+            args.repositories_root, CHECKPOINT_FILE.format(digest)
+        ))
+        completed = set()
+        if args.resume:
+            completed = checkpoint.load()
+        else:
+            checkpoint.reset()
+
+        if args.metrics:
+            metrics.PATH = os.path.join(args.repositories_root, METRICS_FILE)
+            if not args.resume and os.path.exists(metrics.PATH):
+                os.remove(metrics.PATH)
+
+        _prefetcher = None
+        if args.prefetch > 0 and not args.pipeline:
+            bandwidth = config['options'].get('prefetchBandwidth', None)
+            _prefetcher = prefetch.Prefetcher(
+                args.repositories_root, args.prefetch,
+                config['options'].get(
+                    'prefetchConcurrency', prefetch.CONCURRENCY
+                ),
+                bandwidth * 1024 * 1024 if bandwidth is not None else None,
+                _checkouts
+            )
+
         _run = run.Run(
             args.repositories_root, attributes, database,
-            config['options']['threshold'], args.num_processes
+            config['options']['threshold'], args.num_processes,
+            config['options'].get('persistBatchSize', run.BATCH_SIZE),
+            config['options'].get('persistInterval', run.FLUSH_INTERVAL),
+            config['options'].get('bulkSize', run.BULK_SIZE), checkpoint,
+            _prefetcher
         )
-        _run.run([int(line) for line in args.repositories_sample], table)
+        samples = Samples(args.repositories_sample, completed)
+        if args.pipeline:
+            processes = dict(config['options'].get('pipeline', dict()))
+            capacity = processes.pop('capacity', args.num_processes)
+            _run.run_pipeline(samples, table, processes, capacity)
+        else:
+            _run.run(samples, table)
+
+        if metrics.PATH is not None:
+            metrics.report(metrics.PATH)
     except Exception as e:
         extype, exvalue, extrace = sys.exc_info()
         traceback.print_exception(extype, exvalue, extrace)
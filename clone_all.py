@@ -2,11 +2,12 @@ import os
 from finder import *
 from config import *
 from tqdm import tqdm
-import subprocess
 import pandas as pd
 
+from lib import utilities
 
-def clone(owner, name, directory, date=None):
+
+def clone(owner, name, directory, date=None, mode=None):
     """Clone a GitHub repository and reset its state to a specific commit.
 
     Parameters
@@ -20,6 +21,9 @@ def clone(owner, name, directory, date=None):
         will be reset to.
     directory : string
         Absolute path of a directory to clone the repository to.
+    mode : string, optional
+        How the repository is cloned, one of lib.utilities.CLONE_MODES.
+        Defaults to clone_mode in config.py.
 
     Returns
     -------
@@ -32,57 +36,14 @@ def clone(owner, name, directory, date=None):
         os.makedirs(DIR_CLONED, exist_ok=True)
     if not os.path.exists(path):
         os.makedirs(path, exist_ok=True)
-    url = 'https://github.com/{0}/{1}'.format(owner, name)
-
-    # Clone
-    command = 'git clone {0}'.format(url)
-    if 'DEBUG' in os.environ:
-        print(command)
-
-    process = subprocess.Popen(
-        command, cwd=path, shell=True,
-        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    )
-    process.wait()
-
-    if process.returncode != 0:
-        raise Exception('Failed to execute {0}'.format(command))
-
+    before = None
     if date is not None:
-        # Reset
-        path = os.path.join(path, name)
-        command = (
-            'git log -1 --before="{0} 00:00:00" --pretty="format:%H"'.format(
-                date
-            )
-        )
-        if 'DEBUG' in os.environ:
-            print(command)
-
-        process = subprocess.Popen(
-            command, cwd=path, shell=True,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        (out, err) = [i.decode() for i in process.communicate()]
-
-        if process.returncode != 0:
-            raise Exception('Failed to execute {0}'.format(command))
-
-        sha = out
-        command = 'git reset --hard {0}'.format(sha)
-        if 'DEBUG' in os.environ:
-            print(command)
-
-        process = subprocess.Popen(
-            command, cwd=path, shell=True,
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        )
-        process.wait()
-        if process.returncode != 0:
-            raise Exception('Failed to execute {0}'.format(command))
+        before = '{0} 00:00:00'.format(date)
+    utilities.checkout(owner, name, path, before, mode or clone_mode)
 
 
 if __name__ == "__main__":
+    utilities.MIRROR_ROOT = os.path.join(DIR_CLONED, '.mirrors')
     projects = pd.read_csv(PROJECTS)
     for project in tqdm(projects):
         slug = project.split('/')
@@ -3,6 +3,7 @@ today = "2020-06-01"
 github_tokens = []
 clone_all = True
 delete_after = False
+clone_mode = 'full'  # 'full', 'partial', 'shallow' or 'mirror'
 FEATURES = ['architecture',
             'management'
             'community',
@@ -4,13 +4,21 @@ import multiprocessing
 import os
 import shutil
 import sys
+import time
 import types
 import traceback
 from datetime import datetime
 
 import attributes
 
+from lib import budget
+from lib import metrics
+from lib import scanner
+from lib import scheduler
+from lib import stats
 from lib import utilities
+from lib import worker
+from lib.database import Database
 
 
 class Attribute(object):
@@ -22,7 +30,11 @@ class Attribute(object):
         self.requires_source = attribute.get('requires_source', False)
         self.essential = attribute.get('essential', False)
         self.persist = attribute.get('persist', True)
+        self.cacheable = attribute.get('cacheable', True)
         self.dependencies = attribute.get('dependencies', list())
+        self.resource = attribute.get(
+            'resource', scheduler.CPU if self.requires_source else scheduler.IO
+        )
         self.options = goptions
         self.options.update(attribute.get('options', dict()))
         self.reference = importlib.import_module('{0}.main'.format(self.name))
@@ -53,12 +65,20 @@ class Attribute(object):
 
 class Attributes(object):
     def __init__(
-        self, attributes, database, cleanup=False, keystring=None, **goptions
+        self, attributes, database, cleanup=False, keystring=None, cache=None,
+        backend='process', concurrent=False, budget=None, checkouts=None,
+        **goptions
     ):
         self.attributes = None
         self.database = database
         self.today = goptions.get('today', str(datetime.today().date()))
         self.cleanup = cleanup
+        self.cache = cache
+        self.backend = backend
+        self.concurrent = concurrent
+        self.budget = budget
+        self.checkouts = checkouts
+        self._workers = dict()
 
         self._parse_attributes(attributes, **goptions)
         self._parse_keystring(keystring)
@@ -71,6 +91,8 @@ class Attributes(object):
                 )
 
             self.database.connect()
+            with self.database.cursor() as cursor:
+                stats.materialize(cursor, samples)
             for attribute in self.attributes:
                 if hasattr(attribute.reference, 'global_init'):
                     with self.database.cursor() as cursor:
@@ -78,64 +100,236 @@ class Attributes(object):
         finally:
             self.database.disconnect()
 
-    def run(self, project_id, repository_root):
-        rresults = dict()
-        repository_home = os.path.join(repository_root, str(project_id))
-        outq = multiprocessing.Queue(maxsize=1)
-
+    def global_teardown(self):
+        """Release what global_init() created for the run."""
         try:
             self.database.connect()
+            with self.database.cursor() as cursor:
+                stats.drop(cursor)
+        finally:
+            self.database.disconnect()
 
-            repository_path = None
-            if self.requires_source:
-                repository_path = self._init_repository(
-                    project_id, repository_home
-                )
-
-            for attribute in self.attributes:
-                bresult = False
-                rresult = None
-
-                if not attribute.enabled:
+    def bulk_run(self, project_ids):
+        """Run the attributes implementing a bulk_run hook on projects.
+
+        Attributes that do not require the source code may implement
+        `bulk_run(cursor, project_ids, **options)` returning a dictionary
+        keyed by project identifier with the 2-tuple of the boolean and raw
+        result as the value, computing the results of many projects with a
+        few set-based queries instead of a few queries per project.
+
+        Parameters
+        ----------
+        project_ids : list
+            Identifiers of the projects to run the attributes on.
+
+        Returns
+        -------
+        precomputed : dict
+            Dictionary keyed by the identifier of a project with a dictionary
+            keyed by the name of an attribute with its raw result as the
+            value. Attributes that failed, and projects an attribute returned
+            no result for, are left out to be run per project.
+        """
+        precomputed = {project_id: dict() for project_id in project_ids}
+        attributes = [
+            attribute for attribute in self.attributes
+            if attribute.enabled and not attribute.requires_source and
+            hasattr(attribute.reference, 'bulk_run')
+        ]
+        if not project_ids or not attributes:
+            return precomputed
+
+        # A connection of its own, the one of this object may be in use by
+        #   the thread saving results.
+        database = Database(self.database.settings)
+        try:
+            database.connect()
+            for attribute in attributes:
+                try:
+                    with database.cursor() as cursor:
+                        if hasattr(attribute.reference, 'init'):
+                            attribute.reference.init(cursor)
+                        results = attribute.reference.bulk_run(
+                            cursor, project_ids, **attribute.options
+                        )
+                except:
+                    sys.stderr.write('Exception\n\n')
+                    sys.stderr.write(
+                        '  Attribute    {0}\n'.format(attribute.name)
+                    )
+                    extype, exvalue, extrace = sys.exc_info()
+                    traceback.print_exception(extype, exvalue, extrace)
                     continue
 
-                with self.database.cursor() as cursor:
-                    if hasattr(attribute.reference, 'init'):
-                        attribute.reference.init(cursor)
-
-                with self.database.cursor() as cursor:
-                    timeout = utilities.parse_datetime_delta(attribute.timeout)
+                for (project_id, (_, rresult)) in results.items():
+                    if project_id in precomputed:
+                        precomputed[project_id][attribute.name] = rresult
+        finally:
+            database.disconnect()
+        return precomputed
+
+    def estimate(self, project_ids):
+        """Return the predicted cost of running the attributes on projects.
+
+        Costs are predicted from the features of a project that are known
+        before its source code is obtained. See lib.budget.Budget.
+
+        Returns
+        -------
+        costs : dict
+            Dictionary keyed by the identifier of a project with the
+            predicted number of seconds as the value. Empty if no budget is
+            set.
+        """
+        if self.budget is None or not project_ids:
+            return dict()
+
+        database = Database(self.database.settings)
+        try:
+            database.connect()
+            with database.cursor() as cursor:
+                _stats = stats.get_all(cursor, project_ids)
+        finally:
+            database.disconnect()
 
-                    process = multiprocessing.Process(
-                        target=attribute.run,
-                        args=(project_id, repository_path, cursor, outq)
-                    )
-                    process.start()
-                    process.join(timeout=timeout.total_seconds())
+        costs = dict()
+        for project_id in project_ids:
+            features = budget.get_features(_stats.get(project_id))
+            costs[project_id] = 0
+            for attribute in self.attributes:
+                if attribute.enabled:
+                    predicted = self.budget.predict(attribute.name, features)
+                    costs[project_id] += predicted or 0
+        return costs
+
+    def locate(self, project_ids):
+        """Return the repositories of projects whose source code is needed.
+
+        Projects are left out if no attribute requires their source code or
+        if the results of all attributes analyzing it were cached. See
+        lib.prefetch.Prefetcher.
+
+        Returns
+        -------
+        locations : dict
+            Dictionary keyed by the identifier of a project with a 3-tuple of
+            the owner and name of its repository and the date of the commit
+            to clone as the value.
+        """
+        if not self.requires_source or not project_ids:
+            return dict()
+
+        database = Database(self.database.settings)
+        try:
+            database.connect()
+            with database.cursor() as cursor:
+                _stats = stats.get_all(cursor, project_ids)
+        finally:
+            database.disconnect()
+
+        locations = dict()
+        for project_id in project_ids:
+            if self.cache is not None:
+                sha = self.cache.get_snapshot(project_id, self.today)
+                cached = self._get_cached(sha, _stats.get(project_id))
+                if self._is_cached(cached):
+                    continue
+            location = self._get_location(_stats.get(project_id))
+            if location is not None:
+                locations[project_id] = location
+        return locations
 
-                    if not outq.empty():
-                        (bresult, rresult) = outq.get()
-                    else:
-                        sys.stderr.write(
-                            (
-                                ' \033[91mWARNING\033[0m [{0:10d}] '
-                                '{1} timed out\n'
-                            ).format(project_id, attribute.name)
-                        )
-                        if process.is_alive():
-                            process.terminate()
+    def run(self, project_id, repository_root, precomputed=None):
+        rresults = dict()
 
-                rresults[attribute.name] = rresult
-        except:
-            sys.stderr.write('Exception\n\n')
-            sys.stderr.write('  Project ID   {0}\n'.format(project_id))
-            extype, exvalue, extrace = sys.exc_info()
-            traceback.print_exception(extype, exvalue, extrace)
-        finally:
-            self.database.disconnect()
-            if self.cleanup:
-                self._cleanup(repository_home)
-            return rresults
+        with metrics.project(project_id):
+            try:
+                self.database.connect()
+                (repository_path, sha, cached) = self._fetch(
+                    project_id, repository_root, precomputed
+                )
+                self._evaluate(
+                    project_id, repository_path, sha, cached, rresults
+                )
+            except:
+                self._report(project_id)
+            finally:
+                self.database.disconnect()
+                self.release(project_id, repository_root)
+                return rresults
+
+    def fetch(self, project_id, repository_root, precomputed=None):
+        """Obtain the source code of a project if any attribute requires it.
+
+        Parameters
+        ----------
+        project_id : int
+            Identifier of the project.
+        repository_root : str
+            Absolute path to the root of downloaded repositories.
+        precomputed : dict, optional
+            Raw results of the project keyed by the name of an attribute, as
+            returned by bulk_run(). They are returned with the cached ones.
+
+        Returns
+        -------
+        fetched : 3-tuple
+            A 3-tuple of the path to the source code (None if it is not
+            required), the SHA of its tree (None if not known) and the raw
+            results cached for that tree. None if the source code could not be
+            obtained.
+        """
+        with metrics.project(project_id):
+            try:
+                self.database.connect()
+                return self._fetch(project_id, repository_root, precomputed)
+            except:
+                self._report(project_id)
+                return None
+            finally:
+                self.database.disconnect()
+
+    def evaluate(
+        self, project_id, repository_path, sha, cached, requires_source=None
+    ):
+        """Run the attributes on a project fetched by fetch().
+
+        Parameters
+        ----------
+        requires_source : bool, optional
+            If specified, only the attributes that do (or do not) require the
+            source code are run.
+
+        Returns
+        -------
+        rresults : dict
+            Dictionary keyed by the name of an attribute with its raw result
+            as the value.
+        """
+        rresults = dict()
+        with metrics.project(project_id):
+            try:
+                self.database.connect()
+                self._evaluate(
+                    project_id, repository_path, sha, cached, rresults,
+                    requires_source
+                )
+            except:
+                self._report(project_id)
+            finally:
+                self.database.disconnect()
+                return rresults
+
+    def release(self, project_id, repository_root):
+        """Release the resources held for the source code of a project."""
+        repository_home = os.path.join(repository_root, str(project_id))
+        scanner.forget(repository_home)
+        # Checkouts within a quota are kept until evicted.
+        if self.checkouts is not None:
+            self.checkouts.release(project_id)
+        elif self.cleanup:
+            self._cleanup(repository_home)
 
     def get(self, name):
         for attribute in self.attributes:
@@ -178,12 +372,309 @@ class Attributes(object):
                 return True
         return False
 
+    def _get_cached(self, sha, _stats):
+        cached = dict()
+        if sha is None:
+            return cached
+
+        for attribute in self.attributes:
+            if (
+                attribute.enabled and attribute.requires_source and
+                attribute.cacheable
+            ):
+                (hit, rresult) = self.cache.get(
+                    attribute.name, self._get_key(attribute, _stats), sha
+                )
+                if hit:
+                    cached[attribute.name] = rresult
+        return cached
+
+    def _get_key(self, attribute, _stats):
+        # Attributes may read the language of the project from the database
+        #   (e.g. architecture), so it is part of the key along with the tree.
+        language = _stats.language if _stats is not None else None
+        return dict(attribute.options, language=language)
+
+    def _is_cached(self, cached):
+        for attribute in self.attributes:
+            if attribute.enabled and attribute.requires_source:
+                if attribute.name not in cached:
+                    return False
+        return True
+
+    def _fetch(self, project_id, repository_root, precomputed=None):
+        repository_home = os.path.join(repository_root, str(project_id))
+        repository_path = None
+        sha = None
+        cached = dict()
+        if self.requires_source:
+            if self.cache is not None:
+                with self.database.cursor() as cursor:
+                    _stats = stats.get(cursor, project_id)
+                sha = self.cache.get_snapshot(project_id, self.today)
+                cached = self._get_cached(sha, _stats)
+
+            # The source is not needed if the results of all attributes
+            #   analyzing it were cached in a previous run.
+            if not self._is_cached(cached):
+                repository_path = self._init_repository(
+                    project_id, repository_home
+                )
+
+                if self.cache is not None:
+                    sha = utilities.get_tree_sha(repository_path)
+                    if sha is not None:
+                        self.cache.put_snapshot(project_id, self.today, sha)
+                    cached = self._get_cached(sha, _stats)
+        if precomputed:
+            cached.update(precomputed)
+        return repository_path, sha, cached
+
+    def _evaluate(
+        self, project_id, repository_path, sha, cached, rresults,
+        requires_source=None
+    ):
+        outq = multiprocessing.Queue(maxsize=1)
+
+        # Walk and read the source tree once in this process so that every
+        #   attribute (forked below) shares the index.
+        if (
+            repository_path is not None and requires_source is not False and
+            self.backend == 'process'
+        ):
+            scanner.scan(repository_path).preload()
+
+        _stats = None
+        if sha is not None:
+            with self.database.cursor() as cursor:
+                _stats = stats.get(cursor, project_id)
+
+        features = None
+        if self.budget is not None:
+            features = self._get_features(
+                project_id,
+                repository_path if requires_source is not False else None
+            )
+
+        concurrent = list()
+        for attribute in self.attributes:
+            if not attribute.enabled:
+                continue
+
+            if (
+                requires_source is not None and
+                attribute.requires_source != requires_source
+            ):
+                continue
+
+            if attribute.name in cached:
+                rresults[attribute.name] = cached[attribute.name]
+                continue
+
+            with self.database.cursor() as cursor:
+                if hasattr(attribute.reference, 'init'):
+                    attribute.reference.init(cursor)
+
+            if self.concurrent:
+                concurrent.append(attribute)
+                continue
+
+            result = self._execute(
+                attribute, project_id, repository_path, outq, features
+            )
+            rresults[attribute.name] = self._get_rresult(
+                attribute, project_id, sha, _stats, result
+            )
+
+        if concurrent:
+            results = self._execute_concurrently(
+                concurrent, project_id, repository_path, features
+            )
+            for attribute in concurrent:
+                rresults[attribute.name] = self._get_rresult(
+                    attribute, project_id, sha, _stats,
+                    results[attribute.name]
+                )
+
+    def _execute(
+        self, attribute, project_id, repository_path, outq, features=None
+    ):
+        (timeout, predicted) = self._get_timeout(attribute, features)
+        started = time.monotonic()
+        if self.backend == 'worker':
+            result = self._get_worker(attribute).run(
+                project_id, repository_path, timeout
+            )
+        else:
+            result = self._fork(
+                attribute, project_id, repository_path, outq, timeout
+            )
+        elapsed = time.monotonic() - started
+        metrics.record('attribute.{0}'.format(attribute.name), elapsed)
+        if features is not None:
+            self._record(
+                attribute, project_id, features, predicted, elapsed,
+                result is None
+            )
+        return result
+
+    def _execute_concurrently(
+        self, attributes, project_id, repository_path, features=None
+    ):
+        timeouts = {
+            attribute.name: self._get_timeout(attribute, features)
+            for attribute in attributes
+        }
+        started = time.monotonic()
+        settings = self.database.settings
+
+        # Processes are started before any thread is.
+        jobs = list()
+        for attribute in attributes:
+            if attribute.resource == scheduler.IO:
+                continue
+            if self.backend == 'worker':
+                job = scheduler.WorkerJob(
+                    self._get_worker(attribute), project_id, repository_path
+                )
+            else:
+                job = scheduler.ProcessJob(
+                    attribute, settings, project_id, repository_path
+                )
+            jobs.append((attribute, job))
+        for attribute in attributes:
+            if attribute.resource == scheduler.IO:
+                job = scheduler.ThreadJob(
+                    attribute, settings, project_id, repository_path
+                )
+                jobs.append((attribute, job))
+
+        results = scheduler.wait(
+            [
+                (attribute.name, job, timeouts[attribute.name][0])
+                for (attribute, job) in jobs
+            ],
+            started
+        )
+        for (attribute, job) in jobs:
+            (timeout, predicted) = timeouts[attribute.name]
+            elapsed = timeout if job.elapsed is None else job.elapsed
+            metrics.record('attribute.{0}'.format(attribute.name), elapsed)
+            if features is not None:
+                self._record(
+                    attribute, project_id, features, predicted, elapsed,
+                    results[attribute.name] is None
+                )
+        return results
+
+    def _get_features(self, project_id, repository_path=None):
+        with self.database.cursor() as cursor:
+            _stats = stats.get(cursor, project_id)
+        index = None
+        if repository_path is not None:
+            index = scanner.scan(repository_path)
+        return budget.get_features(_stats, index)
+
+    def _get_timeout(self, attribute, features=None):
+        """Return the timeout, in seconds, of an attribute on a project along
+        with its predicted cost (None if not predicted)."""
+        timeout = utilities.parse_datetime_delta(
+            attribute.timeout
+        ).total_seconds()
+        if features is None:
+            return timeout, None
+
+        measures = self._get_measures(attribute)
+        predicted = self.budget.predict(attribute.name, features, measures)
+        return (
+            self.budget.get_timeout(
+                predicted, timeout, attribute.name, features, measures
+            ),
+            predicted
+        )
+
+    def _get_measures(self, attribute):
+        # The cost of attributes analyzing the source code depends on its
+        #   size whereas the cost of others depends on the history.
+        if attribute.requires_source:
+            return ['bytes', 'files', 'commits']
+        return ['commits']
+
+    def _record(
+        self, attribute, project_id, features, predicted, elapsed, timed_out
+    ):
+        try:
+            self.budget.record(
+                attribute.name, project_id, features, predicted, elapsed,
+                timed_out
+            )
+        except:
+            self._report(project_id)
+
+    def _get_rresult(self, attribute, project_id, sha, _stats, result):
+        if result is None:
+            sys.stderr.write(
+                (
+                    ' \033[91mWARNING\033[0m [{0:10d}] '
+                    '{1} timed out\n'
+                ).format(project_id, attribute.name)
+            )
+            return None
+
+        (_, rresult) = result
+        # A lower bound depends on the threshold which is not part of the
+        #   cache key.
+        if (
+            sha is not None and attribute.requires_source and
+            attribute.cacheable and
+            not isinstance(rresult, utilities.LowerBound)
+        ):
+            self.cache.put(
+                attribute.name, self._get_key(attribute, _stats), sha, rresult
+            )
+        return rresult
+
+    def _fork(self, attribute, project_id, repository_path, outq, timeout):
+        with self.database.cursor() as cursor:
+            process = multiprocessing.Process(
+                target=attribute.run,
+                args=(project_id, repository_path, cursor, outq)
+            )
+            process.start()
+            process.join(timeout=timeout)
+
+            if not outq.empty():
+                return outq.get()
+            if process.is_alive():
+                process.terminate()
+        # The process shared the connection and may have been stopped in the
+        #   middle of a query.
+        self.database.discard()
+        self.database.connect()
+        return None
+
+    def _get_worker(self, attribute):
+        if attribute.name not in self._workers:
+            self._workers[attribute.name] = worker.Worker(
+                attribute, self.database.settings
+            )
+        return self._workers[attribute.name]
+
+    def _report(self, project_id):
+        sys.stderr.write('Exception\n\n')
+        sys.stderr.write('  Project ID   {0}\n'.format(project_id))
+        extype, exvalue, extrace = sys.exc_info()
+        traceback.print_exception(extype, exvalue, extrace)
+
     def _cleanup(self, repository_home):
         shutil.rmtree(repository_home, ignore_errors=True)
 
+    @metrics.timed('init_repository')
     def _init_repository(self, project_id, repository_home):
         repository_path = repository_home  # Default
 
+        if self.checkouts is not None:
+            self.checkouts.acquire(project_id)
         if not os.path.exists(repository_path):
             os.mkdir(repository_path)
 
@@ -195,30 +686,11 @@ class Attributes(object):
                     repository_path = itempath
                     break
         else:
-            (repo_owner, repo_name) = self.database.get(
-                '''
-                    SELECT u.login, p.name
-                    FROM projects p
-                        JOIN users u ON u.id = p.owner_id
-                    WHERE p.id = {0}
-                '''.format(project_id)
-            )
-            if not (repo_owner or repo_name):
+            with self.database.cursor() as cursor:
+                location = self._get_location(stats.get(cursor, project_id))
+            if location is None:
                 raise ValueError('Invalid project ID {0}.'.format(project_id))
-
-            last_commit_date = self.database.get(
-                '''
-                    SELECT DATE(c.created_at)
-                    FROM project_commits pc
-                        JOIN commits c ON c.id = pc.commit_id
-                    WHERE pc.project_id = {0}
-                    ORDER BY c.created_at DESC
-                    LIMIT 1
-                '''.format(project_id)
-            )
-
-            if last_commit_date is None:
-                last_commit_date = self.today
+            (repo_owner, repo_name, last_commit_date) = location
 
             repository_path = utilities.clone(
                 repo_owner, repo_name, repository_path, last_commit_date
@@ -226,6 +698,15 @@ class Attributes(object):
 
         return repository_path
 
+    def _get_location(self, _stats):
+        if _stats is None or not (_stats.owner or _stats.name):
+            return None
+
+        last_commit_date = self.today
+        if _stats.last_commit_date is not None:
+            last_commit_date = _stats.last_commit_date.date()
+        return _stats.owner, _stats.name, last_commit_date
+
     def _parse_attributes(self, attributes, **goptions):
         if attributes:
             self.attributes = list()
@@ -260,6 +741,10 @@ class Attributes(object):
         for attribute in self.attributes:
             if attribute.enabled and attribute.dependencies:
                 for dependency in attribute.dependencies:
+                    if (dependency == 'cloc' and
+                            utilities.LOC_COUNTER == 'native'):
+                        # Lines-of-code are counted by lib.loc instead
+                        continue
                     if not distutils.spawn.find_executable(dependency):
                         sys.stderr.write(
                             '[{0}] Dependency {1} missing\n'.format(
@@ -0,0 +1,206 @@
+import time
+
+from lib.cache import _Store
+
+# Features of a project the cost of an attribute is predicted from. The
+#   number of commits is known before the source code is obtained whereas
+#   the number of files and bytes are only known after.
+MEASURES = ['commits', 'files', 'bytes']
+
+# Number of runtimes needed before the cost of an attribute is predicted.
+MINIMUM_OBSERVATIONS = 5
+# Number of most recent runtimes the cost of an attribute is predicted from.
+WINDOW = 1000
+# Factor applied to a predicted cost to obtain a timeout.
+SLACK = 4
+# Minimum number of seconds of a timeout obtained from a predicted cost.
+MINIMUM_TIMEOUT = 60
+# Percentile of the runtimes per unit of size of the projects that completed
+#   that a timeout obtained from a predicted cost allows for at least.
+PERCENTILE = 95
+
+
+def get_features(_stats, index=None):
+    """Return the features of a project that its costs are predicted from.
+
+    Parameters
+    ----------
+    _stats : lib.stats.Stats
+        Statistics of the project, or None if it does not exist.
+    index : lib.scanner.Index, optional
+        Index of the source code of the project, if it was obtained.
+
+    Returns
+    -------
+    features : dict
+        Dictionary keyed by 'language' and the MEASURES that are known.
+    """
+    features = dict()
+    if _stats is not None:
+        features['language'] = _stats.language
+        features['commits'] = _stats.num_commits
+    if index is not None:
+        features['files'] = len(index.entries)
+        features['bytes'] = index.size
+    return features
+
+
+class Budget(_Store):
+    """Persistent record of the runtimes of attributes predicting their cost.
+
+    The cost of an attribute on a project is predicted as the number of
+    seconds it took per unit of a measure of size (e.g. per byte of source
+    code) over the most recent projects in the same language, multiplied by
+    the size of the project. Runtimes of the projects of a run are recorded,
+    so predictions improve over runs.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path of the SQLite database file.
+    slack : float, optional
+        Factor applied to a predicted cost to obtain a timeout.
+    """
+    SCHEMA = [
+        '''
+            CREATE TABLE IF NOT EXISTS runtimes (
+                attribute TEXT NOT NULL,
+                project_id INTEGER NOT NULL,
+                language TEXT,
+                commits INTEGER,
+                files INTEGER,
+                bytes INTEGER,
+                predicted REAL,
+                elapsed REAL NOT NULL,
+                timed_out INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''',
+        '''
+            CREATE INDEX IF NOT EXISTS runtimes_attribute
+            ON runtimes (attribute, language, created_at)
+        ''',
+    ]
+
+    def __init__(self, path, slack=SLACK):
+        super().__init__(path)
+        self.slack = slack
+        # Rates are computed once per process, from the runtimes recorded by
+        #   previous runs.
+        self._rates = dict()
+
+    def predict(self, attribute, features, measures=MEASURES):
+        """Return the predicted cost of an attribute on a project.
+
+        Parameters
+        ----------
+        attribute : str
+            Name of the attribute.
+        features : dict
+            Features of the project. See get_features().
+        measures : list, optional
+            Measures of size to predict from, most accurate first. The first
+            one that is known for the project and was recorded for enough
+            projects is used.
+
+        Returns
+        -------
+        predicted : float
+            Predicted number of seconds, or None if the cost cannot be
+            predicted.
+        """
+        (rates, size) = self._get_rates(attribute, features, measures)
+        if rates is None:
+            return None
+        return rates[0] * size
+
+    def get_timeout(
+        self, predicted, default, attribute=None, features=None,
+        measures=MEASURES
+    ):
+        """Return the timeout of an attribute given its predicted cost.
+
+        The timeout is the predicted cost with some slack, never beyond the
+        default timeout of the attribute. When the attribute and the features
+        of the project are given, neither is it shorter than the PERCENTILE-th
+        percentile of the runtimes per unit of size of comparable projects
+        that completed, times the size of the project. Timeouts then do not
+        shrink from one run to the next by cutting off the slowest projects,
+        while projects that timed out, or one very large project, do not
+        raise the timeouts of small projects.
+        """
+        if predicted is None:
+            return default
+        minimum = MINIMUM_TIMEOUT
+        if attribute is not None and features is not None:
+            (rates, size) = self._get_rates(attribute, features, measures)
+            if rates is not None and rates[1] is not None:
+                minimum = max(minimum, rates[1] * size)
+        return min(default, max(minimum, self.slack * predicted))
+
+    def record(
+        self, attribute, project_id, features, predicted, elapsed, timed_out
+    ):
+        """Record the runtime of an attribute on a project."""
+        self._execute(
+            '''
+                INSERT INTO runtimes (
+                    attribute, project_id, language, commits, files, bytes,
+                    predicted, elapsed, timed_out, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (
+                attribute, project_id, features.get('language'),
+                features.get('commits'), features.get('files'),
+                features.get('bytes'), predicted, elapsed, int(timed_out),
+                time.time()
+            )
+        )
+
+    def _get_rates(self, attribute, features, measures):
+        """Return the rates of the first measure of a project predicting its
+        cost (see predict()) along with its size, or None and None."""
+        for measure in measures:
+            if features.get(measure) is None:
+                continue
+            for language in (features.get('language'), None):
+                rates = self._get_rate(attribute, language, measure)
+                if rates is not None:
+                    return rates, max(1, features[measure])
+        return None, None
+
+    def _get_rate(self, attribute, language, measure):
+        """Return the mean number of seconds per unit of a measure and the
+        PERCENTILE-th percentile of those of projects that completed (None
+        if none did), or None if too few runtimes were recorded."""
+        key = (attribute, language, measure)
+        if key not in self._rates:
+            rows = self._execute(
+                '''
+                    SELECT elapsed, MAX({0}, 1), timed_out FROM runtimes
+                    WHERE attribute = ? AND {0} IS NOT NULL {1}
+                    ORDER BY created_at DESC
+                    LIMIT ?
+                '''.format(
+                    measure, 'AND language = ?' if language else ''
+                ),
+                [attribute] + ([language] if language else []) + [WINDOW]
+            )
+            rates = None
+            if len(rows) >= MINIMUM_OBSERVATIONS:
+                # Runtimes of projects that timed out are lower bounds of
+                #   their cost. They are counted as such in the mean rather
+                #   than left out, which would bias it towards the fastest
+                #   projects, but not in the percentile, where they would
+                #   only reflect the timeout.
+                mean = sum(r[0] for r in rows) / sum(r[1] for r in rows)
+                completed = sorted(r[0] / r[1] for r in rows if not r[2])
+                percentile = None
+                if completed:
+                    # Nearest-rank percentile
+                    rank = max(1, -(-PERCENTILE * len(completed) // 100))
+                    percentile = completed[rank - 1]
+                rates = (mean, percentile)
+            self._rates[key] = rates
+        return self._rates[key]
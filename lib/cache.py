@@ -0,0 +1,338 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Options that only affect how a raw result is interpreted or how long an
+#   attribute may run, not the raw result itself.
+VOLATILE_OPTIONS = ['threshold', 'timeout', 'today']
+
+
+def hash_options(options):
+    """Return a digest of the options that may affect a raw result.
+
+    Parameters
+    ----------
+    options : dict
+        Options of an attribute.
+
+    Returns
+    -------
+    digest : str
+        Hexadecimal SHA-1 digest of the options, excluding VOLATILE_OPTIONS.
+    """
+    options = {
+        k: v for (k, v) in options.items() if k not in VOLATILE_OPTIONS
+    }
+    serialized = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha1(serialized.encode()).hexdigest()
+
+
+class _Store(object):
+    """An SQLite database that may be shared by processes and threads."""
+    SCHEMA = []
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        self._pid = None
+        self._thread = None
+
+    def _execute(self, query, parameters=()):
+        connection = self._get_connection()
+        with connection:
+            return connection.execute(query, parameters).fetchall()
+
+    def _executemany(self, query, parameters):
+        connection = self._get_connection()
+        with connection:
+            connection.executemany(query, parameters)
+
+    def _get_connection(self):
+        # Connections cannot be shared with forked processes, nor used by a
+        #   thread other than the one that opened them.
+        if (
+            self._connection is None or self._pid != os.getpid() or
+            self._thread != threading.get_ident()
+        ):
+            self._connect()
+        return self._connection
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.path, timeout=60)
+        self._pid = os.getpid()
+        self._thread = threading.get_ident()
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        for statement in self.SCHEMA:
+            self._connection.execute(statement)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        state['_thread'] = None
+        return state
+
+
+class Cache(_Store):
+    """Persistent store of analysis results keyed by git tree SHA.
+
+    Raw results of attributes that analyze the source code depend only on
+    the tree being analyzed, so they are stored keyed by (attribute, options
+    digest, tree SHA) in an SQLite database that outlives a run. The tree
+    SHA each project was analyzed at is also recorded so that a project
+    whose results are all cached need not be cloned again.
+
+    The cache must be deleted when the implementation of an attribute
+    changes.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path of the SQLite database file.
+    """
+    SCHEMA = [
+        '''
+            CREATE TABLE IF NOT EXISTS results (
+                attribute TEXT NOT NULL,
+                options TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                value TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (attribute, options, sha)
+            )
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS snapshots (
+                project_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                PRIMARY KEY (project_id, date)
+            )
+        ''',
+    ]
+
+    def get(self, attribute, options, sha):
+        """Return the cached raw result of an attribute.
+
+        Returns
+        -------
+        cached : 2-tuple
+            A 2-tuple of a boolean indicating if a result was cached and the
+            raw result (None if not cached).
+        """
+        rows = self._execute(
+            '''
+                SELECT value FROM results
+                WHERE attribute = ? AND options = ? AND sha = ?
+            ''',
+            (attribute, hash_options(options), sha)
+        )
+        if not rows:
+            return False, None
+        return True, json.loads(rows[0][0])
+
+    def put(self, attribute, options, sha, value):
+        self._execute(
+            '''
+                INSERT OR REPLACE INTO results
+                    (attribute, options, sha, value, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''',
+            (
+                attribute, hash_options(options), sha, json.dumps(value),
+                time.time()
+            )
+        )
+
+    def get_snapshot(self, project_id, date):
+        """Return the tree SHA a project was analyzed at for a date."""
+        rows = self._execute(
+            'SELECT sha FROM snapshots WHERE project_id = ? AND date = ?',
+            (project_id, date)
+        )
+        return rows[0][0] if rows else None
+
+    def put_snapshot(self, project_id, date, sha):
+        self._execute(
+            '''
+                INSERT OR REPLACE INTO snapshots (project_id, date, sha)
+                VALUES (?, ?, ?)
+            ''',
+            (project_id, date, sha)
+        )
+
+
+class SymbolCache(_Store):
+    """Persistent store of the symbols extracted from file contents.
+
+    Symbols are keyed by the name of the lexer and the digest of the contents
+    they were extracted from, so identical files (e.g. vendored libraries)
+    are only lexed once across repositories. The least recently used entries
+    are evicted when the cache grows beyond its capacity.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path of the SQLite database file.
+    capacity : int
+        Maximum total size, in bytes, of the cached symbols.
+    """
+    SCHEMA = [
+        '''
+            CREATE TABLE IF NOT EXISTS symbols (
+                lexer TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (lexer, digest)
+            )
+        ''',
+        '''
+            CREATE INDEX IF NOT EXISTS symbols_accessed_at
+            ON symbols (accessed_at)
+        ''',
+        # Total size of the symbols, kept up to date by the triggers below in
+        #   the transaction changing them, so that it need not be summed.
+        '''
+            CREATE TABLE IF NOT EXISTS symbols_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                size INTEGER NOT NULL
+            )
+        ''',
+        '''
+            INSERT OR IGNORE INTO symbols_size (id, size)
+            SELECT 0, COALESCE(SUM(size), 0) FROM symbols
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS symbols_insert
+            AFTER INSERT ON symbols
+            BEGIN
+                UPDATE symbols_size SET size = size + new.size;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS symbols_update
+            AFTER UPDATE OF size ON symbols
+            BEGIN
+                UPDATE symbols_size SET size = size + new.size - old.size;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS symbols_delete
+            AFTER DELETE ON symbols
+            BEGIN
+                UPDATE symbols_size SET size = size - old.size;
+            END
+        ''',
+    ]
+
+    # Maximum number of digests looked up in a single query.
+    BATCHSIZE = 500
+
+    def __init__(self, path, capacity):
+        super().__init__(path)
+        self.capacity = capacity
+
+    def get(self, lexer, digests):
+        """Return the cached symbols of contents.
+
+        Parameters
+        ----------
+        lexer : str
+            Name of the lexer the symbols were extracted with.
+        digests : list
+            Digests of the contents to look up.
+
+        Returns
+        -------
+        symbols : dict
+            Dictionary keyed by digest with a 2-tuple of the set of symbols
+            defined and the set of symbols referenced as the value. Digests
+            that are not cached are left out.
+        """
+        digests = list(digests)
+        symbols = dict()
+        now = time.time()
+        for i in range(0, len(digests), self.BATCHSIZE):
+            batch = digests[i:i + self.BATCHSIZE]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._execute(
+                '''
+                    SELECT digest, value FROM symbols
+                    WHERE lexer = ? AND digest IN ({0})
+                '''.format(placeholders),
+                [lexer] + batch
+            )
+            if not rows:
+                continue
+            hits = [digest for (digest, _) in rows]
+            self._execute(
+                '''
+                    UPDATE symbols SET accessed_at = ?
+                    WHERE lexer = ? AND digest IN ({0})
+                '''.format(','.join('?' * len(hits))),
+                [now, lexer] + hits
+            )
+            for (digest, value) in rows:
+                (defines, references) = json.loads(value)
+                symbols[digest] = (set(defines), set(references))
+        return symbols
+
+    def put(self, lexer, symbols):
+        """Store the symbols of contents and evict the least recently used
+        entries if the capacity is exceeded.
+
+        Parameters
+        ----------
+        lexer : str
+            Name of the lexer the symbols were extracted with.
+        symbols : dict
+            Dictionary keyed by digest with a 2-tuple of the set of symbols
+            defined and the set of symbols referenced as the value.
+        """
+        if not symbols:
+            return
+
+        now = time.time()
+        rows = list()
+        for (digest, (defines, references)) in symbols.items():
+            value = json.dumps([sorted(defines), sorted(references)])
+            rows.append((lexer, digest, value, len(value), now))
+        # An upsert rather than INSERT OR REPLACE, whose implicit deletes do
+        #   not fire the delete trigger.
+        self._executemany(
+            '''
+                INSERT INTO symbols (lexer, digest, value, size, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (lexer, digest) DO UPDATE SET
+                    value = excluded.value, size = excluded.size,
+                    accessed_at = excluded.accessed_at
+            ''',
+            rows
+        )
+        self._evict()
+
+    @property
+    def size(self):
+        """Total size, in bytes, of the cached symbols."""
+        return self._execute('SELECT size FROM symbols_size')[0][0]
+
+    def _evict(self):
+        size = self.size
+        if size <= self.capacity:
+            return
+
+        evicted = list()
+        # Iterated lazily, only the least recently used entries are read.
+        for (rowid, _size) in self._get_connection().execute(
+            'SELECT rowid, size FROM symbols ORDER BY accessed_at'
+        ):
+            if size <= self.capacity:
+                break
+            evicted.append((rowid,))
+            size -= _size
+        self._executemany('DELETE FROM symbols WHERE rowid = ?', evicted)
@@ -0,0 +1,232 @@
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+
+# Number of seconds to wait before checking again whether a clone fits in
+#   the quota.
+WAIT = 5
+
+
+class Checkouts(object):
+    """Repositories kept on disk across runs within a quota.
+
+    The size and time of last use of the checkout of each project under the
+    root are recorded in an index file shared by the processes of a run.
+    Checkouts are kept after their projects are analyzed so that later runs
+    do not download them again. When a clone would exceed the quota, the
+    least recently used checkouts are deleted until it fits. Checkouts in
+    use are never deleted; if they alone leave too little space, the clone
+    waits until some are released.
+
+    Parameters
+    ----------
+    root : str
+        Absolute path to the root of downloaded repositories. The checkout of
+        a project is the directory named by its identifier.
+    path : str
+        Absolute path of the index file.
+    quota : int
+        Maximum number of bytes used by the checkouts.
+    """
+    def __init__(self, root, path, quota):
+        self.root = root
+        self.path = path
+        self.quota = quota
+        # Identifier of the run, recorded with the process holding a checkout
+        #   so that the identifiers of processes of earlier runs, which may
+        #   have been reused since, are not mistaken for holders.
+        self.run = uuid.uuid4().hex
+
+    def acquire(self, project_id):
+        """Reserve space for the checkout of a project and mark it as in use.
+
+        A checkout already on disk is reused. Otherwise, space is reserved
+        for its expected size: its size when it was last recorded or the
+        average size of the checkouts. The reservation is only made once
+        least recently used checkouts were deleted to make it fit, which may
+        require waiting for checkouts in use by other processes.
+        """
+        key = str(project_id)
+        home = self.get_path(project_id)
+        self._initialize()
+        size = None
+        while True:
+            with self._lock():
+                checkouts = self._load()
+                exists = os.path.exists(home) and os.listdir(home)
+                if exists:
+                    checkout = checkouts.get(key)
+                    if checkout is not None and not checkout['reserved']:
+                        self._use(checkouts, key, checkout)
+                        self._save(checkouts)
+                        return
+                    if size is not None:
+                        self._use(checkouts, key, {'size': size})
+                        self._save(checkouts)
+                        return
+                else:
+                    expected = self._get_expected(checkouts, key)
+                    if self._make_space(checkouts, key, expected):
+                        self._use(checkouts, key, {
+                            'size': expected, 'reserved': True
+                        })
+                        self._save(checkouts)
+                        return
+                    self._save(checkouts)
+            if exists:
+                # Measured without holding up the other processes.
+                size = _get_size(home)
+            else:
+                time.sleep(WAIT)
+
+    def release(self, project_id):
+        """Record the size of the checkout of a project that is no longer in
+        use. Projects that were not acquired are ignored."""
+        key = str(project_id)
+        home = self.get_path(project_id)
+        size = None
+        if os.path.exists(home) and os.listdir(home):
+            size = _get_size(home)
+        with self._lock():
+            checkouts = self._load()
+            if key not in checkouts:
+                return
+            if size is not None:
+                checkouts[key].update({
+                    'size': size, 'reserved': False, 'used': time.time(),
+                    'holder': None
+                })
+            else:
+                # The clone failed or the checkout was deleted.
+                del checkouts[key]
+            self._save(checkouts)
+
+    def get_path(self, project_id):
+        """Return the path of the checkout of a project."""
+        return os.path.join(self.root, str(project_id))
+
+    @property
+    def size(self):
+        """Number of bytes used, or reserved, by the checkouts."""
+        self._initialize()
+        with self._lock():
+            return sum(c['size'] for c in self._load().values())
+
+    def _use(self, checkouts, key, checkout):
+        checkout.setdefault('reserved', False)
+        checkout.update({
+            'used': time.time(), 'holder': os.getpid(), 'run': self.run
+        })
+        checkouts[key] = checkout
+
+    def _is_held(self, checkout):
+        return (
+            checkout.get('run') == self.run and _is_alive(checkout['holder'])
+        )
+
+    def _get_expected(self, checkouts, key):
+        if key in checkouts:
+            return checkouts[key]['size']
+        sizes = [c['size'] for c in checkouts.values() if not c['reserved']]
+        return sum(sizes) // len(sizes) if sizes else 0
+
+    def _make_space(self, checkouts, key, expected):
+        """Delete least recently used checkouts until expected bytes more fit
+        in the quota. Returns False if checkouts in use leave too little."""
+        others = {k: c for (k, c) in checkouts.items() if k != key}
+        size = sum(c['size'] for c in others.values())
+        idle = sorted(
+            (k for (k, c) in others.items() if not self._is_held(c)),
+            key=lambda k: others[k]['used']
+        )
+        for _key in idle:
+            if size + expected <= self.quota:
+                break
+            shutil.rmtree(self.get_path(_key), ignore_errors=True)
+            size -= checkouts.pop(_key)['size']
+
+        if size + expected <= self.quota:
+            return True
+        if len(idle) == len(others):
+            # Nothing is left to wait for, the checkout exceeds the quota on
+            #   its own.
+            sys.stderr.write(
+                ' \033[91mWARNING\033[0m Checkout of {0} is expected to '
+                'exceed the disk quota.\n'.format(key)
+            )
+            return True
+        return False
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as file_:
+                return json.load(file_)
+        return dict()
+
+    def _initialize(self):
+        # Checkouts left by runs before the index existed are recorded as
+        #   used the least recently. They are measured without holding the
+        #   lock, by each process that finds the index missing.
+        if os.path.exists(self.path):
+            return
+        checkouts = self._adopt()
+        with self._lock():
+            if not os.path.exists(self.path):
+                self._save(checkouts)
+
+    def _adopt(self):
+        checkouts = dict()
+        if os.path.isdir(self.root):
+            for key in os.listdir(self.root):
+                home = os.path.join(self.root, key)
+                if key.isdigit() and os.path.isdir(home):
+                    checkouts[key] = {
+                        'size': _get_size(home), 'reserved': False,
+                        'used': 0, 'holder': None
+                    }
+        return checkouts
+
+    def _save(self, checkouts):
+        # Replaced at once so that a killed process leaves a valid index.
+        temporary = '{0}.{1}'.format(self.path, os.getpid())
+        with open(temporary, 'w') as file_:
+            json.dump(checkouts, file_)
+        os.replace(temporary, self.path)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        # Processes of a run take turns updating the index.
+        with open('{0}.lock'.format(self.path), 'w') as file_:
+            fcntl.flock(file_, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file_, fcntl.LOCK_UN)
+
+
+def _is_alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass    # Alive, run by another user
+    return True
+
+
+def _get_size(path):
+    size = 0
+    for (root, _, fnames) in os.walk(path):
+        for fname in fnames:
+            try:
+                size += os.lstat(os.path.join(root, fname)).st_size
+            except OSError:
+                pass    # Removed while walking
+    return size
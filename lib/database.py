@@ -1,8 +1,20 @@
 import contextlib
+import json
+import os
 import sys
+import threading
 
 import mysql.connector as mysql
 
+from lib import metrics
+
+# Maximum number of idle connections kept open by the pool of a process.
+POOL_SIZE = 4
+
+_pools = dict()
+_pools_pid = None
+_pools_lock = threading.Lock()
+
 
 class DatabaseError(Exception):
     def __init__(self, value):
@@ -12,23 +24,115 @@ class DatabaseError(Exception):
         return repr(self.value)
 
 
+class ConnectionPool(object):
+    """Idle connections to a database that are reused by a single process.
+
+    A connection is checked before it is handed out and is replaced if the
+    server has closed it.
+
+    Parameters
+    ----------
+    settings : dict
+        Settings for connecting to the database.
+    size : int, optional
+        Maximum number of idle connections to keep open. Default is
+        POOL_SIZE.
+    """
+    def __init__(self, settings, size=POOL_SIZE):
+        self.settings = settings
+        self.size = size
+        self._idle = list()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return an open connection, reusing an idle one if possible."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection = self._idle.pop()
+            if self._is_healthy(connection):
+                return connection
+            self._close(connection)
+        return mysql.connect(**self.settings)
+
+    def release(self, connection):
+        """Return a connection obtained from acquire() to the pool."""
+        with self._lock:
+            if len(self._idle) < self.size and connection.is_connected():
+                self._idle.append(connection)
+                return
+        self._close(connection)
+
+    def discard(self, connection):
+        """Close a connection obtained from acquire() instead of returning it
+        to the pool, e.g. one whose state is unknown."""
+        self._close(connection)
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            (idle, self._idle) = (self._idle, list())
+        for connection in idle:
+            self._close(connection)
+
+    def _is_healthy(self, connection):
+        try:
+            # Reconnecting would hide a connection closed by the server.
+            connection.ping(reconnect=False)
+            return True
+        except mysql.Error:
+            return False
+
+    def _close(self, connection):
+        try:
+            connection.disconnect()
+        except mysql.Error:
+            pass
+
+
+def get_pool(settings):
+    """Return the connection pool of the current process for settings.
+
+    Connections are never shared with forked processes. A forked process
+    starts with empty pools and leaves the connections of its parent alone.
+    """
+    global _pools
+    global _pools_pid
+
+    key = json.dumps(settings, sort_keys=True, default=str)
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools = dict()
+            _pools_pid = os.getpid()
+        if key not in _pools:
+            _pools[key] = ConnectionPool(settings)
+        return _pools[key]
+
+
 class Database(object):
     def __init__(self, settings):
         self.settings = settings
         self.settings['autocommit'] = True
         self._connection = None
+        self._pid = None
 
     def connect(self):
+        """Obtain a connection from the pool of the current process."""
+        if self._connected and self._pid == os.getpid():
+            return
         try:
-            self._connection = mysql.connect(**self.settings)
+            self._connection = get_pool(self.settings).acquire()
+            self._pid = os.getpid()
         except mysql.Error as e:
             msg = 'Failure in connecting to database. Error: {0}'.format(e)
             raise DatabaseError(msg)
 
     def disconnect(self):
+        """Return the connection to the pool of the current process."""
         try:
-            if self._connection:
-                self._connection.disconnect()
+            if self._connection and self._pid == os.getpid():
+                get_pool(self.settings).release(self._connection)
             self._connection = None
         except mysql.Error as e:
             msg = 'Failure in disconnecting from database. Error: {0}'.format(
@@ -36,6 +140,17 @@ class Database(object):
             )
             raise DatabaseError(msg)
 
+    def discard(self):
+        """Close the connection instead of returning it to the pool.
+
+        A connection shared with a process that was stopped while using it
+        may be left in the middle of a query and must not be reused.
+        """
+        if self._connection and self._pid == os.getpid():
+            get_pool(self.settings).discard(self._connection)
+        self._connection = None
+
+    @metrics.timed('database.get')
     def get(self, query):
         try:
             rows = None
@@ -56,6 +171,7 @@ class Database(object):
             msg = 'Failure in executing query {0}. Error: {1}'.format(query, e)
             raise DatabaseError(msg)
 
+    @metrics.timed('database.post')
     def post(self, query, data=None):
         try:
             with self.cursor() as cursor:
@@ -82,6 +198,11 @@ class Database(object):
         finally:
             cursor.close()
 
+    @property
+    def connected(self):
+        """True if the database holds an open connection."""
+        return self._connected
+
     @property
     def _connected(self):
         connected = False
@@ -90,13 +211,16 @@ class Database(object):
         return connected
 
     def __getstate__(self):
+        # Pickled for every task handed to a pool, possibly while the
+        #   connection is in use, which is left to this object. The copy
+        #   connects anew.
         state = self.__dict__.copy()
         if isinstance(self._connection, mysql.connection.MySQLConnection):
-            self.disconnect()
             state['_connection'] = ''
         return state
 
     def __setstate__(self, state):
         self.__dict__.update(state)
         if isinstance(self._connection, str):
+            self._connection = None
             self.connect()
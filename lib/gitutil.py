@@ -0,0 +1,30 @@
+import os
+import subprocess
+
+
+def execute(command, cwd):
+    """Run a git command to completion in a subprocess.
+
+    Parameters
+    ----------
+    command : str
+        The command, run by the shell.
+    cwd : str
+        Absolute path of the directory to run the command in.
+
+    Returns
+    -------
+    out : str
+        The output of the command, stripped of surrounding whitespace.
+    """
+    if 'DEBUG' in os.environ:
+        print(command)
+
+    process = subprocess.Popen(
+        command, cwd=cwd, shell=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    (out, _) = process.communicate()
+    if process.returncode != 0:
+        raise Exception('Failed to execute {0}'.format(command))
+    return out.decode().strip()
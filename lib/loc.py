@@ -0,0 +1,325 @@
+import concurrent.futures
+import os
+
+from lib import scanner
+
+# Comment syntax of a language: a list of line comment markers and a list of
+#   (opening, closing) block comment delimiters.
+C_STYLE = (['//'], [('/*', '*/')])
+HASH_STYLE = (['#'], [])
+MARKUP_STYLE = ([], [('<!--', '-->')])
+
+COMMENTS = {
+    'ActionScript': C_STYLE,
+    'Ada': (['--'], []),
+    'Bourne Shell': HASH_STYLE,
+    'C': C_STYLE,
+    'C#': C_STYLE,
+    'C++': C_STYLE,
+    'C/C++ Header': C_STYLE,
+    'Clojure': ([';'], []),
+    'ClojureC': ([';'], []),
+    'ClojureScript': ([';'], []),
+    'CoffeeScript': (['#'], [('###', '###')]),
+    'CSS': ([], [('/*', '*/')]),
+    'Dart': C_STYLE,
+    'Elixir': HASH_STYLE,
+    'Erlang': (['%'], []),
+    'Go': C_STYLE,
+    'Groovy': C_STYLE,
+    'Haskell': (['--'], [('{-', '-}')]),
+    'HTML': MARKUP_STYLE,
+    'Java': C_STYLE,
+    'JavaScript': C_STYLE,
+    'Kotlin': C_STYLE,
+    'LESS': C_STYLE,
+    'Lisp': ([';'], []),
+    'Lua': (['--'], [('--[[', ']]')]),
+    'Objective C': C_STYLE,
+    'Objective C++': C_STYLE,
+    'OCaml': ([], [('(*', '*)')]),
+    'Perl': HASH_STYLE,
+    'PHP': (['//', '#'], [('/*', '*/')]),
+    'Python': HASH_STYLE,
+    'R': HASH_STYLE,
+    'Ruby': HASH_STYLE,
+    'Rust': C_STYLE,
+    'SASS': C_STYLE,
+    'Scala': C_STYLE,
+    'Scheme': ([';'], []),
+    'SQL': (['--'], [('/*', '*/')]),
+    'Swift': C_STYLE,
+    'Tcl/Tk': HASH_STYLE,
+    'TypeScript': C_STYLE,
+    'VHDL': (['--'], []),
+    'XML': MARKUP_STYLE,
+    'YAML': HASH_STYLE,
+}
+
+# Block comments that are only recognized at the beginning of a line. Python
+#   docstrings are counted as comments, like cloc does.
+ANCHORED_COMMENTS = {
+    'Perl': [
+        ('=pod', '=cut'), ('=head', '=cut'), ('=begin', '=cut'),
+        ('=over', '=cut'), ('=item', '=cut'), ('=for', '=cut'),
+        ('=encoding', '=cut'),
+    ],
+    'Python': [('"""', '"""'), ("'''", "'''")],
+    'Ruby': [('=begin', '=end')],
+}
+
+# Languages in which quotes are not string delimiters.
+UNQUOTED = ['HTML', 'XML']
+
+# Minimum number of files per task submitted to the process pool.
+CHUNKSIZE = 256
+
+
+def count(contents, language):
+    """Count the source and comment lines in contents.
+
+    Lines consisting of whitespace only are blank and are not counted. Lines
+    with both source code and a comment are counted as source lines.
+
+    Parameters
+    ----------
+    contents : str
+        Source code to count the lines of.
+    language : str
+        Language of the source code as named by cloc. See COMMENTS.
+
+    Returns
+    -------
+    loc : 2-tuple
+        A 2-tuple of the number of source lines and comment lines.
+    """
+    (markers, blocks) = COMMENTS[language]
+    anchored = ANCHORED_COMMENTS.get(language, [])
+    quotes = '' if language in UNQUOTED else '"\'`'
+    # Characters that may start a comment or string; lines without any of
+    #   them are counted as source without being scanned.
+    special = set(m[0] for m in markers)
+    special.update(b[0][0] for b in blocks)
+    special.update(quotes)
+
+    sloc = 0
+    cloc = 0
+    closing = None
+    is_anchored = False
+    for line in contents.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        index = 0
+        if closing is not None:
+            if is_anchored:
+                if closing in stripped:
+                    closing = None
+                cloc += 1
+                continue
+
+            index = line.find(closing)
+            if index == -1:
+                cloc += 1
+                continue
+            index += len(closing)
+            closing = None
+        else:
+            opened = _open_anchored(stripped, anchored)
+            if opened is not None:
+                (opening, _closing) = opened
+                if _closing not in stripped[len(opening):]:
+                    closing = _closing
+                    is_anchored = True
+                cloc += 1
+                continue
+
+        rest = line[index:]
+        if not rest.strip():
+            cloc += 1
+            continue
+        if not special.intersection(rest):
+            sloc += 1
+            continue
+
+        (is_code, closing) = _scan(line, index, markers, blocks, quotes)
+        is_anchored = False
+        if is_code:
+            sloc += 1
+        else:
+            cloc += 1
+
+    return sloc, cloc
+
+
+def _open_anchored(stripped, anchored):
+    for (opening, closing) in anchored:
+        if stripped.startswith(opening):
+            return opening, closing
+    return None
+
+
+def _scan(line, index, markers, blocks, quotes):
+    """Return whether line has code past index and, if the line ends within
+    a block comment, the delimiter closing that block."""
+    is_code = False
+    length = len(line)
+    while index < length:
+        character = line[index]
+        if character.isspace():
+            index += 1
+            continue
+
+        if any(line.startswith(m, index) for m in markers):
+            return is_code, None
+
+        block = next((b for b in blocks if line.startswith(b[0], index)), None)
+        if block is not None:
+            end = line.find(block[1], index + len(block[0]))
+            if end == -1:
+                return is_code, block[1]
+            index = end + len(block[1])
+            continue
+
+        is_code = True
+        if character in quotes:
+            index += 1
+            while index < length and line[index] != character:
+                if line[index] == '\\':
+                    index += 1
+                index += 1
+        index += 1
+
+    return is_code, None
+
+
+def count_files(paths):
+    """Return the lines-of-code of each file in a list of files.
+
+    Parameters
+    ----------
+    paths : list
+        List of 2-tuples of an absolute path to a file and its language.
+
+    Returns
+    -------
+    table : dictionary
+        Dictionary keyed by the path of a file with a 3-tuple of its
+        language, source-lines-of-code and comment-lines-of-code as the
+        value. Missing and binary files are left out.
+    """
+    table = dict()
+    for (path, language) in paths:
+        try:
+            contents = scanner.read(path)
+        except (FileNotFoundError, IsADirectoryError, PermissionError):
+            continue
+        if not contents or b'\0' in contents[:8000]:
+            continue    # Missing or binary
+
+        (sloc, cloc) = count(contents.decode(errors='replace'), language)
+        table[path] = (language, sloc, cloc)
+    return table
+
+
+def get_loc_by_file(path, processes=1):
+    """Return the lines-of-code of each file in a source tree.
+
+    Parameters
+    ----------
+    path : string
+        An absolute path to the source code.
+    processes : int, optional
+        Number of processes to count the lines-of-code with. Default is 1.
+
+    Returns
+    -------
+    table : dictionary
+        Dictionary keyed by the path of a file relative to path with a
+        3-tuple of its language, source-lines-of-code and
+        comment-lines-of-code as the value.
+    """
+    (index, under) = scanner.lookup(path)
+    root = os.path.join(index.path, under) if under else index.path
+    paths = [
+        (os.path.join(index.path, entry.path), entry.language)
+        for entry in index.select(under=under)
+        if entry.language in COMMENTS
+    ]
+
+    if processes <= 1 or len(paths) <= CHUNKSIZE:
+        table = count_files(paths)
+    else:
+        chunksize = max(CHUNKSIZE, len(paths) // (processes * 4) + 1)
+        chunks = [
+            paths[i:i + chunksize] for i in range(0, len(paths), chunksize)
+        ]
+
+        table = dict()
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            for _table in executor.map(count_files, chunks):
+                table.update(_table)
+
+    return {
+        os.path.relpath(_path, root): row for (_path, row) in table.items()
+    }
+
+
+def summarize(table, files=None):
+    """Return the lines-of-code for each language from a per-file table.
+
+    Parameters
+    ----------
+    table : dictionary
+        A table as returned by get_loc_by_file().
+    files : list, optional
+        The relative path of file(s) that must used when counting the
+        lines-of-code. All files in table are used by default.
+
+    Returns
+    -------
+    sloc : dictionary
+        Dictionary keyed by language with a dictionary containing the metrics
+        as the value. The metric dictionary is keyed by 'cloc' for
+        comment-lines-of-code and 'sloc' for source-lines-of-code.
+    """
+    if files is None:
+        rows = table.values()
+    else:
+        rows = [table[_file] for _file in files if _file in table]
+
+    sloc = dict()
+    for (language, _sloc, _cloc) in rows:
+        if language not in sloc:
+            sloc[language] = {'cloc': 0, 'sloc': 0}
+        sloc[language]['sloc'] += _sloc
+        sloc[language]['cloc'] += _cloc
+    return sloc
+
+
+def get_loc(path, files=None, processes=1):
+    """Return the lines-of-code for each language.
+
+    The built-in counterpart of lib.utilities.get_loc. The same data
+    structure is returned.
+
+    Parameters
+    ----------
+    path : string
+        An absolute path to the source code.
+    files : list, optional
+        The relative path of file(s) that must used when counting the
+        lines-of-code.
+    processes : int, optional
+        Number of processes to count the lines-of-code with. Default is 1.
+
+    Returns
+    -------
+    sloc : dictionary
+        See summarize().
+    """
+    table = get_loc_by_file(path, processes=processes)
+    if files is not None:
+        files = [os.path.normpath(_file) for _file in files]
+    return summarize(table, files)
@@ -0,0 +1,131 @@
+import re
+
+# Backreferences, by number or by name, in a regular expression. Patterns
+#   with backreferences or named groups cannot be combined with others, whose
+#   groups would shift their numbers or clash with their names.
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def get_whole(pattern):
+    """Return a regular expression matching a pattern as whole words only,
+    so that patterns that differ in this respect may be matched together."""
+    return r'(?<!\w)(?:{0})(?!\w)'.format(pattern)
+
+
+class Matcher(object):
+    """Match several regular expressions in a single pass over some contents.
+
+    All patterns are compiled into one alternation so that contents which
+    match none of the patterns, by far the common case, are scanned exactly
+    once. Patterns with backreferences or named groups are matched one by one
+    instead. Patterns are matched line-by-line against bytes, in the manner
+    of grep -P.
+
+    Parameters
+    ----------
+    patterns : list
+        Non-empty PERL style regular expressions to match.
+    whole : bool, optional
+        Indicates if the patterns should only match whole words. Default is
+        False.
+    ignorecase : bool, optional
+        Indicates if the matching should be insensitive to case. Default is
+        False.
+    """
+    def __init__(self, patterns, whole=False, ignorecase=False):
+        if not patterns or not all(patterns):
+            raise Exception('Parameter patterns cannot be empty.')
+
+        self.patterns = list(patterns)
+
+        flags = re.MULTILINE
+        if ignorecase:
+            flags |= re.IGNORECASE
+
+        self._regexes = list()
+        for pattern in self.patterns:
+            regex = '(?:{0})'.format(pattern)
+            if whole:
+                regex = get_whole(pattern)
+            self._regexes.append(regex.encode())
+
+        self._compiled = [re.compile(r, flags) for r in self._regexes]
+
+        self._combinable = list()
+        self._separate = list()
+        for (i, compiled) in enumerate(self._compiled):
+            if compiled.groupindex or _BACKREFERENCE.search(self.patterns[i]):
+                self._separate.append(i)
+            else:
+                self._combinable.append(i)
+
+        self._combined = None
+        if self._combinable:
+            self._combined = re.compile(
+                b'|'.join(
+                    b'(?P<p' + str(i).encode() + b'>' + self._regexes[i] +
+                    b')'
+                    for i in self._combinable
+                ),
+                flags
+            )
+
+    def match(self, contents):
+        """Return the set of patterns found in contents.
+
+        Parameters
+        ----------
+        contents : bytes
+            Contents to match the patterns against.
+
+        Returns
+        -------
+        matched : set
+            Set of patterns (as passed to the constructor) that matched.
+        """
+        found = set()
+        if self._combined is not None:
+            # The group of a pattern encloses any group of its own, so it is
+            #   the last one closed.
+            for match in self._combined.finditer(contents):
+                found.add(int(match.lastgroup[1:]))
+                if len(found) == len(self._combinable):
+                    break
+
+            if found and len(found) < len(self._combinable):
+                # Matches of different patterns may overlap in which case the
+                #   alternation only reports the first. Verify the remainder.
+                for i in self._combinable:
+                    if i not in found and self._compiled[i].search(contents):
+                        found.add(i)
+
+        for i in self._separate:
+            if self._compiled[i].search(contents):
+                found.add(i)
+
+        return set(self.patterns[i] for i in found)
+
+    def search(self, index, entries):
+        """Return the relative paths of files matching each pattern.
+
+        Parameters
+        ----------
+        index : lib.scanner.Index
+            Index from which contents of the files are read.
+        entries : list
+            Entries of files in index that must be searched.
+
+        Returns
+        -------
+        files : dict
+            Dictionary keyed by pattern with a list of relative paths (to the
+            root of index) of files matching the pattern as value.
+        """
+        files = {pattern: list() for pattern in self.patterns}
+        for entry in entries:
+            contents = index.read(entry)
+            if not contents:
+                continue
+            for pattern in self.match(contents):
+                files[pattern].append(entry.path)
+        return files
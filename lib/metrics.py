@@ -0,0 +1,145 @@
+import collections
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Path of the JSON Lines file timings are appended to. Timers are disabled
+#   when None.
+PATH = None
+
+# Percentiles reported by summarize().
+PERCENTILES = [50, 95, 99]
+
+# Identifier of the project being processed by the current thread, as the
+#   project_id attribute.
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def project(project_id):
+    """Attribute the timings recorded in the block, by the current thread,
+    to a project."""
+    previous = getattr(_local, 'project_id', None)
+    _local.project_id = project_id
+    try:
+        yield
+    finally:
+        _local.project_id = previous
+
+
+@contextlib.contextmanager
+def timer(stage):
+    """Record the number of seconds the block takes to run as a stage."""
+    if PATH is None:
+        yield
+        return
+
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record(stage, time.monotonic() - started)
+
+
+def timed(stage):
+    """Decorate a function to record the time each call takes as a stage."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(stage, elapsed, project_id=None):
+    """Append a timing to the file at PATH.
+
+    Every timing is written with a single append so that the processes of a
+    run may share the file.
+
+    Parameters
+    ----------
+    stage : str
+        Name of what was timed, e.g. 'clone' or 'attribute.architecture'.
+    elapsed : float
+        Number of seconds it took.
+    project_id : int, optional
+        Identifier of the project it was done for. Defaults to the project
+        set with project().
+    """
+    if PATH is None:
+        return
+
+    line = json.dumps({
+        'project_id': (
+            project_id if project_id is not None
+            else getattr(_local, 'project_id', None)
+        ),
+        'stage': stage,
+        'elapsed': elapsed,
+        'pid': os.getpid(),
+        'time': time.time()
+    })
+    fd = os.open(PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, '{0}\n'.format(line).encode())
+    finally:
+        os.close(fd)
+
+
+def summarize(path):
+    """Return statistics of the timings of each stage in a file.
+
+    Parameters
+    ----------
+    path : str
+        Path of a JSON Lines file written by record().
+
+    Returns
+    -------
+    summary : dict
+        Dictionary keyed by stage with a dictionary as the value. The
+        dictionary is keyed by 'count', 'total' and 'p<N>' for each of
+        PERCENTILES, in seconds.
+    """
+    timings = collections.defaultdict(list)
+    if os.path.exists(path):
+        with open(path, 'r') as file_:
+            for line in file_:
+                try:
+                    timing = json.loads(line)
+                except ValueError:
+                    continue    # Partially written by a killed process
+                timings[timing['stage']].append(timing['elapsed'])
+
+    summary = dict()
+    for (stage, elapsed) in timings.items():
+        elapsed.sort()
+        summary[stage] = {'count': len(elapsed), 'total': sum(elapsed)}
+        for percentile in PERCENTILES:
+            # Nearest-rank percentile
+            rank = max(1, -(-percentile * len(elapsed) // 100))
+            summary[stage]['p{0}'.format(percentile)] = elapsed[rank - 1]
+    return summary
+
+
+def report(path, stream=sys.stdout):
+    """Write a table of the statistics of the timings in a file. See
+    summarize()."""
+    summary = summarize(path)
+    columns = ['count', 'total'] + ['p{0}'.format(p) for p in PERCENTILES]
+
+    stream.write('{0:30s}'.format('stage'))
+    for column in columns:
+        stream.write(' {0:>12s}'.format(column))
+    stream.write('\n')
+    for stage in sorted(summary):
+        stream.write('{0:30s} {1:>12d}'.format(stage, summary[stage]['count']))
+        for column in columns[1:]:
+            stream.write(' {0:>12.3f}'.format(summary[stage][column]))
+        stream.write('\n')
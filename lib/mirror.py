@@ -0,0 +1,162 @@
+import contextlib
+import fcntl
+import os
+import shutil
+import sys
+
+from lib import gitutil
+from lib import scanner
+
+
+class Mirror(object):
+    """Bare mirrors of GitHub repositories that outlive a run.
+
+    The branches and tags of a repository are cloned once into a bare
+    repository under the root, and refreshed with `git fetch` each time the
+    repository is checked out again, so only new objects are downloaded. A
+    commit is checked out as a `git worktree` of the mirror, which shares its
+    objects instead of copying them. Worktrees that were deleted are pruned
+    from the mirror when it is refreshed.
+
+    Parameters
+    ----------
+    root : str
+        Absolute path of the directory holding the mirrors.
+    url : str, optional
+        Format of the URL of a repository given its owner and name.
+    git : callable, optional
+        Function running a git command, given the command and the directory
+        to run it in, and returning its output. Default is
+        lib.gitutil.execute(). See lib.utilities.checkout().
+    """
+    def __init__(self, root, url='https://github.com/{0}/{1}', git=None):
+        self.root = root
+        self.url = url
+        self.git = git or gitutil.execute
+
+    def get_path(self, owner, name):
+        """Return the path of the mirror of a repository."""
+        return os.path.join(self.root, owner, '{0}.git'.format(name))
+
+    def update(self, owner, name):
+        """Create or refresh the mirror of a repository.
+
+        Returns
+        -------
+        path : str
+            Absolute path of the mirror.
+        """
+        path = self.get_path(owner, name)
+        url = self.url.format(owner, name)
+        with self._lock(path):
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    self.git(
+                        'git clone --bare {0} {1}'.format(
+                            url, os.path.basename(path)
+                        ),
+                        os.path.dirname(path)
+                    )
+                    self.git(
+                        'git config remote.origin.fetch '
+                        '"+refs/heads/*:refs/heads/*"',
+                        path
+                    )
+                except:
+                    # Do not leave a partial mirror behind.
+                    shutil.rmtree(path, ignore_errors=True)
+                    raise
+            else:
+                try:
+                    self.git('git fetch --prune --tags origin', path)
+                except Exception as e:
+                    # The repository may have been deleted from GitHub, in
+                    #   which case the objects already mirrored are used.
+                    sys.stderr.write(
+                        ' \033[91mWARNING\033[0m {0}\n'.format(e)
+                    )
+                self.git('git worktree prune', path)
+        return path
+
+    def checkout(self, owner, name, directory, before=None):
+        """Check out the state of a repository as of a point in time.
+
+        Parameters
+        ----------
+        owner : str
+            User name of the owner of the repository.
+        name : str
+            Name of the repository.
+        directory : str
+            Absolute path of a directory to create the worktree in.
+        before : str, optional
+            Date and time, formatted as 'YYYY-MM-DD HH:MM:SS', of which the
+            last commit before is checked out. The latest commit is checked
+            out if None.
+
+        Returns
+        -------
+        path : str
+            Absolute path of the worktree.
+        """
+        path = self.update(owner, name)
+        sha = self._resolve(path, owner, name, before)
+
+        worktree = os.path.join(os.path.abspath(directory), name)
+        with self._lock(path):
+            self.git(
+                'git worktree add --detach --force {0} {1}'.format(
+                    worktree, sha
+                ),
+                path
+            )
+        return worktree
+
+    def reference(self, owner, name, directory, before=None):
+        """Refer to the state of a repository as of a point in time without
+        checking it out.
+
+        The source code is analyzed straight from the objects of the mirror
+        (see lib.scanner.TreeIndex), so no file of the repository is written
+        to disk. See checkout() for a description of the parameters.
+
+        Returns
+        -------
+        path : str
+            Absolute path of the directory referring to the commit.
+        """
+        path = self.update(owner, name)
+        sha = self._resolve(path, owner, name, before)
+
+        reference = os.path.join(os.path.abspath(directory), name)
+        scanner.reference(reference, path, sha)
+        return reference
+
+    def _resolve(self, path, owner, name, before):
+        sha = self.git('git rev-parse HEAD', path)
+        if before is not None:
+            sha = self.git(
+                'git log -1 --before="{0}" --pretty="format:%H"'.format(
+                    before
+                ),
+                path
+            )
+            if not sha:
+                raise Exception(
+                    'No commit of {0}/{1} before {2}.'.format(
+                        owner, name, before
+                    )
+                )
+        return sha
+
+    @contextlib.contextmanager
+    def _lock(self, path):
+        # Processes checking out the same repository take turns.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open('{0}.lock'.format(path), 'w') as file_:
+            fcntl.flock(file_, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file_, fcntl.LOCK_UN)
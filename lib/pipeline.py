@@ -0,0 +1,128 @@
+import queue
+import sys
+import threading
+import traceback
+
+import lib.pool
+
+# Marks the end of the items flowing through a stage.
+_DONE = object()
+
+
+class Stage(object):
+    """A step of a Pipeline run by a pool of processes of its own.
+
+    Parameters
+    ----------
+    function : callable
+        Picklable function applied to each item. Its return value is passed
+        on to the next stage.
+    processes : int
+        Number of processes running the function.
+    """
+    def __init__(self, function, processes):
+        self.function = function
+        self.processes = max(1, processes)
+
+
+class Pipeline(object):
+    """Items processed by a sequence of stages that run concurrently.
+
+    Consecutive stages are connected by queues holding at most `capacity`
+    items, and a stage never has more items in flight than it has
+    processes. A slow stage thus holds back the stages before it instead
+    of accumulating work in memory.
+
+    Parameters
+    ----------
+    stages : list
+        List of Stage objects, in the order items flow through them.
+    capacity : int
+        Maximum number of items waiting between two stages.
+    """
+    def __init__(self, stages, capacity):
+        self.stages = stages
+        self.capacity = max(1, capacity)
+
+    def run(self, items, consume=None):
+        """Pass each item through all stages and wait for them to finish.
+
+        Parameters
+        ----------
+        items : iterable
+            Items to pass to the first stage.
+        consume : callable, optional
+            Function called, in the current process, with each value
+            returned by the last stage.
+        """
+        # Pools are created before any thread is started.
+        pools = [
+            lib.pool.NonDaemonicProcessPool(stage.processes)
+            for stage in self.stages
+        ]
+        queues = [
+            queue.Queue(maxsize=self.capacity) for stage in self.stages
+        ]
+        try:
+            threads = list()
+            for (index, stage) in enumerate(self.stages):
+                outq = None
+                if index + 1 < len(self.stages):
+                    outq = queues[index + 1]
+                threads.append(
+                    threading.Thread(
+                        target=_feed,
+                        args=(
+                            stage, pools[index], queues[index], outq,
+                            consume
+                        )
+                    )
+                )
+            for thread in threads:
+                thread.start()
+
+            for item in items:
+                queues[0].put(item)
+            queues[0].put(_DONE)
+
+            for thread in threads:
+                thread.join()
+        finally:
+            for pool in pools:
+                pool.terminate()
+                pool.join()
+
+
+def _feed(stage, pool, inq, outq, consume):
+    slots = threading.Semaphore(stage.processes)
+
+    def done(result):
+        try:
+            if outq is not None:
+                outq.put(result)
+            elif consume is not None:
+                consume(result)
+        finally:
+            slots.release()
+
+    def failed(exception):
+        traceback.print_exception(
+            type(exception), exception, exception.__traceback__,
+            file=sys.stderr
+        )
+        slots.release()
+
+    while True:
+        item = inq.get()
+        if item is _DONE:
+            break
+        slots.acquire()
+        pool.apply_async(
+            stage.function, (item,), callback=done, error_callback=failed
+        )
+
+    # Wait for the items in flight before signaling the next stage.
+    for _ in range(stage.processes):
+        slots.acquire()
+    if outq is not None:
+        outq.put(_DONE)
@@ -1,4 +1,5 @@
 import multiprocessing
+import multiprocessing.context
 import multiprocessing.pool
 
 
@@ -13,4 +14,9 @@ class NonDaemonicProcess(multiprocessing.Process):
 
 
 class NonDaemonicProcessPool(multiprocessing.pool.Pool):
-    Process = NonDaemonicProcess
+    @staticmethod
+    def Process(*args, **kwargs):
+        # Python 3.8+ passes the context as the first argument.
+        if args and isinstance(args[0], multiprocessing.context.BaseContext):
+            args = args[1:]
+        return NonDaemonicProcess(*args, **kwargs)
@@ -0,0 +1,279 @@
+import asyncio
+import concurrent.futures
+import functools
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+
+from lib import mirror
+from lib import utilities
+
+# Number of projects whose repositories are cloned ahead of their analysis.
+LOOKAHEAD = 8
+# Maximum number of repositories cloned at the same time.
+CONCURRENCY = 4
+# Number of seconds between two measurements of the bytes downloaded.
+INTERVAL = 0.5
+# Number of seconds of bandwidth that may be used in a single burst.
+BURST = 2
+
+_DONE = object()
+
+
+class Prefetcher(object):
+    """Clone the repositories of upcoming projects in the background.
+
+    Projects are handed out for analysis once their repository is cloned,
+    in the order the clones complete, while the repositories of the next
+    projects are cloned. Clones run on an asyncio event loop in a thread of
+    their own, each git command in a subprocess managed by the loop.
+
+    The bandwidth used is measured by the growth of the object databases
+    being cloned into. Every git command in flight is suspended (SIGSTOP)
+    when more than the bandwidth was used, until the excess is paid back.
+
+    Parameters
+    ----------
+    repository_root : str
+        Absolute path to the root of downloaded repositories.
+    lookahead : int, optional
+        Maximum number of projects cloned, or handed out, whose analysis has
+        not completed. Should be larger than the number of processes
+        analyzing projects so that none waits.
+    concurrency : int, optional
+        Maximum number of repositories cloned at the same time.
+    bandwidth : float, optional
+        Maximum number of bytes downloaded per second by all clones, or None
+        for no limit.
+    checkouts : lib.checkouts.Checkouts, optional
+        Quota the repositories are cloned within. A clone waits for space
+        to be reserved before it starts.
+    """
+    def __init__(
+        self, repository_root, lookahead=LOOKAHEAD, concurrency=CONCURRENCY,
+        bandwidth=None, checkouts=None
+    ):
+        self.repository_root = repository_root
+        self.lookahead = lookahead
+        self.concurrency = concurrency
+        self.bandwidth = bandwidth
+        self.checkouts = checkouts
+
+        self._slots = threading.Semaphore(lookahead)
+        self._loop = None
+        # Process of each git command in flight.
+        self._processes = set()
+        # Object database and bytes downloaded so far of each clone in flight.
+        self._downloads = dict()
+
+    def prefetch(self, items):
+        """Yield tasks once the repositories of their projects are cloned.
+
+        Parameters
+        ----------
+        items : iterable
+            2-tuples of a task, whose first element is the identifier of a
+            project, and the location of the repository of the project (see
+            Attributes.locate()). Tasks of projects without a location are
+            yielded without cloning.
+
+        Yields
+        ------
+        task : tuple
+            Each task, once its project is ready to be analyzed. release()
+            must be called when its analysis completes.
+        """
+        ready = queue.Queue()
+        thread = threading.Thread(
+            target=self._run, args=(iter(items), ready), daemon=True
+        )
+        thread.start()
+        while True:
+            task = ready.get()
+            if task is _DONE:
+                break
+            if isinstance(task, Exception):
+                raise task
+            yield task
+        thread.join()
+
+    def release(self):
+        """Signal that the analysis of a project handed out completed."""
+        self._slots.release()
+
+    def _run(self, items, ready):
+        try:
+            asyncio.run(self._prefetch(items, ready))
+        except Exception as e:
+            # Raised where the tasks are consumed.
+            ready.put(e)
+        finally:
+            ready.put(_DONE)
+
+    async def _prefetch(self, items, ready):
+        self._loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        executor = concurrent.futures.ThreadPoolExecutor(self.concurrency)
+        # Items are always produced by the same thread, since producing them
+        #   may use connections (e.g. to the cache) that are bound to the
+        #   thread which opened them.
+        producer = concurrent.futures.ThreadPoolExecutor(1)
+        throttle = None
+        if self.bandwidth is not None:
+            throttle = asyncio.ensure_future(self._throttle())
+
+        clones = set()
+        try:
+            while True:
+                # Items may be produced by database queries, which must not
+                #   hold up the loop.
+                item = await self._loop.run_in_executor(
+                    producer, next, items, _DONE
+                )
+                if item is _DONE:
+                    break
+                await self._loop.run_in_executor(None, self._slots.acquire)
+
+                (task, location) = item
+                if location is None:
+                    ready.put(task)
+                    continue
+                clone = asyncio.ensure_future(
+                    self._clone(task, location, ready, semaphore, executor)
+                )
+                clones.add(clone)
+                clone.add_done_callback(clones.discard)
+            if clones:
+                await asyncio.wait(clones)
+        finally:
+            if throttle is not None:
+                throttle.cancel()
+            executor.shutdown()
+            producer.shutdown()
+
+    async def _clone(self, task, location, ready, semaphore, executor):
+        (owner, name, date) = location
+        home = os.path.join(self.repository_root, str(task[0]))
+        try:
+            async with semaphore:
+                if self.checkouts is not None:
+                    await self._loop.run_in_executor(
+                        executor, self.checkouts.acquire, task[0]
+                    )
+                # Repositories left by a previous run are reused.
+                if os.path.exists(home) and os.listdir(home):
+                    return
+                os.makedirs(home, exist_ok=True)
+
+                objects = self._get_objects(home, owner, name)
+                self._downloads[home] = (
+                    objects,
+                    await self._loop.run_in_executor(None, _get_size, objects)
+                )
+                try:
+                    await self._loop.run_in_executor(
+                        executor, functools.partial(
+                            utilities.clone, owner, name, home, date,
+                            git=self._git
+                        )
+                    )
+                except Exception as e:
+                    # The project is analyzed regardless, cloning it again.
+                    sys.stderr.write(
+                        ' \033[91mWARNING\033[0m {0}\n'.format(e)
+                    )
+                    shutil.rmtree(home, ignore_errors=True)
+                finally:
+                    del self._downloads[home]
+        finally:
+            ready.put(task)
+
+    def _git(self, command, cwd):
+        # Called by utilities.checkout() in a thread of the executor.
+        return asyncio.run_coroutine_threadsafe(
+            self._execute(command, cwd), self._loop
+        ).result()
+
+    async def _execute(self, command, cwd):
+        if 'DEBUG' in os.environ:
+            print(command)
+
+        # A session of its own lets the command and its children (e.g.
+        #   git-remote-https) be suspended together.
+        process = await asyncio.create_subprocess_shell(
+            command, cwd=cwd, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        self._processes.add(process)
+        try:
+            (out, _) = await process.communicate()
+        finally:
+            self._processes.discard(process)
+        if process.returncode != 0:
+            raise Exception('Failed to execute {0}'.format(command))
+        return out.decode().strip()
+
+    async def _throttle(self):
+        allowance = self.bandwidth * BURST
+        while True:
+            await asyncio.sleep(INTERVAL)
+            allowance = min(
+                self.bandwidth * BURST,
+                allowance + self.bandwidth * INTERVAL
+            )
+            allowance -= await self._measure()
+            if allowance < 0:
+                self._signal(signal.SIGSTOP)
+                try:
+                    await asyncio.sleep(-allowance / self.bandwidth)
+                finally:
+                    self._signal(signal.SIGCONT)
+                allowance = 0
+
+    async def _measure(self):
+        """Return the number of bytes downloaded since the last call."""
+        downloads = list(self._downloads.items())
+        # Walking the object databases (whole mirrors in the 'mirror' and
+        #   'tree' clone modes) would hold up the loop.
+        sizes = await self._loop.run_in_executor(
+            None, _get_sizes, [path for (_, (path, _)) in downloads]
+        )
+        downloaded = 0
+        for ((home, (path, size)), _size) in zip(downloads, sizes):
+            # Objects are repacked or pruned at times.
+            downloaded += max(0, _size - size)
+            if home in self._downloads:
+                self._downloads[home] = (path, _size)
+        return downloaded
+
+    def _signal(self, signalnum):
+        for process in list(self._processes):
+            try:
+                os.killpg(process.pid, signalnum)
+            except ProcessLookupError:
+                pass
+
+    def _get_objects(self, home, owner, name):
+        if utilities.CLONE_MODE in ('mirror', 'tree'):
+            path = mirror.Mirror(utilities.MIRROR_ROOT).get_path(owner, name)
+            return os.path.join(path, 'objects')
+        return os.path.join(home, name, '.git', 'objects')
+
+
+def _get_sizes(paths):
+    return [_get_size(path) for path in paths]
+
+
+def _get_size(path):
+    size = 0
+    for (root, _, fnames) in os.walk(path):
+        for fname in fnames:
+            try:
+                size += os.path.getsize(os.path.join(root, fname))
+            except OSError:
+                pass    # Removed while walking
+    return size
@@ -1,27 +1,50 @@
+import functools
+import itertools
 import os
 import sys
-import time
 import traceback
 import warnings
 
 import lib.pool
+from lib import metrics
+from lib import pipeline
+from lib import utilities
+from lib import writer
 
-SQL_QUERY = 'SELECT {columns} FROM {table} WHERE project_id = {project_id}'
-SQL_INSERT = 'INSERT INTO {table}({columns}) VALUES ({placeholders})'
-SQL_UPDATE = '''
-    UPDATE {table}
-    SET {placeholders}
-    WHERE project_id = {project_id}
+SQL_QUERY = '''
+    SELECT project_id, {columns}
+    FROM {table}
+    WHERE project_id IN ({project_ids})
 '''
+SQL_UPSERT = '''
+    INSERT INTO {table}({columns}) VALUES {rows}
+    ON DUPLICATE KEY UPDATE {updates}
+'''
+
+# Maximum number of results written to the database at once.
+BATCH_SIZE = 100
+# Maximum number of seconds a result is buffered before it is written.
+FLUSH_INTERVAL = 10
+# Number of projects the bulk_run hook of attributes is called with at once.
+BULK_SIZE = 1000
 
 
 class Run(object):
-    def __init__(self, repo_root, attributes, database, threshold, processes):
+    def __init__(
+        self, repo_root, attributes, database, threshold, processes,
+        batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+        bulk_size=BULK_SIZE, checkpoint=None, prefetcher=None
+    ):
         self.repo_root = repo_root
         self.attributes = attributes
         self.database = database
         self.threshold = threshold
         self.processes = processes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.bulk_size = bulk_size
+        self.checkpoint = checkpoint
+        self.prefetcher = prefetcher
 
     def run(self, samples, table):
         try:
@@ -29,90 +52,250 @@ class Run(object):
             sys.stdout.write('{0}\n'.format(str.center('Run', 25)))
             sys.stdout.write('{0}\n'.format('#' * 25))
             self.attributes.global_init(samples)
-            with lib.pool.NonDaemonicProcessPool(self.processes) as pool:
-                pool.starmap(
-                    self._process,
-                    [(project_id, table) for project_id in samples],
-                    chunksize=1
+            with self._get_writer(table) as _writer:
+                with lib.pool.NonDaemonicProcessPool(self.processes) as pool:
+                    for result in pool.imap_unordered(
+                        self._process, self._tasks(samples, prefetch=True),
+                        chunksize=1
+                    ):
+                        if self.prefetcher is not None:
+                            self.prefetcher.release()
+                        if result is not None:
+                            _writer.write(result)
+            sys.stdout.write('{0}\n'.format('#' * 25))
+        except Exception as e:
+            extype, exvalue, extrace = sys.exc_info()
+            traceback.print_exception(extype, exvalue, extrace)
+        finally:
+            self.attributes.global_teardown()
+
+    def run_pipeline(self, samples, table, processes, capacity):
+        """Score projects in a pipeline of stages that run concurrently.
+
+        Projects are fetched, evaluated by the attributes that do not require
+        the source code and evaluated by those that do by separate pools of
+        processes. See lib.pipeline.Pipeline. Results are saved in batches by
+        the current process.
+
+        Parameters
+        ----------
+        samples : iterable
+            Identifiers of the projects to score. It is iterated twice.
+        table : str
+            Name of the table to save the results to.
+        processes : dict
+            Number of processes of each stage keyed by the name of the stage:
+            'fetch', 'metadata' or 'source'. The number of
+            processes of the run is used for stages that are missing.
+        capacity : int
+            Maximum number of projects waiting between two stages.
+        """
+        try:
+            sys.stdout.write('{0}\n'.format('#' * 25))
+            sys.stdout.write('{0}\n'.format(str.center('Run', 25)))
+            sys.stdout.write('{0}\n'.format('#' * 25))
+            self.attributes.global_init(samples)
+            stages = [
+                (self._fetch, 'fetch'),
+                (self._evaluate_metadata, 'metadata'),
+                (self._evaluate_source, 'source'),
+            ]
+            _pipeline = pipeline.Pipeline(
+                [
+                    pipeline.Stage(
+                        function, processes.get(name, self.processes)
+                    )
+                    for (function, name) in stages
+                ],
+                capacity
+            )
+            with self._get_writer(table) as _writer:
+                _pipeline.run(
+                    self._tasks(samples),
+                    lambda item: _writer.write((item[0], item[2]))
                 )
             sys.stdout.write('{0}\n'.format('#' * 25))
         except Exception as e:
             extype, exvalue, extrace = sys.exc_info()
             traceback.print_exception(extype, exvalue, extrace)
+        finally:
+            self.attributes.global_teardown()
+
+    def _tasks(self, samples, prefetch=False):
+        """Yield 2-tuples of the identifier of a project and the raw results
+        precomputed for it by Attributes.bulk_run() on a batch of samples.
+
+        Projects of a batch are yielded in decreasing order of predicted
+        cost, so that the longest ones do not start last and hold up the
+        pool. See Attributes.estimate().
+
+        When prefetch is True and the run has a prefetcher, projects are
+        yielded once their repository was cloned, in the order the clones
+        complete. See lib.prefetch.Prefetcher."""
+        prefetch = prefetch and self.prefetcher is not None
+        items = self._get_items(samples, prefetch)
+        if prefetch:
+            return self.prefetcher.prefetch(items)
+        return (task for (task, _) in items)
+
+    def _get_items(self, samples, locate):
+        samples = iter(samples)
+        while True:
+            batch = list(itertools.islice(samples, self.bulk_size))
+            if not batch:
+                break
+            costs = self.attributes.estimate(batch)
+            if costs:
+                batch.sort(key=lambda i: costs.get(i, 0), reverse=True)
+            precomputed = self.attributes.bulk_run(batch)
+            locations = self.attributes.locate(batch) if locate else dict()
+            for project_id in batch:
+                yield (
+                    (project_id, precomputed.get(project_id, dict())),
+                    locations.get(project_id)
+                )
+
+    def _fetch(self, task):
+        (project_id, precomputed) = task
+        fetched = self.attributes.fetch(
+            project_id, self.repo_root, precomputed
+        )
+        return project_id, fetched, dict()
+
+    def _evaluate_metadata(self, item):
+        (project_id, fetched, rresults) = item
+        if fetched is not None:
+            rresults.update(
+                self.attributes.evaluate(
+                    project_id, *fetched, requires_source=False
+                )
+            )
+        return project_id, fetched, rresults
 
-    def _process(self, project_id, table):
+    def _evaluate_source(self, item):
+        (project_id, fetched, rresults) = item
         try:
-            rresults = self.attributes.run(project_id, self.repo_root)
+            if fetched is not None:
+                rresults.update(
+                    self.attributes.evaluate(
+                        project_id, *fetched, requires_source=True
+                    )
+                )
+        finally:
+            self.attributes.release(project_id, self.repo_root)
+        return project_id, fetched, rresults
+
+    def _get_writer(self, table):
+        return writer.BufferedWriter(
+            functools.partial(self._save_all, table=table), self.batch_size,
+            self.flush_interval
+        )
+
+    def _process(self, task):
+        (project_id, precomputed) = task
+        try:
+            rresults = self.attributes.run(
+                project_id, self.repo_root, precomputed
+            )
         except:
             sys.stderr.write('Exception\n\n')
             sys.stderr.write('  Project ID   {0}\n'.format(project_id))
             extype, exvalue, extrace = sys.exc_info()
             traceback.print_exception(extype, exvalue, extrace)
-        finally:
-            if rresults is not None:
-                self._save(project_id, rresults, table)
-
-        # HACK: Waiting for mysqld to reclaim its connection
-        time.sleep(0.5)
+            return None
+        return project_id, rresults
 
     def _save(self, project_id, rresults, table):
-        # Merge raw results from current run with existing ones (if any)
-        is_existing = False
-        _rresults = self._get(project_id, table)
-        if _rresults:
-            is_existing = True
-            # Update the dictionary containing attribute values retrieved from
-            # the database iff at least one of the values is not NULL.
-            # Typically, a project that was not active at the time of the
-            # reaper run will have all its attribute values set to NULL.
-            # However, when re-computing the score, the default values of the
-            # attributes may overwrite the NULL values in the database.
-            updatable = False
-            if len([i for i in _rresults.values() if i is not None]) > 0:
-                updatable = True
-                _rresults.update(rresults)
-
-        score = self.attributes.score(_rresults)
-        self._print_outcome(project_id, score)
-
-        if self.attributes.is_persistence_enabled:
-            if is_existing is True and updatable is False:
-                return
-
-            columns = ('project_id', 'score')
-            values = (project_id, score)
-            for key in rresults:
-                if self.attributes.get(key).persist:
-                    if rresults[key] is not None:
-                        columns += (key,)
-                        values += (rresults[key],)
-
-            if is_existing:
-                # Update
-                query = SQL_UPDATE.format(
-                    project_id=project_id, table=table,
-                    placeholders=('=%s,'.join(columns) + '=%s')
-                )
+        self._save_all([(project_id, rresults)], table)
+
+    @metrics.timed('save')
+    def _save_all(self, results, table):
+        """Save the raw results and scores of projects.
+
+        Parameters
+        ----------
+        results : list
+            List of 2-tuples of the identifier of a project and its raw
+            results.
+        table : str
+            Name of the table to save the results to.
+        """
+        existing = self._get_all(
+            [project_id for (project_id, _) in results], table
+        )
+        columns = ['project_id', 'score'] + [
+            attribute.name for attribute in self.attributes.attributes
+            if attribute.persist
+        ]
+
+        rows = list()
+        for (project_id, rresults) in results:
+            # Merge raw results from current run with existing ones (if any)
+            is_existing = False
+            _rresults = existing.get(project_id, dict())
+            if _rresults:
+                is_existing = True
+                # Update the dictionary containing attribute values retrieved
+                # from the database iff at least one of the values is not
+                # NULL. Typically, a project that was not active at the time
+                # of the reaper run will have all its attribute values set to
+                # NULL. However, when re-computing the score, the default
+                # values of the attributes may overwrite the NULL values in
+                # the database.
+                updatable = False
+                if len([i for i in _rresults.values() if i is not None]) > 0:
+                    updatable = True
+                    _rresults.update(rresults)
+
+            score = self.attributes.score(_rresults)
+            self._print_outcome(project_id, score)
+
+            if self.attributes.is_persistence_enabled:
+                if is_existing is True and updatable is False:
+                    continue
+
+                row = [project_id, score]
+                for column in columns[2:]:
+                    value = rresults.get(column, None)
+                    if isinstance(value, utilities.LowerBound):
+                        value = float(value)
+                    row.append(value)
+                rows.append(row)
             else:
-                # Insert
-                query = SQL_INSERT.format(
-                    columns=','.join(columns), table=table,
-                    placeholders=','.join(['%s' for i in range(len(columns))])
-                )
+                if 'DEBUG' in os.environ:
+                    for (attribute, result) in rresults.items():
+                        print('[{0:10d}] {1:25s} {2}'.format(
+                            project_id, attribute, result
+                        ))
+
+        if rows:
+            self._upsert(columns, rows, table)
+
+        # Projects are recorded once their results are in the database.
+        if self.checkpoint is not None:
+            self.checkpoint.record(
+                [project_id for (project_id, _) in results]
+            )
 
-            try:
-                self.database.connect()
-                self.database.post(query, values)
-            finally:
-                self.database.disconnect()
-        else:
-            if 'DEBUG' in os.environ:
-                for (attribute, result) in rresults.items():
-                    print('[{0:10d}] {1:25s} {2}'.format(
-                        project_id, attribute, result
-                    ))
-
-    def _get(self, project_id, table):
+    def _upsert(self, columns, rows, table):
+        # Attributes without a result (NULL) keep their existing value.
+        updates = ['score=VALUES(score)'] + [
+            '{0}=COALESCE(VALUES({0}),{0})'.format(column)
+            for column in columns[2:]
+        ]
+        placeholders = '({0})'.format(','.join(['%s'] * len(columns)))
+        query = SQL_UPSERT.format(
+            table=table, columns=','.join(columns),
+            rows=','.join([placeholders] * len(rows)),
+            updates=','.join(updates)
+        )
+        try:
+            self.database.connect()
+            self.database.post(query, [value for row in rows for value in row])
+        finally:
+            self.database.disconnect()
+
+    def _get_all(self, project_ids, table):
         rresults = dict()
 
         try:
@@ -121,15 +304,16 @@ class Run(object):
             ]
 
             self.database.connect()
-            output = self.database.get(
-                SQL_QUERY.format(
-                    columns=','.join(columns), table=table,
-                    project_id=project_id
+            with self.database.cursor() as cursor:
+                cursor.execute(
+                    SQL_QUERY.format(
+                        columns=','.join(columns), table=table,
+                        project_ids=','.join(['%s'] * len(project_ids))
+                    ),
+                    params=list(project_ids)
                 )
-            )
-            if output is not None:
-                for (index, column) in enumerate(columns):
-                    rresults[column] = output[index]
+                for output in cursor.fetchall():
+                    rresults[output[0]] = dict(zip(columns, output[1:]))
         finally:
             self.database.disconnect()
 
@@ -0,0 +1,73 @@
+import os
+
+
+class Samples(object):
+    """Identifiers of projects read lazily from a file, one per line.
+
+    The file is read again each time the samples are iterated, so a sample
+    of millions of projects is never held in memory.
+
+    Parameters
+    ----------
+    path : str
+        Path of a file containing newline-separated project identifiers.
+    exclude : set, optional
+        Identifiers of projects to skip, e.g. those completed by a previous
+        run. See Checkpoint.
+    """
+    def __init__(self, path, exclude=None):
+        self.path = path
+        self.exclude = exclude if exclude is not None else set()
+
+    def __iter__(self):
+        with open(self.path, 'r') as file_:
+            for line in file_:
+                line = line.strip()
+                if not line:
+                    continue
+                project_id = int(line)
+                if project_id not in self.exclude:
+                    yield project_id
+
+
+class Checkpoint(object):
+    """Append-only file recording the projects whose results were saved.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path of the checkpoint file.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Return the set of identifiers of the projects recorded so far.
+
+        A final line without a newline was cut short by a killed run. It is
+        ignored, and removed so that later records are not appended to it.
+        """
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, 'rb+') as file_:
+            contents = file_.read()
+            end = contents.rfind(b'\n') + 1
+            if end < len(contents):
+                file_.truncate(end)
+        return {int(line) for line in contents[:end].split()}
+
+    def record(self, project_ids):
+        """Record projects as completed, durably, before returning."""
+        if not project_ids:
+            return
+        with open(self.path, 'a') as file_:
+            file_.write(''.join(
+                '{0}\n'.format(project_id) for project_id in project_ids
+            ))
+            file_.flush()
+            os.fsync(file_.fileno())
+
+    def reset(self):
+        """Forget the projects recorded so far."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,675 @@
+import fnmatch
+import os
+import subprocess
+import threading
+
+# Directories that hold version control metadata rather than source code.
+IGNORED_DIRECTORIES = ['.bzr', '.git', '.hg', '.svn', 'CVS', '_darcs', 'RCS']
+
+# Files larger than this (in bytes) are indexed but their contents are never
+#   held in memory.
+MAXIMUM_FILE_SIZE = 1024 * 1024
+# Total size, in bytes, of the contents retained by an index. Files beyond it
+#   are read again each time they are needed.
+MAXIMUM_RETAINED_SIZE = 256 * 1024 * 1024
+
+# Name of the file that, in place of a checkout, points to a commit in a git
+#   repository whose tree is indexed instead. See TreeIndex.
+TREE_FILE = '.reaper-tree'
+
+# Mode of the entries of a git tree that are symbolic links.
+SYMLINK_MODE = '120000'
+
+# Map a file extension to the language name used by cloc
+#   (http://cloc.sourceforge.net/).
+LANGUAGES = {
+    '.c': 'C',
+    '.h': 'C/C++ Header',
+    '.hh': 'C/C++ Header',
+    '.hpp': 'C/C++ Header',
+    '.hxx': 'C/C++ Header',
+    '.h++': 'C/C++ Header',
+    '.cc': 'C++',
+    '.cpp': 'C++',
+    '.cxx': 'C++',
+    '.c++': 'C++',
+    '.cs': 'C#',
+    '.css': 'CSS',
+    '.go': 'Go',
+    '.htm': 'HTML',
+    '.html': 'HTML',
+    '.java': 'Java',
+    '.js': 'JavaScript',
+    '.kt': 'Kotlin',
+    '.lua': 'Lua',
+    '.m': 'Objective C',
+    '.mm': 'Objective C++',
+    '.php': 'PHP',
+    '.pl': 'Perl',
+    '.pm': 'Perl',
+    '.py': 'Python',
+    '.rb': 'Ruby',
+    '.rake': 'Ruby',
+    '.rs': 'Rust',
+    '.scala': 'Scala',
+    '.sh': 'Bourne Shell',
+    '.swift': 'Swift',
+    '.ts': 'TypeScript',
+    '.xml': 'XML',
+    '.yaml': 'YAML',
+    '.yml': 'YAML',
+    '.hs': 'Haskell',
+    '.lhs': 'Haskell',
+    '.erl': 'Erlang',
+    '.hrl': 'Erlang',
+    '.ex': 'Elixir',
+    '.exs': 'Elixir',
+    '.clj': 'Clojure',
+    '.cljs': 'ClojureScript',
+    '.cljc': 'ClojureC',
+    '.dart': 'Dart',
+    '.groovy': 'Groovy',
+    '.ml': 'OCaml',
+    '.mli': 'OCaml',
+    '.f': 'Fortran 77',
+    '.f77': 'Fortran 77',
+    '.f90': 'Fortran 90',
+    '.f95': 'Fortran 95',
+    '.coffee': 'CoffeeScript',
+    '.tsx': 'TypeScript',
+    '.kts': 'Kotlin',
+    '.scss': 'SASS',
+    '.less': 'LESS',
+    '.sql': 'SQL',
+    '.tcl': 'Tcl/Tk',
+    '.el': 'Lisp',
+    '.lisp': 'Lisp',
+    '.scm': 'Scheme',
+    '.r': 'R',
+    '.pas': 'Pascal',
+    '.vb': 'Visual Basic',
+    '.vhd': 'VHDL',
+    '.vhdl': 'VHDL',
+    '.asm': 'Assembly',
+    '.jsp': 'JSP',
+    '.erb': 'ERB',
+    '.ada': 'Ada',
+    '.adb': 'Ada',
+    '.ads': 'Ada',
+    '.as': 'ActionScript',
+    '.st': 'Smalltalk',
+}
+
+# File types as understood by ack (ack --help-types), keyed by type name.
+#   Types that ack only recognizes by file name (e.g. make, rake) are matched
+#   by the extensions they have, if any.
+TYPES = {
+    'actionscript': ['.as', '.mxml'],
+    'ada': ['.ada', '.adb', '.ads'],
+    'asm': ['.asm', '.s'],
+    'asp': ['.asp'],
+    'aspx': ['.master', '.ascx', '.asmx', '.aspx', '.svc'],
+    'batch': ['.bat', '.cmd'],
+    'cc': ['.c', '.h', '.xs'],
+    'cfmx': ['.cfc', '.cfm', '.cfml'],
+    'clojure': ['.clj', '.cljs', '.edn', '.cljc'],
+    'cmake': ['.cmake'],
+    'coffeescript': ['.coffee'],
+    'cpp': [
+        '.cpp', '.cc', '.cxx', '.m', '.hpp', '.hh', '.h', '.hxx', '.c++',
+        '.h++'
+    ],
+    'csharp': ['.cs'],
+    'css': ['.css'],
+    'dart': ['.dart'],
+    'delphi': [
+        '.pas', '.int', '.dfm', '.nfm', '.dof', '.dpk', '.dproj',
+        '.groupproj', '.bdsgroup', '.bdsproj'
+    ],
+    'elisp': ['.el'],
+    'elixir': ['.ex', '.exs'],
+    'erlang': ['.erl', '.hrl'],
+    'fortran': [
+        '.f', '.f77', '.f90', '.f95', '.f03', '.for', '.ftn', '.fpp'
+    ],
+    'go': ['.go'],
+    'groovy': ['.groovy', '.gtmpl', '.gpp', '.grunit', '.gradle'],
+    'gsp': ['.gsp'],
+    'haskell': ['.hs', '.lhs'],
+    'hh': ['.h'],
+    'hpp': ['.hpp', '.hh', '.h', '.hxx'],
+    'html': ['.htm', '.html', '.xhtml'],
+    'jade': ['.jade'],
+    'java': ['.java', '.properties'],
+    'js': ['.js'],
+    'json': ['.json'],
+    'jsp': ['.jsp', '.jspx', '.jspf', '.jhtm', '.jhtml'],
+    'kotlin': ['.kt', '.kts'],
+    'less': ['.less'],
+    'lisp': ['.lisp', '.lsp'],
+    'lua': ['.lua'],
+    'markdown': ['.md', '.markdown'],
+    'matlab': ['.m'],
+    'objc': ['.m', '.h'],
+    'objcpp': ['.mm', '.h'],
+    'ocaml': ['.ml', '.mli', '.mll', '.mly'],
+    'perl': ['.pl', '.pm', '.pod', '.t', '.psgi'],
+    'perltest': ['.t'],
+    'php': ['.php', '.phpt', '.php3', '.php4', '.php5', '.phtml'],
+    'plone': ['.pt', '.cpt', '.metadata', '.cpy', '.py'],
+    'python': ['.py'],
+    'rr': ['.r'],
+    'rst': ['.rst'],
+    'ruby': ['.rb', '.rhtml', '.rjs', '.rxml', '.erb', '.rake', '.spec'],
+    'rust': ['.rs'],
+    'sass': ['.sass', '.scss'],
+    'scala': ['.scala'],
+    'scheme': ['.scm', '.ss'],
+    'shell': ['.sh', '.bash', '.csh', '.tcsh', '.ksh', '.zsh', '.fish'],
+    'smalltalk': ['.st'],
+    'smarty': ['.tpl'],
+    'sql': ['.sql', '.ctl'],
+    'stylus': ['.styl'],
+    'svg': ['.svg'],
+    'swift': ['.swift'],
+    'tcl': ['.tcl', '.itcl', '.itk'],
+    'tex': ['.tex', '.cls', '.sty'],
+    'ttml': ['.tt', '.tt2', '.ttml'],
+    'typescript': ['.ts', '.tsx'],
+    'vb': ['.bas', '.cls', '.frm', '.ctl', '.vb', '.resx'],
+    'verilog': ['.v', '.vh', '.sv'],
+    'vhdl': ['.vhd', '.vhdl'],
+    'vim': ['.vim'],
+    'xml': ['.xml', '.dtd', '.xsd', '.xsl', '.xslt', '.ent', '.wsdl'],
+    'yaml': ['.yaml', '.yml'],
+}
+
+_indexes = dict()
+
+
+class Entry(object):
+    """A single file in an Index."""
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.name = os.path.basename(path)
+        self.extension = os.path.splitext(self.name)[1].lower()
+        self.language = LANGUAGES.get(self.extension, None)
+
+    def __repr__(self):
+        return '<Entry {0} ({1})>'.format(self.path, self.language)
+
+
+class Index(object):
+    """Files in a source tree, collected by walking the tree exactly once.
+
+    Contents of the files are read at most once and retained, up to
+    MAXIMUM_RETAINED_SIZE in total, so that every attribute analyzing the
+    same checkout shares the same bytes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = list()
+        self.directories = list()
+        self._contents = dict()
+        self._retained = 0
+        self._entries = None
+
+    def walk(self):
+        for (root, dnames, fnames) in os.walk(self.path):
+            dnames[:] = [d for d in dnames if d not in IGNORED_DIRECTORIES]
+            relroot = os.path.relpath(root, self.path)
+            if relroot == os.curdir:
+                relroot = ''
+            self.directories.append((relroot, list(dnames)))
+
+            for fname in fnames:
+                abspath = os.path.join(root, fname)
+                if not os.path.isfile(abspath):
+                    continue
+                self.entries.append(
+                    Entry(
+                        os.path.join(relroot, fname),
+                        os.path.getsize(abspath)
+                    )
+                )
+        return self
+
+    def preload(self):
+        """Read the contents of files in a known language, as many as can be
+        retained. The remaining files are read when needed."""
+        for entry in self._get_preloaded():
+            self.read(entry)
+        return self
+
+    def read(self, entry):
+        """Return the contents of a file as bytes.
+
+        Parameters
+        ----------
+        entry : Entry or str
+            An entry in the index or the path of a file relative to the root
+            of the index.
+
+        Returns
+        -------
+        contents : bytes
+            Contents of the file or None if the file could not be read.
+        """
+        path = entry.path if isinstance(entry, Entry) else entry
+        if path in self._contents:
+            return self._contents[path]
+
+        try:
+            with open(os.path.join(self.path, path), 'rb') as file_:
+                contents = file_.read()
+        except (FileNotFoundError, IsADirectoryError, PermissionError):
+            return None
+
+        self._retain(path, contents)
+        return contents
+
+    def select(self, include=None, exclude=None, types=None, under=None):
+        """Return entries matching the specified criteria.
+
+        Parameters
+        ----------
+        include : list, optional
+            Shell-style patterns of file names to include.
+        exclude : list, optional
+            Shell-style patterns of file names to exclude.
+        types : list, optional
+            ack file types (see TYPES) to include.
+        under : str, optional
+            A path, relative to the root of the index, of the directory to
+            restrict the selection to.
+
+        Returns
+        -------
+        entries : list
+            List of Entry objects.
+        """
+        extensions = None
+        if types:
+            extensions = set()
+            for type_ in types:
+                extensions.update(TYPES.get(type_, []))
+
+        prefix = None
+        if under:
+            prefix = under.rstrip(os.sep) + os.sep
+
+        entries = list()
+        for entry in self.entries:
+            if prefix and not entry.path.startswith(prefix):
+                continue
+            if extensions is not None and entry.extension not in extensions:
+                continue
+            if include and not any(
+                fnmatch.fnmatch(entry.name, i) for i in include
+            ):
+                continue
+            if exclude and any(
+                fnmatch.fnmatch(entry.name, e) for e in exclude
+            ):
+                continue
+            entries.append(entry)
+        return entries
+
+    def find_directory(self, names, under=None):
+        """Return the relative path of the first directory, in walk order,
+        whose name is one of names. None is returned if there is none."""
+        for (relroot, dnames) in self.directories:
+            if under and not (
+                relroot == under or relroot.startswith(under + os.sep)
+            ):
+                continue
+            for name in names:
+                if name in dnames:
+                    return os.path.join(relroot, name)
+        return None
+
+    def _get_preloaded(self):
+        # Entries in a known language whose contents fit in what is left of
+        #   MAXIMUM_RETAINED_SIZE.
+        entries = list()
+        size = self._retained
+        for entry in self.entries:
+            if entry.language is None or entry.path in self._contents:
+                continue
+            if entry.size > MAXIMUM_FILE_SIZE:
+                continue
+            if size + entry.size > MAXIMUM_RETAINED_SIZE:
+                break
+            size += entry.size
+            entries.append(entry)
+        return entries
+
+    def _retain(self, path, contents):
+        size = len(contents)
+        if (
+            size <= MAXIMUM_FILE_SIZE and
+            self._retained + size <= MAXIMUM_RETAINED_SIZE
+        ):
+            self._contents[path] = contents
+            self._retained += size
+
+    def get(self, path):
+        """Return the Entry of the file at a path relative to the root of the
+        index, or None if there is no such file."""
+        if self._entries is None:
+            self._entries = {entry.path: entry for entry in self.entries}
+        return self._entries.get(os.path.normpath(path))
+
+    def close(self):
+        """Release the resources held to read the files."""
+        pass
+
+    @property
+    def size(self):
+        return sum(entry.size for entry in self.entries)
+
+
+class TreeIndex(Index):
+    """Files in a commit, read from the object database of a git repository.
+
+    The tree of the commit is listed with `git ls-tree` and the contents of
+    its blobs are read through `git cat-file --batch`, so the source code is
+    analyzed without being checked out. The index is rooted at a path which
+    need not exist, and its files are looked up and read through the
+    functions of this module as if they were on disk.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path the files of the commit are looked up under.
+    git_dir : str
+        Absolute path of the git repository (e.g. a bare mirror).
+    commit : str
+        SHA of the commit.
+    """
+    def __init__(self, path, git_dir, commit):
+        super().__init__(path)
+        self.git_dir = git_dir
+        self.commit = commit
+        self._blobs = dict()
+        self._process = None
+        self._pid = None
+
+    def walk(self):
+        command = ['git', 'ls-tree', '-r', '-l', '-z', self.commit]
+        out = subprocess.check_output(
+            command, cwd=self.git_dir, stderr=subprocess.DEVNULL
+        )
+
+        children = {'': list()}
+        for record in out.split(b'\0'):
+            if not record:
+                continue
+            (info, path) = record.decode(errors='surrogateescape').split(
+                '\t', 1
+            )
+            (mode, type_, sha, size) = info.split()
+            # Submodules and symbolic links are not files of the tree.
+            if type_ != 'blob' or mode == SYMLINK_MODE:
+                continue
+            components = path.split('/')
+            if any(c in IGNORED_DIRECTORIES for c in components[:-1]):
+                continue
+
+            relroot = ''
+            for component in components[:-1]:
+                dname = os.path.join(relroot, component)
+                if dname not in children:
+                    children[relroot].append(component)
+                    children[dname] = list()
+                relroot = dname
+            path = os.path.join(*components)
+            self.entries.append(Entry(path, int(size)))
+            self._blobs[path] = sha
+
+        # Directories are listed top-down, as os.walk() would.
+        stack = ['']
+        while stack:
+            relroot = stack.pop()
+            dnames = sorted(children[relroot])
+            self.directories.append((relroot, dnames))
+            stack.extend(
+                os.path.join(relroot, dname) for dname in reversed(dnames)
+            )
+        return self
+
+    def preload(self):
+        """Read the contents of files in a known language, as many as can be
+        retained.
+
+        The blobs are streamed through a single `git cat-file --batch` that
+        is fed while its output is read.
+        """
+        paths = [entry.path for entry in self._get_preloaded()]
+        if not paths:
+            return self
+
+        process = self._open('--buffer')
+
+        def feed():
+            try:
+                for path in paths:
+                    process.stdin.write(
+                        '{0}\n'.format(self._blobs[path]).encode()
+                    )
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            for path in paths:
+                contents = _read_object(process.stdout)
+                if contents is not None:
+                    self._retain(path, contents)
+        finally:
+            feeder.join()
+            process.stdout.close()
+            process.wait()
+        return self
+
+    def read(self, entry):
+        path = entry.path if isinstance(entry, Entry) else entry
+        path = os.path.normpath(path)
+        if path in self._contents:
+            return self._contents[path]
+        if path not in self._blobs:
+            return None
+
+        # A process forked after the batch was started has its own.
+        if self._process is None or self._pid != os.getpid():
+            self._process = self._open()
+            self._pid = os.getpid()
+        self._process.stdin.write('{0}\n'.format(self._blobs[path]).encode())
+        self._process.stdin.flush()
+        contents = _read_object(self._process.stdout)
+
+        if contents is not None:
+            self._retain(path, contents)
+        return contents
+
+    def export(self, entries, directory):
+        """Write files of the index to a directory, for tools that only read
+        from disk.
+
+        Returns
+        -------
+        paths : list
+            Absolute path of each file written, in the order of entries.
+        """
+        paths = list()
+        for entry in entries:
+            path = os.path.join(directory, entry.path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file_:
+                file_.write(self.read(entry) or b'')
+            paths.append(path)
+        return paths
+
+    def close(self):
+        if self._process is not None and self._pid == os.getpid():
+            self._process.stdin.close()
+            self._process.stdout.close()
+            self._process.wait()
+        self._process = None
+        self._pid = None
+
+    def _open(self, *options):
+        return subprocess.Popen(
+            ['git', 'cat-file', '--batch'] + list(options), cwd=self.git_dir,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+
+def _read_object(stream):
+    # Output of `git cat-file --batch` is '<sha> <type> <size>\n<contents>\n'
+    #   for each object, or '<sha> missing\n'.
+    header = stream.readline().split()
+    if len(header) != 3:
+        return None
+    contents = stream.read(int(header[2]))
+    stream.read(1)
+    return contents
+
+
+def scan(path):
+    """Return the Index of a source tree, walking the tree if necessary.
+
+    A tree pointed to by a TREE_FILE at path is indexed from the object
+    database of its git repository (see TreeIndex and reference()).
+
+    Parameters
+    ----------
+    path : string
+        An absolute path to the source code.
+
+    Returns
+    -------
+    index : Index
+        The index of the source tree rooted at path.
+    """
+    path = os.path.abspath(path)
+    if path not in _indexes:
+        if not os.path.isdir(path):
+            raise Exception('%s is an invalid path.' % path)
+        tree = get_tree(path)
+        if tree is not None:
+            _indexes[path] = TreeIndex(path, *tree).walk()
+        else:
+            _indexes[path] = Index(path).walk()
+    return _indexes[path]
+
+
+def lookup(path):
+    """Return the Index containing path along with path relative to its root.
+
+    An existing index of an ancestor directory is reused. Otherwise, path
+    itself is scanned.
+    """
+    path = os.path.abspath(path)
+    for (root, index) in _indexes.items():
+        if path == root:
+            return index, ''
+        if path.startswith(root + os.sep):
+            return index, os.path.relpath(path, root)
+    return scan(path), ''
+
+
+def read(path):
+    """Return the contents of the file at an absolute path as bytes.
+
+    Contents retained by an index covering the file are reused.
+    """
+    path = os.path.abspath(path)
+    for (root, index) in _indexes.items():
+        if path.startswith(root + os.sep):
+            return index.read(os.path.relpath(path, root))
+
+    with open(path, 'rb') as file_:
+        return file_.read()
+
+
+def isdir(path):
+    """Return True if path is a directory of an indexed source tree or on
+    disk."""
+    path = os.path.abspath(path)
+    for (root, index) in _indexes.items():
+        if path == root:
+            return True
+        if path.startswith(root + os.sep):
+            under = os.path.relpath(path, root)
+            return any(relroot == under for (relroot, _) in index.directories)
+    return os.path.isdir(path)
+
+
+def getsize(path):
+    """Return the size, in bytes, of the file at an absolute path or None if
+    there is no such file. Files of a source tree read from a git repository
+    are looked up in its index."""
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    if is_tree(directory):
+        (index, under) = lookup(directory)
+        entry = index.get(os.path.join(under, os.path.basename(path)))
+        return entry.size if entry is not None else None
+
+    if not os.path.isfile(path):
+        return None
+    return os.path.getsize(path)
+
+
+def is_tree(path):
+    """Return True if path is, or is within, a source tree that is read from
+    a git repository rather than from disk. See reference()."""
+    path = os.path.abspath(path)
+    for (root, index) in _indexes.items():
+        if path == root or path.startswith(root + os.sep):
+            return isinstance(index, TreeIndex)
+    return get_tree(path) is not None
+
+
+def reference(path, git_dir, commit):
+    """Point path to a commit in a git repository instead of checking it out.
+
+    Only a TREE_FILE is written to path. The files of the commit are indexed
+    and read from the repository when path is scanned.
+
+    Parameters
+    ----------
+    path : string
+        Absolute path of the directory to create.
+    git_dir : string
+        Absolute path of the git repository.
+    commit : string
+        SHA of the commit.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, TREE_FILE), 'w') as file_:
+        file_.write('{0}\n{1}\n'.format(os.path.abspath(git_dir), commit))
+
+
+def get_tree(path):
+    """Return the git repository and commit path refers to, as a 2-tuple, or
+    None if path was not created by reference()."""
+    tree_file = os.path.join(path, TREE_FILE)
+    if not os.path.isfile(tree_file):
+        return None
+    with open(tree_file, 'r') as file_:
+        (git_dir, commit) = file_.read().split()
+    return git_dir, commit
+
+
+def forget(path):
+    """Discard the indexes of path and every source tree underneath it."""
+    path = os.path.abspath(path)
+    for root in list(_indexes.keys()):
+        if root == path or root.startswith(path + os.sep):
+            _indexes.pop(root).close()
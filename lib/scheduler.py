@@ -0,0 +1,142 @@
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from lib import metrics
+from lib import worker
+from lib.database import Database
+
+# Resource classes of attributes. Attributes that are bound by I/O (e.g.
+#   querying the database or the GitHub API) run in threads whereas those
+#   bound by the CPU run in processes.
+IO = 'io'
+CPU = 'cpu'
+
+
+class ThreadJob(object):
+    """An attribute running in a thread of the current process.
+
+    A thread cannot be terminated. An attribute that times out keeps running
+    in the background, holding its database connection and cursor, until it
+    returns on its own. Attributes that may run well past their timeout
+    belong in a ProcessJob.
+    """
+    def __init__(self, attribute, settings, project_id, repository_path):
+        self._result = None
+        # Number of seconds the attribute ran for, once it finished.
+        self.elapsed = None
+        # Daemonic so that one left running does not keep the process alive.
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(attribute, settings, project_id, repository_path),
+            daemon=True
+        )
+        self._thread.start()
+
+    def wait(self, timeout):
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            return None
+        return self._result
+
+    def _run(self, attribute, settings, project_id, repository_path):
+        started = time.monotonic()
+        self._result = execute(
+            attribute, settings, project_id, repository_path
+        )
+        self.elapsed = time.monotonic() - started
+
+
+class ProcessJob(object):
+    """An attribute running in a process of its own."""
+    def __init__(self, attribute, settings, project_id, repository_path):
+        self.elapsed = None
+        self._outq = multiprocessing.Queue(maxsize=1)
+        self._process = multiprocessing.Process(
+            target=_put,
+            args=(attribute, settings, project_id, repository_path, self._outq)
+        )
+        self._process.start()
+
+    def wait(self, timeout):
+        try:
+            (result, self.elapsed) = worker.get(
+                self._outq, self._process, timeout
+            )
+        except queue.Empty:
+            result = None
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process.join()
+        return result
+
+
+class WorkerJob(object):
+    """An attribute running in a lib.worker.Worker."""
+    def __init__(self, worker, project_id, repository_path):
+        self.elapsed = None
+        self._worker = worker
+        self._worker.submit(project_id, repository_path)
+
+    def wait(self, timeout):
+        result = self._worker.collect(timeout)
+        self.elapsed = self._worker.elapsed
+        return result
+
+
+def wait(jobs, started):
+    """Wait for jobs that were started at the same time.
+
+    Parameters
+    ----------
+    jobs : list
+        List of 3-tuples of a name, a job and its timeout in seconds.
+    started : float
+        Value of time.monotonic() when the jobs were started.
+
+    Returns
+    -------
+    results : dict
+        Dictionary keyed by the name of a job with its result as the value.
+        The result of a job that failed or timed out is None.
+    """
+    results = dict()
+    for (name, job, timeout) in jobs:
+        remaining = max(0, started + timeout - time.monotonic())
+        results[name] = job.wait(remaining)
+    return results
+
+
+def execute(attribute, settings, project_id, repository_path):
+    """Run an attribute on a project over a database connection of its own.
+
+    Returns
+    -------
+    result : 2-tuple
+        The boolean and raw result of the attribute, or None if the
+        attribute failed.
+    """
+    database = Database(settings)
+    try:
+        database.connect()
+        with metrics.project(project_id), database.cursor() as cursor:
+            return attribute.reference.run(
+                project_id, repository_path, cursor, **attribute.options
+            )
+    except:
+        sys.stderr.write('Exception\n\n')
+        sys.stderr.write('  Project ID   {0}\n'.format(project_id))
+        extype, exvalue, extrace = sys.exc_info()
+        traceback.print_exception(extype, exvalue, extrace)
+        return None
+    finally:
+        database.disconnect()
+
+
+def _put(attribute, settings, project_id, repository_path, outq):
+    started = time.monotonic()
+    result = execute(attribute, settings, project_id, repository_path)
+    outq.put((result, time.monotonic() - started))
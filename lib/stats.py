@@ -0,0 +1,163 @@
+import collections
+import itertools
+import uuid
+
+# Prefix of the name of the table materializing the statistics of the
+#   projects in the sample of a run. Each run materializes a table of its own.
+TABLE = 'reaper_sample_stats'
+
+COLUMNS = [
+    'project_id', 'url', 'owner', 'name', 'language', 'first_commit_date',
+    'last_commit_date', 'num_commits', 'num_issues'
+]
+
+SQL_CREATE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        project_id INT NOT NULL,
+        url VARCHAR(255) DEFAULT NULL,
+        owner VARCHAR(255) DEFAULT NULL,
+        name VARCHAR(255) DEFAULT NULL,
+        language VARCHAR(255) DEFAULT NULL,
+        first_commit_date DATETIME DEFAULT NULL,
+        last_commit_date DATETIME DEFAULT NULL,
+        num_commits INT NOT NULL DEFAULT 0,
+        num_issues INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (project_id)
+    )
+'''
+# Query computes the statistics of projects, joining `commits` and
+#   `project_commits` once for all of them.
+SQL_STATS = '''
+    SELECT p.id, p.url, u.login, p.name, p.language,
+        c.first_commit_date, c.last_commit_date,
+        COALESCE(c.num_commits, 0), COALESCE(i.num_issues, 0)
+    FROM projects p
+        LEFT JOIN users u ON u.id = p.owner_id
+        LEFT JOIN (
+            SELECT pc.project_id,
+                MIN(c.created_at) AS first_commit_date,
+                MAX(c.created_at) AS last_commit_date,
+                COUNT(c.id) AS num_commits
+            FROM commits c
+                JOIN project_commits pc ON pc.commit_id = c.id
+            WHERE pc.project_id IN ({project_ids}) and c.created_at > 0
+            GROUP BY pc.project_id
+        ) c ON c.project_id = p.id
+        LEFT JOIN (
+            SELECT i.repo_id, COUNT(*) AS num_issues
+            FROM issues i
+            WHERE i.repo_id IN ({project_ids})
+            GROUP BY i.repo_id
+        ) i ON i.repo_id = p.id
+    WHERE p.id IN ({project_ids})
+'''
+SQL_MATERIALIZE = 'REPLACE INTO {table} ({columns}) ' + SQL_STATS
+SQL_DROP = 'DROP TABLE IF EXISTS {table}'
+SQL_GET = '''
+    SELECT {columns}
+    FROM {table}
+    WHERE project_id IN ({project_ids})
+'''
+
+# Number of projects materialized with a single query.
+BATCH_SIZE = 1000
+
+Stats = collections.namedtuple('Stats', COLUMNS)
+
+# Name of the table the statistics of the sample of the current run are
+#   materialized in, or None. Processes forked afterwards (e.g. to run
+#   attributes) read them from the table.
+_table = None
+
+
+def materialize(cursor, samples):
+    """Compute the statistics of a sample into a table of the run.
+
+    Statistics derived from the commits, issues and metadata of a project
+    are needed by several attributes and to clone its repository. Computing
+    them once per sample, with set-based queries, spares each of those from
+    joining `commits` and `project_commits` again. The table must be dropped
+    with drop() once the run completes.
+
+    Parameters
+    ----------
+    cursor : mysql.connector.cursor.MySQLCursor
+        Cursor over a connection to the database.
+    samples : iterable
+        Identifiers of the projects in the sample.
+    """
+    global _table
+
+    # Not a temporary table, which only the connection creating it could read.
+    table = '{0}_{1}'.format(TABLE, uuid.uuid4().hex[:12])
+    cursor.execute(SQL_CREATE.format(table=table))
+    _table = table
+    samples = iter(samples)
+    while True:
+        batch = list(itertools.islice(samples, BATCH_SIZE))
+        if not batch:
+            break
+        cursor.execute(
+            SQL_MATERIALIZE.format(
+                table=table, columns=','.join(COLUMNS),
+                project_ids=_join(batch)
+            )
+        )
+
+
+def drop(cursor):
+    """Drop the table of statistics created by materialize(), if any.
+
+    Parameters
+    ----------
+    cursor : mysql.connector.cursor.MySQLCursor
+        Cursor over a connection to the database.
+    """
+    global _table
+
+    if _table is not None:
+        cursor.execute(SQL_DROP.format(table=_table))
+        _table = None
+
+
+def get_all(cursor, project_ids):
+    """Return the statistics of projects.
+
+    Statistics are read from the table of the run if the sample was
+    materialized, and computed otherwise.
+
+    Parameters
+    ----------
+    cursor : mysql.connector.cursor.MySQLCursor
+        Cursor over a connection to the database.
+    project_ids : list
+        Identifiers of the projects.
+
+    Returns
+    -------
+    stats : dict
+        Dictionary keyed by the identifier of a project with its Stats as
+        the value. Projects that do not exist are left out.
+    """
+    if not project_ids:
+        return dict()
+
+    if _table is not None:
+        query = SQL_GET.format(
+            columns=','.join(COLUMNS), table=_table,
+            project_ids=_join(project_ids)
+        )
+    else:
+        query = SQL_STATS.format(project_ids=_join(project_ids))
+    cursor.execute(query)
+    return {row[0]: Stats(*row) for row in cursor.fetchall()}
+
+
+def get(cursor, project_id):
+    """Return the Stats of a project, or None if it does not exist. See
+    get_all()."""
+    return get_all(cursor, [project_id]).get(int(project_id))
+
+
+def _join(project_ids):
+    return ','.join(str(int(project_id)) for project_id in project_ids)
@@ -1,15 +1,20 @@
 import argparse
+import csv
 import io
 import json
 import os
-import shlex
 import subprocess
 import urllib.request
 import re
 import tarfile
-from tempfile import NamedTemporaryFile
 
 from lib import dateutil
+from lib import gitutil
+from lib import loc
+from lib import matcher
+from lib import metrics
+from lib import mirror
+from lib import scanner
 
 # GitHub OAuth token issuer
 TOKENIZER = None
@@ -20,23 +25,70 @@ ACK_LANGUAGE_MAP = {
     'c++': 'cpp',
     'c#': 'csharp',
     'objective-c': 'objc',
+    'objective c': 'objc',
     'ojective-c++': 'objcpp',
+    'javascript': 'js',
 }
 
+# Implementation used to count lines-of-code: 'cloc' to run the cloc utility
+#   or 'native' to use the built-in counter in lib.loc.
+LOC_COUNTER = 'cloc'
+# Number of processes used by the built-in lines-of-code counter.
+LOC_PROCESSES = 1
+# lib.cache.SymbolCache shared by attributes that tokenize source code (None
+#   to disable).
+SYMBOL_CACHE = None
+# How repositories are cloned, one of CLONE_MODES. See checkout().
+CLONE_MODE = 'full'
+CLONE_MODES = ['full', 'partial', 'shallow', 'mirror', 'tree']
+# Absolute path of the directory holding the mirrors of repositories when
+#   CLONE_MODE is 'mirror' or 'tree'. See lib.mirror.Mirror.
+MIRROR_ROOT = None
+
 _loc_cache = dict()
 _cache_hits = 0
 
 
+class LowerBound(float):
+    """A raw result that is a lower bound of the actual value.
+
+    Attributes may stop computing a result once it is known to satisfy the
+    threshold. The value returned in that case is only known to be a lower
+    bound: the actual value is at least this large. It is not cached, and is
+    saved as a plain float by Run._save_all(), so the results table does not
+    tell it apart from an exact value.
+    """
+    def __repr__(self):
+        return '>={0}'.format(float.__repr__(self))
+
+
 def get_cache_hits():
     return _cache_hits
 
 
+def forget(path):
+    """Discard the lines-of-code cached for path and every source tree
+    underneath it."""
+    path = os.path.abspath(path)
+    for _path in list(_loc_cache.keys()):
+        _path = os.path.abspath(_path)
+        if _path == path or _path.startswith(path + os.sep):
+            del _loc_cache[_path]
+
+
+@metrics.timed('get_loc')
 def get_loc(path, files=None):
     """Return the lines-of-code for each language.
 
     cloc (http://cloc.sourceforge.net/) is used to compute the metrics. The
     method merely parses the output from cloc to return a Python-friendly
-    data structure.
+    data structure. The built-in counter in lib.loc is used instead when
+    LOC_COUNTER is 'native' or the source code was not checked out (see
+    lib.scanner.TreeIndex).
+
+    The lines-of-code of every file in path are computed once and retained
+    (see get_loc_by_file), so counting a subset of the files does not
+    require the source to be analyzed again.
 
     Parameters
     ----------
@@ -53,10 +105,37 @@ def get_loc(path, files=None):
         as the value. The metric dictionary is keyed by 'cloc' for
         comment-lines-of-code and 'sloc' for source-lines-of-code.
     """
+    table = get_loc_by_file(path)
+
+    if files is not None:
+        files = [
+            os.path.relpath(_file, path)
+            if os.path.isabs(_file) else os.path.normpath(_file)
+            for _file in files
+        ]
+
+    return loc.summarize(table, files)
+
+
+def get_loc_by_file(path):
+    """Return the lines-of-code of each file in a source tree.
+
+    Parameters
+    ----------
+    path : string
+        An absolute path to the source code.
+
+    Returns
+    -------
+    table : dictionary
+        Dictionary keyed by the path of a file relative to path with a
+        3-tuple of its language, source-lines-of-code and
+        comment-lines-of-code as the value.
+    """
     global _loc_cache
     global _cache_hits
 
-    if files is None and path in _loc_cache.keys():
+    if path in _loc_cache.keys():
         _cache_hits += 1
         cached = _loc_cache[path]
         if isinstance(cached, Exception):
@@ -64,30 +143,18 @@ def get_loc(path, files=None):
         else:
             return cached
 
-    if not (os.path.exists(path) or os.path.isdir(path)):
+    if not scanner.isdir(path):
         exception = Exception('%s is an invalid path.' % path)
-        if files is None:
-            _loc_cache[path] = exception
+        _loc_cache[path] = exception
         raise exception
 
-    sloc = dict()
-
-    tempfile = None
-    try:
-        command = 'cloc --csv '
-
-        if files:
-            # Using temporary file to overcome the character limit in bash
-            #   command line.
-            tempfile = NamedTemporaryFile()
-            with open(tempfile.name, 'w') as _tempfile:
-                for _file in files:
-                    _tempfile.write('{0}\n'.format(_file))
-
-            command += '--list-file={0}'.format(tempfile.name)
-        else:
-            command += '.'
+    # cloc only counts files on disk.
+    if LOC_COUNTER == 'native' or scanner.is_tree(path):
+        table = loc.get_loc_by_file(path, processes=LOC_PROCESSES)
+    else:
+        table = dict()
 
+        command = 'cloc --csv --by-file .'
         if 'DEBUG' in os.environ:
             print(command)
 
@@ -104,27 +171,20 @@ def get_loc(path, files=None):
 
         index = -1
         for _index, _line in enumerate(lines):
-            if 'files,' in _line:
+            if 'filename,' in _line:
                 index = _index
                 break
 
         if index != -1:
-            for _index in range(index + 1, len(lines)):
-                components = lines[_index].split(',')
-                sloc[components[1]] = {
-                    'cloc': int(components[3]),
-                    'sloc': int(components[4])
-                }
-
-        if files is None:
-            _loc_cache[path] = sloc
-    except:
-        raise
-    finally:
-        if tempfile is not None and not tempfile.closed:
-            tempfile.close()
+            for components in csv.reader(lines[index + 1:]):
+                if components[0] == 'SUM':
+                    continue
+                table[os.path.normpath(components[1])] = (
+                    components[0], int(components[4]), int(components[3])
+                )
 
-    return sloc
+    _loc_cache[path] = table
+    return table
 
 
 def search(
@@ -133,8 +193,8 @@ def search(
 ):
     """Search for the presence of a pattern.
 
-    grep (http://www.gnu.org/software/grep/manual/grep.html) is used to
-    recursively search for the pattern in all files within a specified path.
+    The pattern is matched, in-process, against the contents of all files
+    within a specified path as indexed by lib.scanner.
 
     Parameters
     ----------
@@ -164,47 +224,59 @@ def search(
         no files were found containing the matching string then None is
         returned.
     """
-    if not (os.path.exists(path) or os.path.isdir(path)):
-        raise Exception('%s is an invalid path.' % path)
-
     if not pattern:
         raise Exception('Parameter pattern cannot be emtpy.')
 
-    files = None
+    return search_all(
+        [pattern], path, recursive, whole, ignorecase, include, exclude
+    )[pattern]
 
-    command = 'ggrep -Plc'
-    if recursive:
-        command += ' -r'
-    if whole:
-        command += ' -w'
-    if ignorecase:
-        command += ' -i'
-    if include:
-        command += ' --include '
-        command += ' --include '.join(shlex.quote(i) for i in include)
-    if exclude:
-        command += ' --exclude '
-        command += ' --exclude '.join(shlex.quote(i) for i in exclude)
-
-    command += ' '
-    command += shlex.quote(pattern)
 
-    if 'DEBUG' in os.environ:
-        print(command)
+@metrics.timed('search')
+def search_all(
+    patterns, path, recursive=True, whole=False, ignorecase=False,
+    include=None, exclude=None
+):
+    """Search for the presence of several patterns in a single pass.
 
-    process = subprocess.Popen(
-        command, cwd=path, shell=True,
-        stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
-    (out, err) = [x.decode() for x in process.communicate()]
+    All patterns are combined into one matcher (see lib.matcher.Matcher) so
+    that each candidate file is scanned once regardless of the number of
+    patterns.
 
-    lines = [
-        line.strip('\n')
-        for line in out.split('\n') if len(line.strip('\n')) != 0
-    ]
+    Parameters
+    ----------
+    patterns : list
+        A list of non-empty PERL style regular expressions to match.
+    path : string
+        An absolute path to the location to root the search at.
 
-    if lines:
-        files = lines
+    See search() for a description of the remaining parameters.
+
+    Returns
+    -------
+    files : dict
+        Dictionary keyed by pattern with a list of relative paths to files
+        that contain the pattern as the value. The value is None if no files
+        were found containing the pattern.
+    """
+    if not scanner.isdir(path):
+        raise Exception('%s is an invalid path.' % path)
+
+    _matcher = matcher.Matcher(patterns, whole=whole, ignorecase=ignorecase)
+
+    (index, under) = scanner.lookup(path)
+    entries = index.select(include=include, exclude=exclude, under=under)
+    if not recursive:
+        entries = [
+            entry for entry in entries
+            if os.path.dirname(entry.path) == under
+        ]
+
+    files = dict()
+    for (pattern, paths) in _matcher.search(index, entries).items():
+        if under:
+            paths = [os.path.relpath(p, under) for p in paths]
+        files[pattern] = paths if paths else None
 
     return files
 
@@ -249,7 +321,8 @@ def get_repo_path(repo_id, repositories_dir):
     return repo_path
 
 
-def clone(owner, name, directory, date=None):
+@metrics.timed('clone')
+def clone(owner, name, directory, date=None, mode=None, git=None):
     """Clone a GitHub repository and reset its state to a specific commit.
 
     Parameters
@@ -263,6 +336,10 @@ def clone(owner, name, directory, date=None):
         will be reset to.
     directory : string
         Absolute path of a directory to clone the repository to.
+    mode : string, optional
+        One of CLONE_MODES. Defaults to CLONE_MODE.
+    git : callable, optional
+        See checkout().
 
     Returns
     -------
@@ -273,56 +350,157 @@ def clone(owner, name, directory, date=None):
     if not cloneable:
         raise Exception(reason)
 
-    path = directory
-    url = 'https://github.com/{0}/{1}'.format(owner, name)
+    before = None
+    if date is not None:
+        before = '{0} 23:59:59'.format(date)
+    path = checkout(owner, name, directory, before, mode, git)
+    if date is None:
+        path = directory
+    return path
 
-    # Clone
-    command = 'git clone {0}'.format(url)
-    if 'DEBUG' in os.environ:
-        print(command)
 
-    process = subprocess.Popen(
-        command, cwd=path, shell=True,
-        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    )
-    process.wait()
-    if process.returncode != 0:
-        raise Exception('Failed to execute {0}'.format(command))
+def checkout(owner, name, directory, before=None, mode=None, git=None):
+    """Obtain the state of a GitHub repository as of a point in time.
 
-    if date is not None:
-        # Reset
-        path = os.path.join(path, name)
-        command = (
-            'git log -1 --before="{0} 23:59:59" --pretty="format:%H"'.format(
-                date
-            )
+    Parameters
+    ----------
+    owner : string
+        User name of the owner of the repository.
+    name : string
+        Name of the repository.
+    directory : string
+        Absolute path of a directory to create the repository in.
+    before : string, optional
+        Date and time, formatted as 'YYYY-MM-DD HH:MM:SS', of which the last
+        commit before is checked out. The latest commit is checked out if
+        None.
+    mode : string, optional
+        One of CLONE_MODES. Defaults to CLONE_MODE.
+
+        'full'
+            The entire history is cloned.
+        'partial'
+            The history is cloned without the contents of files, which are
+            only fetched for the commit checked out.
+        'shallow'
+            Only the commit checked out is fetched. The commit is found
+            through the GitHub API, by the date it was committed (in UTC).
+        'mirror'
+            A bare mirror of the repository under MIRROR_ROOT is created or
+            refreshed, and the commit is checked out as a worktree of it.
+        'tree'
+            As 'mirror', but the commit is not checked out. Its files are
+            read from the mirror when analyzed (see lib.scanner.TreeIndex).
+    git : callable, optional
+        Function running a git command, given the command and the directory
+        to run it in, and returning its output. Default is
+        lib.gitutil.execute(). See lib.prefetch.Prefetcher.
+
+    Returns
+    -------
+    path : string
+        Absolute path of the directory containing the repository.
+    """
+    mode = mode or CLONE_MODE
+    git = git or gitutil.execute
+    if mode not in CLONE_MODES:
+        raise ValueError('Invalid clone mode {0}.'.format(mode))
+
+    url = 'https://github.com/{0}/{1}'.format(owner, name)
+    path = os.path.join(directory, name)
+
+    if mode in ('mirror', 'tree'):
+        if MIRROR_ROOT is None:
+            raise ValueError('MIRROR_ROOT must be set to clone mirrors.')
+        _mirror = mirror.Mirror(MIRROR_ROOT, git=git)
+        if mode == 'tree':
+            return _mirror.reference(owner, name, directory, before)
+        return _mirror.checkout(owner, name, directory, before)
+
+    if mode == 'shallow':
+        sha = 'HEAD'
+        if before is not None:
+            sha = get_commit_before(owner, name, before)
+            if sha is None:
+                raise Exception(
+                    'No commit of {0}/{1} before {2}.'.format(
+                        owner, name, before
+                    )
+                )
+        os.makedirs(path, exist_ok=True)
+        git('git init', path)
+        git('git fetch --depth 1 {0} {1}'.format(url, sha), path)
+        git('git reset --hard FETCH_HEAD', path)
+        return path
+
+    if mode == 'partial':
+        git(
+            'git clone --filter=blob:none --no-checkout {0}'.format(url),
+            directory
         )
-        if 'DEBUG' in os.environ:
-            print(command)
+    else:
+        git('git clone {0}'.format(url), directory)
 
-        process = subprocess.Popen(
-            command, cwd=path, shell=True,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    if before is not None:
+        sha = git(
+            'git log -1 --before="{0}" --pretty="format:%H"'.format(before),
+            path
         )
-        (out, err) = [i.decode() for i in process.communicate()]
+        git('git reset --hard {0}'.format(sha), path)
+    elif mode == 'partial':
+        git('git reset --hard', path)
+    return path
 
-        if process.returncode != 0:
-            raise Exception('Failed to execute {0}'.format(command))
 
-        sha = out
-        command = 'git reset --hard {0}'.format(sha)
-        if 'DEBUG' in os.environ:
-            print(command)
+def get_commit_before(owner, name, before):
+    """Return the SHA of the last commit of a GitHub repository before a date
+    and time (in UTC), or None if there is none."""
+    url = (
+        'https://api.github.com/repos/{0}/{1}/commits?until={2}&per_page=1'
+    ).format(owner, name, before.replace(' ', 'T') + 'Z')
+    if TOKENIZER is not None:
+        url = TOKENIZER.tokenize(url)
 
-        process = subprocess.Popen(
-            command, cwd=path, shell=True,
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        )
-        process.wait()
-        if process.returncode != 0:
-            raise Exception('Failed to execute {0}'.format(command))
+    with urllib.request.urlopen(url) as response:
+        commits = json.loads(response.read().decode('utf-8'))
+    return commits[0]['sha'] if commits else None
 
-    return path
+
+def get_tree_sha(path):
+    """Return the SHA of the git tree checked out at a path.
+
+    Parameters
+    ----------
+    path : string
+        Absolute path of the directory containing the repository.
+
+    Returns
+    -------
+    sha : string
+        SHA of the tree object of HEAD, or of the commit path refers to (see
+        lib.scanner.reference()), or None if path is not a git repository.
+    """
+    (cwd, commit) = (path, 'HEAD')
+    tree = scanner.get_tree(path)
+    if tree is not None:
+        (cwd, commit) = tree
+    # Guard against resolving the tree of a repository enclosing path.
+    elif not os.path.exists(os.path.join(path, '.git')):
+        return None
+
+    command = 'git rev-parse {0}^{{tree}}'.format(commit)
+    if 'DEBUG' in os.environ:
+        print(command)
+
+    process = subprocess.Popen(
+        command, cwd=cwd, shell=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    (out, _) = process.communicate()
+    if process.returncode != 0:
+        return None
+
+    return out.decode().strip()
 
 
 def read(jsonfile):
@@ -441,6 +619,9 @@ def is_cloneable(owner, name):
 def get_files(path, language):
     """Return list of absolute paths to files in a specified language.
 
+    Files are selected from the index of the source tree (see lib.scanner)
+    using the same file types ack (http://beyondgrep.com/) would.
+
     Parameters
     ----------
     path : str
@@ -460,15 +641,10 @@ def get_files(path, language):
     if language in ACK_LANGUAGE_MAP:
         language = ACK_LANGUAGE_MAP[language]
 
-    command = ['ack', '-f', "--{0}".format(language), path]
-    process = subprocess.Popen(
-        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
-
-    if 'DEBUG' in os.environ:
-        print(' '.join(command))
-
-    out, _ = [x.decode(errors='ignore') for x in process.communicate()]
-    files = [line for line in out.split('\n') if line.strip()]
+    (index, under) = scanner.lookup(path)
+    files = [
+        os.path.join(index.path, entry.path)
+        for entry in index.select(types=[language], under=under)
+    ]
 
     return files
@@ -0,0 +1,190 @@
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import sys
+import time
+import traceback
+
+from lib import metrics
+from lib import scanner
+from lib import utilities
+from lib.database import Database
+
+# Number of seconds an idle worker waits for a job before checking that the
+#   process that started it is still alive.
+POLL_INTERVAL = 1
+
+
+class Worker(object):
+    """A long-lived process running an attribute for one project at a time.
+
+    The process is started on the first job and reused for subsequent jobs,
+    so the cost of forking and importing the attribute is paid once instead
+    of once per project. The process holds its own database connection. A
+    process that exceeds the timeout of a job is terminated and replaced on
+    the next job.
+
+    Parameters
+    ----------
+    attribute : lib.attributes.Attribute
+        The attribute to run.
+    settings : dict
+        Settings for connecting to the database.
+    """
+    def __init__(self, attribute, settings):
+        self.attribute = attribute
+        self.settings = settings
+        self._process = None
+        self._inq = None
+        self._outq = None
+        # Number of seconds the attribute ran for on the job collected last.
+        self.elapsed = None
+        # Workers are not daemonic (attributes may start processes of their
+        #   own) so they must be stopped before the process that started them
+        #   joins its children at exit, and before the queues are closed.
+        multiprocessing.util.Finalize(self, self.stop, exitpriority=20)
+
+    def run(self, project_id, repository_path, timeout):
+        """Run the attribute on a project.
+
+        Parameters
+        ----------
+        project_id : int
+            Identifier of the project to run the attribute on.
+        repository_path : str
+            Absolute path to the source code of the project. None if the
+            attribute does not require the source code.
+        timeout : float
+            Number of seconds after which the attribute is considered to
+            have timed out.
+
+        Returns
+        -------
+        result : 2-tuple
+            The boolean and raw result of the attribute, or None if the
+            attribute failed or timed out.
+        """
+        self.submit(project_id, repository_path)
+        return self.collect(timeout)
+
+    def submit(self, project_id, repository_path):
+        """Submit a job without waiting for its result. See run()."""
+        if self._process is None or not self._process.is_alive():
+            self._start()
+
+        self._inq.put((project_id, repository_path))
+
+    def collect(self, timeout):
+        """Wait for the result of the job submitted last. See run()."""
+        self.elapsed = None
+        try:
+            (result, self.elapsed) = get(self._outq, self._process, timeout)
+            return result
+        except queue.Empty:
+            self.stop(force=True)
+            return None
+
+    def stop(self, force=False):
+        """Stop the process, terminating it if force is True."""
+        if self._process is None:
+            return
+
+        if force:
+            self._process.terminate()
+        else:
+            self._inq.put(None)
+        self._process.join()
+        self._process = None
+
+    def _start(self):
+        self._inq = multiprocessing.Queue()
+        self._outq = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve,
+            args=(
+                self.attribute, self.settings, self._inq, self._outq,
+                os.getpid()
+            )
+        )
+        self._process.start()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_process'] = None
+        state['_inq'] = None
+        state['_outq'] = None
+        return state
+
+
+def get(outq, process, timeout):
+    """Wait for the result a process puts on a queue.
+
+    The process is checked every POLL_INTERVAL seconds so that one that died
+    without putting a result (e.g. killed for running out of memory) is not
+    waited for until the timeout.
+
+    Parameters
+    ----------
+    outq : multiprocessing.Queue
+        Queue the result is put on.
+    process : multiprocessing.Process
+        Process putting the result.
+    timeout : float
+        Number of seconds to wait for the result, or None to wait as long as
+        the process is alive.
+
+    Raises
+    ------
+    queue.Empty
+        If the process died or the timeout expired without a result.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        remaining = POLL_INTERVAL
+        if deadline is not None:
+            remaining = max(0, min(remaining, deadline - time.monotonic()))
+        try:
+            return outq.get(timeout=remaining)
+        except queue.Empty:
+            if not process.is_alive():
+                # The result may have been put just before it exited.
+                return outq.get_nowait()
+            if deadline is not None and time.monotonic() >= deadline:
+                raise
+
+
+def _serve(attribute, settings, inq, outq, ppid):
+    database = Database(settings)
+    while True:
+        try:
+            job = inq.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            if os.getppid() != ppid:
+                break   # Orphaned
+            continue
+        if job is None:
+            break
+
+        (project_id, repository_path) = job
+        result = None
+        started = time.monotonic()
+        try:
+            if not database.connected:
+                database.connect()
+            with metrics.project(project_id), database.cursor() as cursor:
+                result = attribute.reference.run(
+                    project_id, repository_path, cursor, **attribute.options
+                )
+        except:
+            sys.stderr.write('Exception\n\n')
+            sys.stderr.write('  Project ID   {0}\n'.format(project_id))
+            extype, exvalue, extrace = sys.exc_info()
+            traceback.print_exception(extype, exvalue, extrace)
+        finally:
+            if repository_path is not None:
+                scanner.forget(repository_path)
+                utilities.forget(repository_path)
+        outq.put((result, time.monotonic() - started))
+
+    database.disconnect()
@@ -0,0 +1,64 @@
+import sys
+import threading
+import traceback
+
+
+class BufferedWriter(object):
+    """Items collected in a buffer that is flushed in batches.
+
+    The buffer is flushed when it holds `size` items and, by a background
+    thread, every `interval` seconds. Items that are still buffered are
+    flushed by close().
+
+    Parameters
+    ----------
+    flush : callable
+        Function called with a non-empty list of items to flush.
+    size : int
+        Number of items that triggers a flush.
+    interval : float
+        Maximum number of seconds an item is buffered before it is flushed.
+    """
+    def __init__(self, flush, size, interval):
+        self.flush = flush
+        self.size = max(1, size)
+        self.interval = interval
+        self._buffer = list()
+        # Serializes flushes; held while calling flush.
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, item):
+        with self._lock:
+            self._buffer.append(item)
+            if len(self._buffer) >= self.size:
+                self._flush()
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+        with self._lock:
+            self._flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run(self):
+        while not self._closed.wait(self.interval):
+            with self._lock:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        (items, self._buffer) = (self._buffer, list())
+        try:
+            self.flush(items)
+        except Exception:
+            extype, exvalue, extrace = sys.exc_info()
+            traceback.print_exception(extype, exvalue, extrace)
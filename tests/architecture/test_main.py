@@ -1,8 +1,14 @@
 import json
 import os
+import shutil
+import tempfile
 import unittest
 
+from pygments import lexers
+
 from attributes.architecture import main
+from lib import cache
+from lib import utilities
 from tests import REPOS_PATH
 
 
@@ -13,6 +19,142 @@ class MainTestCase(unittest.TestCase):
         self.assertTrue(result)
         self.assertLess(0, value)
 
+    def test_build_graph(self):
+        # Arrange
+        sources = {
+            'caller.py': 'def caller():\n    return callee() + common()\n',
+            'callee.py': 'def callee():\n    return 1\n',
+            'first.py': 'def common():\n    return 1\n',
+            'second.py': 'def common():\n    return 2\n',
+        }
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_paths = list()
+        for (name, source) in sources.items():
+            file_paths.append(os.path.join(directory, name))
+            with open(file_paths[-1], 'w') as file_:
+                file_.write(source)
+        lexer = lexers.get_lexer_by_name('python')
+
+        def path(name):
+            return os.path.join(directory, name)
+
+        # Act
+        graph = main.Components()
+        main.build_graph(file_paths, graph, lexer)
+        capped = main.Components()
+        main.build_graph(file_paths, capped, lexer, fanout=1)
+
+        # Assert
+        self.assertEqual(4, len(graph))
+        self.assertEqual(4, graph.largest())
+        self.assertEqual(4, len(capped))
+        self.assertEqual(2, capped.largest())
+        self.assertTrue(capped.connected(path('caller.py'), path('callee.py')))
+        self.assertFalse(capped.connected(path('first.py'), path('second.py')))
+
+    def test_build_graph_processes(self):
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_paths = list()
+        for i in range(main.CHUNKSIZE * 2):
+            file_paths.append(os.path.join(directory, 'f{0}.py'.format(i)))
+            with open(file_paths[-1], 'w') as file_:
+                file_.write(
+                    'def f{0}():\n    return f{1}()\n'.format(i, i // 2)
+                )
+        lexer = lexers.get_lexer_by_name('python')
+        expected = main.Components()
+        main.build_graph(file_paths, expected, lexer)
+
+        # Act
+        actual = main.Components()
+        main.build_graph(file_paths, actual, lexer, processes=2)
+
+        # Assert
+        self.assertEqual(len(expected), len(actual))
+        self.assertEqual(expected.largest(), actual.largest())
+        self.assertEqual(len(file_paths), actual.largest())
+
+    def test_build_graph_target(self):
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_paths = list()
+        for i in range(10):
+            file_paths.append(os.path.join(directory, 'f{0}.py'.format(i)))
+            with open(file_paths[-1], 'w') as file_:
+                file_.write(
+                    'def f{0}():\n    return f{1}()\n'.format(
+                        i, max(i - 1, 0)
+                    )
+                )
+        lexer = lexers.get_lexer_by_name('python')
+
+        # Act
+        graph = main.Components()
+        stopped = main.build_graph(file_paths, graph, lexer, target=5)
+        completed = main.build_graph(
+            file_paths, main.Components(), lexer, target=10
+        )
+
+        # Assert
+        self.assertEqual((True, True), stopped)
+        self.assertEqual((True, False), completed)
+        self.assertEqual(10, len(graph))
+        self.assertEqual(5, graph.largest())
+
+    def test_tokenize_cache(self):
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_paths = list()
+        sources = {
+            'first.py': 'def f():\n    return common()\n',
+            'second.py': 'def f():\n    return common()\n',
+            'third.py': 'def g():\n    return common()\n',
+        }
+        for (name, source) in sources.items():
+            file_paths.append(os.path.join(directory, name))
+            with open(file_paths[-1], 'w') as file_:
+                file_.write(source)
+        lexer = lexers.get_lexer_by_name('python')
+        expected = main.tokenize(file_paths, lexer)
+        symbol_cache = cache.SymbolCache(
+            os.path.join(directory, 'cache.sqlite'), 1024 * 1024
+        )
+        self.addCleanup(setattr, utilities, 'SYMBOL_CACHE', None)
+        utilities.SYMBOL_CACHE = symbol_cache
+
+        # Act
+        actual = main.tokenize(file_paths, lexer)
+        cached = main.tokenize(file_paths, lexer)
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertEqual(expected, cached)
+        # Test: Identical contents are cached once
+        self.assertEqual(
+            2, symbol_cache._execute('SELECT COUNT(*) FROM symbols')[0][0]
+        )
+
+    def test_get_connectedness(self):
+        # Arrange
+        graph = main.Components()
+        for key in 'abcde':
+            graph.add(key)
+        graph.union('a', 'b')
+        graph.union('c', 'b')
+        graph.union('d', 'e')
+
+        # Act
+        connectedness = main.get_connectedness(graph)
+
+        # Assert
+        self.assertEqual(3 / 5, connectedness)
+        self.assertEqual(0, main.get_connectedness(main.Components()))
+
 
 class MockCursor(object):
     def __init__(self, language):
@@ -83,3 +83,26 @@ class MainTestCase(unittest.TestCase):
         # Assert
         self.assertFalse(result)
         self.assertEqual(0, value)
+
+    def test_bulk_run(self):
+        # Arrange
+        project_ids = [10868464, 67, 18228981]
+        options = {
+            'threshold': 1,
+            'today': '2015-04-01'
+        }
+
+        # Act
+        try:
+            self.database.connect()
+            with self.database.cursor() as cursor:
+                expected = {
+                    project_id: main.run(project_id, '', cursor, **options)
+                    for project_id in project_ids
+                }
+                actual = main.bulk_run(cursor, project_ids, **options)
+        finally:
+            self.database.disconnect()
+
+        # Assert
+        self.assertEqual(expected, actual)
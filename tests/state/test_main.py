@@ -74,3 +74,23 @@ class MainTestCase(unittest.TestCase):
 
         # Assert
         self.assertEqual(expected, actual)
+
+    def test_bulk_run(self):
+        # Arrange
+        project_ids = [284, 66, 3235653]
+        options = {'threshold': '6m'}
+
+        # Act
+        try:
+            self.database.connect()
+            with self.database.cursor() as cursor:
+                expected = {
+                    project_id: main.run(project_id, '', cursor, **options)
+                    for project_id in project_ids
+                }
+                actual = main.bulk_run(cursor, project_ids, **options)
+        finally:
+            self.database.disconnect()
+
+        # Assert
+        self.assertEqual(expected, actual)
@@ -7,8 +7,12 @@ import pickle
 import tempfile
 import types
 import unittest
+from unittest import mock
 
+from lib import stats
+from lib import utilities
 from lib.attributes import Attributes
+from lib.cache import Cache
 from lib.database import Database
 
 
@@ -203,6 +207,34 @@ class AttributesTestCase(unittest.TestCase):
             finally:
                 attributes.database.disconnect()
 
+    def test_run_timeout_worker(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            project_id = 10868464
+            repository_path = directory
+            rawattributes = copy.deepcopy(self.rawattributes)
+            for attribute in rawattributes:
+                if 'architecture' in attribute['name']:
+                    attribute['options']['timeout'] = '1S'  # Sabotage
+            expected = (0, {'architecture': None})
+
+            # Act
+            attributes = Attributes(
+                rawattributes,
+                database=Database(self.rawsettings),
+                keystring='a',
+                backend='worker',
+                goptions=self.rawgoptions
+            )
+            try:
+                attributes.database.connect()
+                actual = attributes.run(project_id, repository_path)
+
+                # Assert
+                self.assertEqual(expected, actual)
+            finally:
+                attributes.database.disconnect()
+
     def test_score(self):
         # Global Arrange
         attributes = Attributes(
@@ -292,3 +324,48 @@ class AttributesTestCase(unittest.TestCase):
 
         # Assert
         self.assertTrue(attributes.requires_source)
+
+    def test_validate_dependencies(self):
+        # Arrange
+        attributes = Attributes(
+            self.rawattributes, database=None, keystring='u'
+        )
+
+        with mock.patch(
+            'distutils.spawn.find_executable', return_value=None
+        ):
+            # Act
+            with mock.patch.object(utilities, 'LOC_COUNTER', 'cloc'):
+                cloc = attributes._validate_dependencies()
+            with mock.patch.object(utilities, 'LOC_COUNTER', 'native'):
+                native = attributes._validate_dependencies()
+
+        # Assert
+        self.assertFalse(cloc)
+        self.assertTrue(native)
+
+    def test_get_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            attributes = Attributes(
+                self.rawattributes, database=None, keystring='al',
+                cache=Cache(os.path.join(directory, 'cache.sqlite'))
+            )
+            (architecture, license) = (
+                attributes.get('architecture'), attributes.get('license')
+            )
+            python = stats.Stats(*([None] * 4 + ['Python'] + [None] * 4))
+            java = python._replace(language='Java')
+            for attribute in [architecture, license]:
+                attributes._get_rresult(
+                    attribute, 1, 'sha', python, (True, 0.5)
+                )
+
+            # Act
+            cached = attributes._get_cached('sha', python)
+            other = attributes._get_cached('sha', java)
+
+            # Assert
+            self.assertEqual({'architecture': 0.5}, cached)
+            self.assertEqual(dict(), other)
+            self.assertFalse(attributes._is_cached(cached))
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from lib import budget
+from lib.budget import Budget
+
+
+class BudgetTestCase(unittest.TestCase):
+    def test_predict(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'budget.sqlite')
+            _budget = Budget(path)
+            for project_id in range(budget.MINIMUM_OBSERVATIONS):
+                _budget.record(
+                    'architecture', project_id,
+                    {'language': 'Python', 'commits': 10, 'bytes': 1000},
+                    None, 2.0, False
+                )
+            # Runtimes of projects that timed out count as lower bounds.
+            _budget.record(
+                'architecture', 99,
+                {'language': 'Python', 'commits': 10, 'bytes': 1000}, None,
+                20.0, True
+            )
+
+            # Act
+            _budget = Budget(path)
+            by_bytes = _budget.predict(
+                'architecture', {'language': 'Python', 'bytes': 5000}
+            )
+            by_commits = _budget.predict(
+                'architecture', {'language': 'Python', 'commits': 20}
+            )
+            other_language = _budget.predict(
+                'architecture', {'language': 'Java', 'commits': 20}
+            )
+            unknown = _budget.predict('history', {'commits': 20})
+
+            # Assert
+            self.assertAlmostEqual(25.0, by_bytes)
+            self.assertAlmostEqual(10.0, by_commits)
+            self.assertAlmostEqual(10.0, other_language)
+            self.assertIsNone(unknown)
+
+    def test_get_timeout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            _budget = Budget(os.path.join(directory, 'budget.sqlite'), 4)
+
+            # Act
+            unpredicted = _budget.get_timeout(None, 3600)
+            slack = _budget.get_timeout(100, 3600)
+            minimum = _budget.get_timeout(1, 3600)
+            maximum = _budget.get_timeout(10000, 3600)
+
+            # Assert
+            self.assertEqual(3600, unpredicted)
+            self.assertEqual(400, slack)
+            self.assertEqual(budget.MINIMUM_TIMEOUT, minimum)
+            self.assertEqual(3600, maximum)
+
+    def test_get_timeout_percentile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'budget.sqlite')
+            _budget = Budget(path, 4)
+            for project_id in range(20):
+                elapsed = 400.0 if project_id < 2 else 10.0
+                _budget.record(
+                    'architecture', project_id, {'bytes': 1000}, None,
+                    elapsed, False
+                )
+            _budget = Budget(path, 4)
+            features = {'bytes': 10000}
+
+            # Act
+            predicted = _budget.predict('architecture', features)
+            timeout = _budget.get_timeout(
+                predicted, 7200, 'architecture', features
+            )
+
+            # Assert
+            self.assertAlmostEqual(490.0, predicted)
+            self.assertAlmostEqual(4000.0, timeout)
+
+    def test_get_timeout_outlier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'budget.sqlite')
+            _budget = Budget(path, 4)
+            for project_id in range(20):
+                _budget.record(
+                    'architecture', project_id, {'bytes': 1000}, None, 2.0,
+                    False
+                )
+            # A very large project and one that timed out.
+            _budget.record(
+                'architecture', 20, {'bytes': 1000000}, None, 2000.0, False
+            )
+            _budget.record(
+                'architecture', 21, {'bytes': 1000}, None, 3600.0, True
+            )
+            _budget = Budget(path, 4)
+            features = {'bytes': 1000}
+
+            # Act
+            predicted = _budget.predict('architecture', features)
+            timeout = _budget.get_timeout(
+                predicted, 3600, 'architecture', features
+            )
+
+            # Assert
+            self.assertEqual(budget.MINIMUM_TIMEOUT, timeout)
@@ -0,0 +1,146 @@
+import os
+import pickle
+import subprocess
+import tempfile
+import unittest
+
+from lib import cache
+from lib import utilities
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = cache.Cache(
+            os.path.join(self.directory.name, 'cache.sqlite')
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_put(self):
+        # Arrange
+        options = {'threshold': 0.5, 'minimumFiles': 2}
+
+        # Act
+        before = self.cache.get('architecture', options, 'abc')
+        self.cache.put('architecture', options, 'abc', 0.75)
+        after = self.cache.get('architecture', options, 'abc')
+
+        # Assert
+        self.assertEqual((False, None), before)
+        self.assertEqual((True, 0.75), after)
+
+        # Test: Thresholds do not affect raw results
+        self.assertEqual(
+            (True, 0.75),
+            self.cache.get(
+                'architecture', {'threshold': 0.9, 'minimumFiles': 2}, 'abc'
+            )
+        )
+
+        # Test: Other options do
+        self.assertEqual(
+            (False, None),
+            self.cache.get(
+                'architecture', {'threshold': 0.5, 'minimumFiles': 3}, 'abc'
+            )
+        )
+
+        # Test: Cached None is distinguishable from a miss
+        self.cache.put('stars', {}, 'abc', None)
+        self.assertEqual((True, None), self.cache.get('stars', {}, 'abc'))
+
+    def test_snapshot(self):
+        # Act
+        self.cache.put_snapshot(10868464, '2020-06-01', 'abc')
+
+        # Assert
+        self.assertEqual(
+            'abc', self.cache.get_snapshot(10868464, '2020-06-01')
+        )
+        self.assertIsNone(self.cache.get_snapshot(10868464, '2020-07-01'))
+
+    def test_pickling(self):
+        # Arrange
+        self.cache.put('license', {}, 'abc', True)
+
+        # Act
+        unpickled = pickle.loads(pickle.dumps(self.cache))
+
+        # Assert
+        self.assertEqual((True, True), unpickled.get('license', {}, 'abc'))
+
+    def test_symbols(self):
+        # Arrange
+        symbol_cache = cache.SymbolCache(
+            os.path.join(self.directory.name, 'cache.sqlite'), 1024
+        )
+
+        # Act
+        symbol_cache.put('Python', {'abc': ({'f'}, {'g', 'h'})})
+        actual = symbol_cache.get('Python', ['abc', 'def'])
+
+        # Assert
+        self.assertEqual({'abc': ({'f'}, {'g', 'h'})}, actual)
+        self.assertEqual({}, symbol_cache.get('Ruby', ['abc']))
+
+    def test_symbols_eviction(self):
+        # Arrange
+        symbol_cache = cache.SymbolCache(
+            os.path.join(self.directory.name, 'cache.sqlite'), 1024
+        )
+        symbols = ({'f' * 100}, {'g' * 100})
+
+        # Act
+        for digest in ['a', 'b', 'c']:
+            symbol_cache.put('Python', {digest: symbols})
+        symbol_cache.get('Python', ['a'])
+        for digest in ['d', 'e', 'f']:
+            symbol_cache.put('Python', {digest: symbols})
+
+        # Assert
+        actual = symbol_cache.get('Python', ['a', 'b', 'c', 'd', 'e', 'f'])
+        self.assertIn('a', actual)
+        self.assertIn('f', actual)
+        self.assertNotIn('b', actual)
+        self.assertEqual(4, len(actual))
+        self.assertEqual(
+            symbol_cache.size,
+            symbol_cache._execute('SELECT SUM(size) FROM symbols')[0][0]
+        )
+
+    def test_symbols_size(self):
+        # Arrange
+        symbol_cache = cache.SymbolCache(
+            os.path.join(self.directory.name, 'cache.sqlite'), 1024
+        )
+
+        # Act
+        symbol_cache.put('Python', {'a': ({'f'}, set())})
+        symbol_cache.put('Python', {'a': ({'f', 'g'}, set())})
+        symbol_cache.put('Ruby', {'a': (set(), set())})
+
+        # Assert
+        self.assertEqual(
+            len('[["f", "g"], []]') + len('[[], []]'), symbol_cache.size
+        )
+
+    def test_get_tree_sha(self):
+        # Arrange
+        path = os.path.join(self.directory.name, 'repository')
+        os.mkdir(path)
+        with open(os.path.join(path, 'README'), 'w') as file_:
+            file_.write('reaper\n')
+        for command in [
+            'git init -q', 'git add README',
+            'git -c user.name=a -c user.email=a@b commit -q -m initial'
+        ]:
+            subprocess.check_call(command, cwd=path, shell=True)
+        expected = subprocess.check_output(
+            'git rev-parse HEAD^{tree}', cwd=path, shell=True
+        ).decode().strip()
+
+        # Assert
+        self.assertEqual(expected, utilities.get_tree_sha(path))
+        self.assertIsNone(utilities.get_tree_sha(self.directory.name))
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from lib.checkouts import Checkouts
+
+
+class CheckoutsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.checkouts = Checkouts(
+            self.root, os.path.join(self.root, '.checkouts.json'), 100
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def clone(self, project_id, size):
+        path = os.path.join(self.root, str(project_id), 'name')
+        os.makedirs(path)
+        with open(os.path.join(path, 'file'), 'wb') as file_:
+            file_.write(b'\0' * size)
+
+    def test_acquire(self):
+        # Act
+        self.checkouts.acquire(1)
+        self.clone(1, 40)
+        self.checkouts.release(1)
+        self.checkouts.acquire(1)
+
+        # Assert
+        self.assertEqual(40, self.checkouts.size)
+        self.assertTrue(os.path.exists(os.path.join(self.root, '1')))
+
+    def test_acquire_evict(self):
+        # Arrange
+        self.checkouts.quota = 130
+        for project_id in [1, 2, 3]:
+            self.checkouts.acquire(project_id)
+            self.clone(project_id, 40)
+            self.checkouts.release(project_id)
+        self.checkouts.acquire(1)
+        self.checkouts.release(1)
+
+        # Act
+        self.checkouts.acquire(4)
+
+        # Assert
+        self.assertTrue(os.path.exists(os.path.join(self.root, '1')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, '2')))
+        self.assertTrue(os.path.exists(os.path.join(self.root, '3')))
+        self.assertEqual(120, self.checkouts.size)
+
+    def test_acquire_in_use(self):
+        # Arrange
+        for project_id in [1, 2]:
+            self.checkouts.acquire(project_id)
+            self.clone(project_id, 40)
+            self.checkouts.release(project_id)
+        self.checkouts.acquire(1)
+        checkouts = self.checkouts._load()
+
+        # Act
+        fits = self.checkouts._make_space(checkouts, '3', 80)
+
+        # Assert
+        self.assertFalse(fits)
+        self.assertTrue(os.path.exists(os.path.join(self.root, '1')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, '2')))
+
+    def test_acquire_other_run(self):
+        # Arrange
+        for project_id in [1, 2]:
+            self.checkouts.acquire(project_id)
+            self.clone(project_id, 40)
+            self.checkouts.release(project_id)
+        self.checkouts.acquire(1)
+        # The process identifier is alive but was recorded by an earlier run.
+        self.checkouts.run = 'other'
+        checkouts = self.checkouts._load()
+
+        # Act
+        fits = self.checkouts._make_space(checkouts, '3', 80)
+
+        # Assert
+        self.assertTrue(fits)
+        self.assertFalse(os.path.exists(os.path.join(self.root, '1')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, '2')))
+
+    def test_release_failed(self):
+        # Arrange
+        self.checkouts.acquire(1)
+
+        # Act
+        self.checkouts.release(1)
+        self.checkouts.release(2)
+
+        # Assert
+        self.assertEqual(0, self.checkouts.size)
+
+    def test_adopt(self):
+        # Arrange
+        self.clone(1, 40)
+        self.clone(2, 30)
+
+        # Act
+        size = self.checkouts.size
+
+        # Assert
+        self.assertEqual(70, size)
@@ -2,6 +2,7 @@ import json
 import os
 import pickle
 import unittest
+from unittest import mock
 
 import mysql.connector as mysql
 from lib import database
@@ -112,3 +113,105 @@ class DatabaseTestCase(unittest.TestCase):
     def tearDown(self):
         if self.database:
             self.database.disconnect()
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            database.mysql, 'connect', side_effect=MockConnection
+        )
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = database.ConnectionPool({'host': 'localhost'}, size=1)
+
+    def test_acquire_release(self):
+        # Act
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        reused = self.pool.acquire()
+
+        # Assert
+        self.assertIs(connection, reused)
+        self.assertEqual(1, self.connect.call_count)
+
+    def test_acquire_unhealthy(self):
+        # Arrange
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        connection.healthy = False
+
+        # Act
+        replacement = self.pool.acquire()
+
+        # Assert
+        self.assertIsNot(connection, replacement)
+        self.assertFalse(connection.connected)
+
+    def test_pickling_connected(self):
+        # Arrange
+        _database = database.Database({'host': 'localhost'})
+        connection = mock.Mock(spec=mysql.connection.MySQLConnection)
+        (_database._connection, _database._pid) = (connection, os.getpid())
+
+        # Act
+        pickled = pickle.dumps(_database)
+
+        # Assert
+        self.assertIs(connection, _database._connection)
+        self.assertNotIn(b'Mock', pickled)
+        connection.disconnect.assert_not_called()
+
+    def test_discard(self):
+        # Arrange
+        connection = self.pool.acquire()
+
+        # Act
+        self.pool.discard(connection)
+        replacement = self.pool.acquire()
+
+        # Assert
+        self.assertIsNot(connection, replacement)
+        self.assertFalse(connection.connected)
+
+    def test_release_full(self):
+        # Arrange
+        (first, second) = (self.pool.acquire(), self.pool.acquire())
+
+        # Act
+        self.pool.release(first)
+        self.pool.release(second)
+
+        # Assert
+        self.assertTrue(first.connected)
+        self.assertFalse(second.connected)
+
+    def test_get_pool(self):
+        # Arrange
+        settings = {'host': 'localhost', 'autocommit': True}
+
+        # Assert
+        self.assertIs(
+            database.get_pool(settings), database.get_pool(dict(settings))
+        )
+        self.assertIsNot(
+            database.get_pool(settings),
+            database.get_pool({'host': 'example.com'})
+        )
+
+
+class MockConnection(object):
+    def __init__(self, **settings):
+        self.healthy = True
+        self.connected = True
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        if not self.healthy:
+            if not reconnect:
+                raise mysql.Error('Lost connection')
+            self.healthy = True
+
+    def is_connected(self):
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
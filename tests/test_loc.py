@@ -0,0 +1,112 @@
+import os
+import unittest
+
+from lib import loc
+from tests import ASSETS_PATH
+
+
+class LocTestCase(unittest.TestCase):
+    def test_count(self):
+        # Test: C style comments
+        contents = (
+            'int a; /* trailing */\n'
+            '\n'
+            '/*\n'
+            ' * Block\n'
+            ' */\n'
+            'char *b = "/* not a comment */";  // trailing\n'
+            '// comment\n'
+        )
+        self.assertEqual((2, 4), loc.count(contents, 'C'))
+
+        # Test: Python docstrings are comments
+        contents = (
+            'def projekt():\n'
+            '    """Docstring\n'
+            '    spanning lines.\n'
+            '    """\n'
+            '    return \'#\'  # trailing\n'
+        )
+        self.assertEqual((2, 3), loc.count(contents, 'Python'))
+
+        # Test: Ruby embedded documentation
+        contents = '=begin\ndocumentation\n=end\nputs 1\n'
+        self.assertEqual((1, 3), loc.count(contents, 'Ruby'))
+
+    def test_get_loc(self):
+        path = os.path.join(ASSETS_PATH, 'projekt')
+
+        # Test: Get SLOC of source at ./assets/projekt
+        expected = {
+            'C':  {'cloc': 4, 'sloc': 6},
+            'C/C++ Header': {'cloc': 0, 'sloc': 4},
+            'JavaScript': {'cloc': 1, 'sloc': 13},
+            'Python': {'cloc': 1, 'sloc': 2}
+        }
+        self.assertEqual(expected, loc.get_loc(path))
+
+        # Test: Get SLOC of only the directories 'include' and 'utilities'
+        expected = {
+            'C/C++ Header': {'cloc': 0, 'sloc': 4},
+            'JavaScript': {'cloc': 1, 'sloc': 10},
+        }
+        self.assertEqual(
+            expected,
+            loc.get_loc(
+                path, files=['include/projekt.h', 'utilities/projekt.js']
+            )
+        )
+
+    def test_get_loc_by_file(self):
+        # Arrange
+        path = os.path.join(ASSETS_PATH, 'projekt')
+        expected = {
+            'include/projekt.h': ('C/C++ Header', 4, 0),
+            'projekt.c': ('C', 6, 4),
+            'projekt.js': ('JavaScript', 3, 0),
+            'projekt.py': ('Python', 2, 1),
+            'utilities/projekt.js': ('JavaScript', 10, 1),
+        }
+
+        # Act
+        actual = loc.get_loc_by_file(path)
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_summarize(self):
+        # Arrange
+        table = {
+            'a.c': ('C', 6, 4),
+            'b.c': ('C', 1, 1),
+            'a.h': ('C/C++ Header', 4, 0),
+        }
+
+        # Assert
+        self.assertEqual(
+            {
+                'C': {'cloc': 5, 'sloc': 7},
+                'C/C++ Header': {'cloc': 0, 'sloc': 4}
+            },
+            loc.summarize(table)
+        )
+        self.assertEqual(
+            {'C': {'cloc': 1, 'sloc': 1}},
+            loc.summarize(table, files=['b.c', 'missing.c'])
+        )
+
+    def test_get_loc_processes(self):
+        # Arrange
+        path = os.path.join(ASSETS_PATH, 'projekt')
+        expected = loc.get_loc(path)
+        chunksize = loc.CHUNKSIZE
+        loc.CHUNKSIZE = 1
+
+        # Act
+        try:
+            actual = loc.get_loc(path, processes=2)
+        finally:
+            loc.CHUNKSIZE = chunksize
+
+        # Assert
+        self.assertEqual(expected, actual)
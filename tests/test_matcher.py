@@ -0,0 +1,68 @@
+import unittest
+
+from lib.matcher import Matcher
+
+
+class MatcherTestCase(unittest.TestCase):
+    def test_match(self):
+        # Arrange
+        matcher = Matcher(['#include <stdio.h>', 'prokekt', 'main'])
+        contents = b'#include <stdio.h>\nvoid main()\n{\n  prokekt(4);\n}\n'
+
+        # Act
+        actual = matcher.match(contents)
+
+        # Assert
+        self.assertEqual({'#include <stdio.h>', 'prokekt', 'main'}, actual)
+        self.assertEqual(set(), matcher.match(b'int foo(void);\n'))
+
+    def test_match_overlapping(self):
+        # Arrange
+        matcher = Matcher(['import unittest', '(from|import)\\s(unittest)'])
+
+        # Act
+        actual = matcher.match(b'import unittest\n')
+
+        # Assert
+        self.assertEqual(2, len(actual))
+
+    def test_match_whole(self):
+        # Arrange
+        matcher = Matcher(['XCTest'], whole=True)
+
+        # Assert
+        self.assertEqual({'XCTest'}, matcher.match(b'import XCTest\n'))
+        self.assertEqual(set(), matcher.match(b'import XCTestCase\n'))
+
+    def test_match_ignorecase(self):
+        # Arrange
+        matcher = Matcher(['GNU GENERAL PUBLIC LICENSE'], ignorecase=True)
+
+        # Assert
+        self.assertEqual(1, len(matcher.match(b'GNU General Public License')))
+
+    def test_match_line(self):
+        # Arrange
+        matcher = Matcher(['(describe\\()(.*),(.*)\\(\\)'])
+
+        # Assert
+        self.assertEqual(0, len(matcher.match(b'describe(a\n, function()')))
+        self.assertEqual(1, len(matcher.match(b'describe(a, function()')))
+
+    def test_match_groups(self):
+        # Arrange
+        matcher = Matcher([
+            '(a)\\1', '(?P<quote>[\'"]).*(?P=quote)', '(?P<b>b)', '(c)'
+        ])
+
+        # Act
+        actual = matcher.match(b'aa "x" b c\n')
+
+        # Assert
+        self.assertEqual(4, len(actual))
+        self.assertEqual({'(c)'}, matcher.match(b'a "x\' c\n'))
+
+    def test_empty(self):
+        # Assert
+        self.assertRaises(Exception, Matcher, [])
+        self.assertRaises(Exception, Matcher, [''])
@@ -0,0 +1,92 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from lib import metrics
+
+
+class MetricsTestCase(unittest.TestCase):
+    def test_timed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'metrics.jsonl')
+
+            @metrics.timed('stage')
+            def function(value):
+                return value
+
+            # Act
+            with mock.patch.object(metrics, 'PATH', path):
+                with metrics.project(1):
+                    actual = function(2)
+                metrics.record('other', 3.0, project_id=4)
+            summary = metrics.summarize(path)
+
+            # Assert
+            self.assertEqual(2, actual)
+            self.assertEqual(1, summary['stage']['count'])
+            self.assertEqual(3.0, summary['other']['p50'])
+
+    def test_project_thread(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'metrics.jsonl')
+            thread = threading.Thread(
+                target=metrics.record, args=('thread', 1.0)
+            )
+
+            # Act
+            with mock.patch.object(metrics, 'PATH', path):
+                with metrics.project(1):
+                    thread.start()
+                    thread.join()
+                    metrics.record('main', 2.0)
+                metrics.record('after', 3.0)
+            with open(path, 'r') as file_:
+                timings = [json.loads(line) for line in file_]
+
+            # Assert
+            self.assertEqual(
+                {'thread': None, 'main': 1, 'after': None},
+                {t['stage']: t['project_id'] for t in timings}
+            )
+
+    def test_timed_disabled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'metrics.jsonl')
+
+            # Act
+            with mock.patch.object(metrics, 'PATH', None):
+                with metrics.timer('stage'):
+                    pass
+
+            # Assert
+            self.assertFalse(os.path.exists(path))
+
+    def test_summarize(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'metrics.jsonl')
+            with mock.patch.object(metrics, 'PATH', path):
+                for elapsed in range(1, 101):
+                    metrics.record('stage', float(elapsed))
+            with open(path, 'a') as file_:
+                file_.write('{"stage": "sta')    # Partially written
+            stream = io.StringIO()
+
+            # Act
+            summary = metrics.summarize(path)
+            metrics.report(path, stream)
+
+            # Assert
+            self.assertEqual(100, summary['stage']['count'])
+            self.assertEqual(5050.0, summary['stage']['total'])
+            self.assertEqual(50.0, summary['stage']['p50'])
+            self.assertEqual(95.0, summary['stage']['p95'])
+            self.assertEqual(99.0, summary['stage']['p99'])
+            self.assertIn('stage', stream.getvalue())
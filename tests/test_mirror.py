@@ -0,0 +1,100 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+from lib import scanner
+from lib import utilities
+from lib.mirror import Mirror
+
+
+def git(command, cwd):
+    return subprocess.check_output(
+        command, cwd=cwd, shell=True, stderr=subprocess.DEVNULL
+    ).decode().strip()
+
+
+class MirrorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.origin = os.path.join(self.directory.name, 'owner', 'name')
+        os.makedirs(self.origin)
+        git('git init', self.origin)
+        git('git config user.email reaper@example.com', self.origin)
+        git('git config user.name reaper', self.origin)
+        for (index, date) in enumerate(['2015-01-15', '2015-02-15']):
+            self.commit('file{0}'.format(index), date)
+
+        self.mirror = Mirror(
+            os.path.join(self.directory.name, 'mirrors'),
+            url=os.path.join(self.directory.name, '{0}', '{1}')
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def commit(self, fname, date):
+        with open(os.path.join(self.origin, fname), 'w') as file_:
+            file_.write(fname)
+        git('git add .', self.origin)
+        git(
+            'GIT_AUTHOR_DATE="{0} 12:00:00" GIT_COMMITTER_DATE="{0} 12:00:00"'
+            ' git commit -m {1}'.format(date, fname),
+            self.origin
+        )
+
+    def test_checkout(self):
+        # Arrange
+        directory = os.path.join(self.directory.name, '1')
+        os.mkdir(directory)
+        expected = git('git rev-parse HEAD~1^{tree}', self.origin)
+
+        # Act
+        path = self.mirror.checkout(
+            'owner', 'name', directory, '2015-01-31 23:59:59'
+        )
+
+        # Assert
+        self.assertEqual(os.path.join(directory, 'name'), path)
+        self.assertEqual(expected, utilities.get_tree_sha(path))
+        self.assertEqual(['file0'], sorted(
+            entry for entry in os.listdir(path) if entry != '.git'
+        ))
+
+    def test_checkout_update(self):
+        # Arrange
+        first = os.path.join(self.directory.name, '1')
+        second = os.path.join(self.directory.name, '2')
+        os.mkdir(first)
+        os.mkdir(second)
+        self.mirror.checkout('owner', 'name', first)
+        self.commit('file2', '2015-03-15')
+
+        # Act
+        path = self.mirror.checkout('owner', 'name', second)
+
+        # Assert
+        self.assertTrue(os.path.exists(os.path.join(path, 'file2')))
+        self.assertFalse(
+            os.path.exists(os.path.join(first, 'name', 'file2'))
+        )
+
+    def test_reference(self):
+        # Arrange
+        directory = os.path.join(self.directory.name, '1')
+        os.mkdir(directory)
+        expected = git('git rev-parse HEAD~1^{tree}', self.origin)
+
+        # Act
+        path = self.mirror.reference(
+            'owner', 'name', directory, '2015-01-31 23:59:59'
+        )
+
+        # Assert
+        self.assertEqual(os.path.join(directory, 'name'), path)
+        self.assertEqual([scanner.TREE_FILE], os.listdir(path))
+        self.assertEqual(expected, utilities.get_tree_sha(path))
+        self.assertEqual(
+            ['file0'], [entry.path for entry in scanner.scan(path).entries]
+        )
+        scanner.forget(path)
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from lib import pipeline
+
+
+class PipelineTestCase(unittest.TestCase):
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            stages = [
+                pipeline.Stage(double, 2),
+                pipeline.Stage(increment, 3),
+                pipeline.Stage(Writer(directory), 1),
+            ]
+            items = list(range(20))
+            expected = sorted(item * 2 + 1 for item in items)
+
+            # Act
+            pipeline.Pipeline(stages, capacity=2).run(items)
+
+            # Assert
+            actual = sorted(int(name) for name in os.listdir(directory))
+            self.assertEqual(expected, actual)
+
+    def test_run_failure(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            stages = [
+                pipeline.Stage(invert, 2),
+                pipeline.Stage(Writer(directory), 1),
+            ]
+
+            # Act
+            pipeline.Pipeline(stages, capacity=1).run([0, 1, 2, 4])
+
+            # Assert
+            self.assertCountEqual(
+                ['1.0', '0.5', '0.25'], os.listdir(directory)
+            )
+
+
+class Writer(object):
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, item):
+        open(os.path.join(self.directory, str(item)), 'w').close()
+
+
+def double(item):
+    return item * 2
+
+
+def increment(item):
+    return item + 1
+
+
+def invert(item):
+    return 1 / item
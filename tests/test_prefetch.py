@@ -0,0 +1,175 @@
+import os
+import signal
+import subprocess
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from lib import cache
+from lib import prefetch
+from lib import utilities
+from lib.run import Run
+
+
+def git(command, cwd):
+    return subprocess.check_output(
+        command, cwd=cwd, shell=True, stderr=subprocess.DEVNULL
+    ).decode().strip()
+
+
+class MockAttributes(object):
+    """Attributes locating projects through the snapshots of a cache."""
+    def __init__(self, cache):
+        self.cache = cache
+
+    def estimate(self, project_ids):
+        return dict()
+
+    def bulk_run(self, project_ids):
+        return dict()
+
+    def locate(self, project_ids):
+        for project_id in project_ids:
+            self.cache.get_snapshot(project_id, '2020-01-01')
+        return dict()
+
+
+class PrefetcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.origin = os.path.join(self.directory.name, 'origin')
+        os.mkdir(self.origin)
+        git('git init', self.origin)
+        git('git config user.email reaper@example.com', self.origin)
+        git('git config user.name reaper', self.origin)
+        with open(os.path.join(self.origin, 'README'), 'w') as file_:
+            file_.write('README')
+        git('git add . && git commit -m README', self.origin)
+
+        self.root = os.path.join(self.directory.name, 'repositories')
+        os.mkdir(self.root)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def clone(self, owner, name, directory, date=None, mode=None, git=None):
+        # Stands in for utilities.clone(), cloning the local origin with the
+        #   git runner of the prefetcher.
+        git('git clone {0} {1}'.format(self.origin, name), directory)
+        return os.path.join(directory, name)
+
+    def test_prefetch(self):
+        # Arrange
+        prefetcher = prefetch.Prefetcher(self.root, lookahead=3)
+        items = [
+            ((1, dict()), ('owner', 'one', None)),
+            ((2, dict()), None),
+            ((3, dict()), ('owner', 'three', None)),
+        ]
+
+        # Act
+        tasks = list()
+        with mock.patch.object(utilities, 'clone', side_effect=self.clone):
+            for task in prefetcher.prefetch(items):
+                tasks.append(task)
+                prefetcher.release()
+
+        # Assert
+        self.assertCountEqual([1, 2, 3], [task[0] for task in tasks])
+        self.assertTrue(
+            os.path.exists(os.path.join(self.root, '1', 'one', 'README'))
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.root, '2')))
+        self.assertTrue(
+            os.path.exists(os.path.join(self.root, '3', 'three', 'README'))
+        )
+
+    def test_prefetch_lookahead(self):
+        # Arrange
+        prefetcher = prefetch.Prefetcher(self.root, lookahead=1)
+        items = [
+            ((1, dict()), ('owner', 'one', None)),
+            ((2, dict()), ('owner', 'two', None)),
+        ]
+
+        # Act
+        with mock.patch.object(utilities, 'clone', side_effect=self.clone):
+            tasks = prefetcher.prefetch(items)
+            first = next(tasks)
+            time.sleep(0.5)
+            cloned = os.path.exists(os.path.join(self.root, '2'))
+            prefetcher.release()
+            second = next(tasks)
+            prefetcher.release()
+            self.assertRaises(StopIteration, next, tasks)
+
+        # Assert
+        self.assertEqual(1, first[0])
+        self.assertFalse(cloned)
+        self.assertEqual(2, second[0])
+
+    def test_prefetch_failed(self):
+        # Arrange
+        prefetcher = prefetch.Prefetcher(self.root, bandwidth=1024 * 1024)
+        items = [((1, dict()), ('owner', 'one', None))]
+
+        def clone(owner, name, directory, date=None, mode=None, git=None):
+            git(
+                'git clone {0}.missing {1}'.format(self.origin, name),
+                directory
+            )
+
+        # Act
+        with mock.patch.object(utilities, 'clone', side_effect=clone):
+            with mock.patch('sys.stderr'):
+                tasks = list(prefetcher.prefetch(items))
+
+        # Assert
+        self.assertEqual([(1, dict())], tasks)
+        self.assertFalse(os.path.exists(os.path.join(self.root, '1')))
+
+    def test_prefetch_throttled(self):
+        # Arrange
+        prefetcher = prefetch.Prefetcher(self.root, bandwidth=100 * 1000)
+        items = [((1, dict()), ('owner', 'one', None))]
+
+        def clone(owner, name, directory, date=None, mode=None, git=None):
+            # Downloads more than the burst allowed, then keeps running
+            #   until the throttle catches up with it.
+            git(
+                'mkdir -p {0}/.git/objects && head -c 300000 /dev/urandom '
+                '> {0}/.git/objects/pack && sleep 1'.format(name),
+                directory
+            )
+
+        # Act
+        with mock.patch.object(utilities, 'clone', side_effect=clone):
+            with mock.patch('os.killpg', wraps=os.killpg) as killpg:
+                tasks = list(prefetcher.prefetch(items))
+
+        # Assert
+        self.assertEqual([(1, dict())], tasks)
+        calls = [args for (args, _) in killpg.call_args_list]
+        self.assertEqual(signal.SIGSTOP, calls[0][1])
+        self.assertEqual(signal.SIGCONT, calls[1][1])
+        self.assertEqual(calls[0][0], calls[1][0])
+
+    def test_prefetch_cache(self):
+        # Arrange
+        _cache = cache.Cache(os.path.join(self.directory.name, 'cache'))
+        _cache.put_snapshot(1, '2020-01-01', 'abc')
+        prefetcher = prefetch.Prefetcher(self.root, lookahead=2)
+        run = Run(
+            self.root, MockAttributes(_cache), None, 0, 1, bulk_size=3,
+            prefetcher=prefetcher
+        )
+
+        # Act
+        tasks = list()
+        for task in run._tasks(range(60), prefetch=True):
+            tasks.append(task)
+            prefetcher.release()
+
+        # Assert
+        self.assertCountEqual(range(60), [task[0] for task in tasks])
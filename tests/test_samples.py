@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from lib.samples import Checkpoint, Samples
+
+
+class SamplesTestCase(unittest.TestCase):
+    def test_iter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            path = os.path.join(directory, 'samples')
+            with open(path, 'w') as file_:
+                file_.write('1\n2\n\n3\n')
+            samples = Samples(path, exclude={2})
+
+            # Act
+            first = list(samples)
+            second = list(samples)
+
+            # Assert
+            self.assertEqual([1, 3], first)
+            self.assertEqual(first, second)
+
+
+class CheckpointTestCase(unittest.TestCase):
+    def test_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            checkpoint = Checkpoint(os.path.join(directory, 'checkpoint'))
+
+            # Act
+            empty = checkpoint.load()
+            checkpoint.record([1, 2])
+            checkpoint.record([3])
+            checkpoint.record([])
+            actual = Checkpoint(checkpoint.path).load()
+
+            # Assert
+            self.assertEqual(set(), empty)
+            self.assertEqual({1, 2, 3}, actual)
+
+    def test_reset(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            checkpoint = Checkpoint(os.path.join(directory, 'checkpoint'))
+            checkpoint.record([1])
+
+            # Act
+            checkpoint.reset()
+            checkpoint.reset()
+
+            # Assert
+            self.assertEqual(set(), checkpoint.load())
+
+    def test_load_truncated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            checkpoint = Checkpoint(os.path.join(directory, 'checkpoint'))
+            with open(checkpoint.path, 'w') as file_:
+                file_.write('1\n2\n12')    # Partially written
+
+            # Act
+            actual = checkpoint.load()
+            checkpoint.record([345])
+
+            # Assert
+            self.assertEqual({1, 2}, actual)
+            self.assertEqual({1, 2, 345}, checkpoint.load())
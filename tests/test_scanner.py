@@ -0,0 +1,260 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from lib import scanner
+from lib import utilities
+from lib.scanner import Index
+from tests import ASSETS_PATH
+
+
+class ScannerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(ASSETS_PATH, 'projekt')
+
+    def tearDown(self):
+        scanner.forget(self.path)
+
+    def test_scan(self):
+        # Arrange
+        expected = {
+            'include/projekt.h': 'C/C++ Header',
+            'projekt.c': 'C',
+            'projekt.js': 'JavaScript',
+            'projekt.py': 'Python',
+            'utilities/projekt.js': 'JavaScript',
+        }
+
+        # Act
+        index = scanner.scan(self.path)
+
+        # Assert
+        actual = {
+            entry.path: entry.language
+            for entry in index.entries if entry.language is not None
+        }
+        self.assertEqual(expected, actual)
+        self.assertIs(index, scanner.scan(self.path))
+
+    def test_scan_invalid(self):
+        # Assert
+        self.assertRaises(Exception, scanner.scan, '/home/nocturnal')
+        self.assertRaises(Exception, scanner.scan, '/bin/bash')
+
+    def test_select(self):
+        # Arrange
+        index = scanner.scan(self.path)
+
+        # Act
+        by_include = index.select(include=['*.js'])
+        by_type = index.select(types=['cc'])
+        by_directory = index.select(include=['*.js'], under='utilities')
+
+        # Assert
+        self.assertCountEqual(
+            ['projekt.js', 'utilities/projekt.js'],
+            [entry.path for entry in by_include]
+        )
+        self.assertCountEqual(
+            ['projekt.c', 'include/projekt.h'],
+            [entry.path for entry in by_type]
+        )
+        self.assertCountEqual(
+            ['utilities/projekt.js'], [entry.path for entry in by_directory]
+        )
+
+    def test_select_types(self):
+        # Arrange
+        index = scanner.Index(self.path)
+        index.entries = [
+            scanner.Entry(path, 0)
+            for path in ['main.rs', 'Main.hs', 'app.ts', 'init.lua', 'a.kt']
+        ]
+
+        # Act
+        actual = {
+            type_: [entry.path for entry in index.select(types=[type_])]
+            for type_ in ['rust', 'haskell', 'typescript', 'lua', 'kotlin']
+        }
+
+        # Assert
+        self.assertEqual(
+            {
+                'rust': ['main.rs'], 'haskell': ['Main.hs'],
+                'typescript': ['app.ts'], 'lua': ['init.lua'],
+                'kotlin': ['a.kt']
+            },
+            actual
+        )
+
+    def test_read(self):
+        # Arrange
+        index = scanner.scan(self.path).preload()
+        path = os.path.join(self.path, 'projekt.py')
+        with open(path, 'rb') as file_:
+            expected = file_.read()
+
+        # Act
+        actual = scanner.read(path)
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertIn('projekt.py', index._contents)
+
+    def test_preload_retained(self):
+        # Arrange
+        maximum = scanner.MAXIMUM_RETAINED_SIZE
+        scanner.MAXIMUM_RETAINED_SIZE = 1
+        path = os.path.join(self.path, 'projekt.py')
+        with open(path, 'rb') as file_:
+            expected = file_.read()
+
+        # Act
+        try:
+            index = scanner.scan(self.path).preload()
+            actual = scanner.read(path)
+        finally:
+            scanner.MAXIMUM_RETAINED_SIZE = maximum
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertEqual(dict(), index._contents)
+
+    def test_lookup(self):
+        # Arrange
+        index = scanner.scan(self.path)
+
+        # Act
+        (actual, under) = scanner.lookup(os.path.join(self.path, 'include'))
+
+        # Assert
+        self.assertIs(index, actual)
+        self.assertEqual('include', under)
+
+    def test_find_directory(self):
+        # Arrange
+        index = scanner.scan(self.path)
+
+        # Assert
+        self.assertEqual('utilities', index.find_directory(['utilities']))
+        self.assertIsNone(index.find_directory(['test', 'tests', 'spec']))
+
+
+class TreeIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.repository = os.path.join(self.directory.name, 'repository')
+        shutil.copytree(os.path.join(ASSETS_PATH, 'projekt'), self.repository)
+        for command in [
+                'git init', 'git config user.email reaper@example.com',
+                'git config user.name reaper', 'git add .',
+                'git commit -m projekt'
+        ]:
+            subprocess.check_call(
+                command, cwd=self.repository, shell=True,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        commit = subprocess.check_output(
+            'git rev-parse HEAD', cwd=self.repository, shell=True
+        ).decode().strip()
+
+        self.path = os.path.join(self.directory.name, 'tree')
+        scanner.reference(self.path, self.repository, commit)
+
+    def tearDown(self):
+        scanner.forget(self.path)
+        scanner.forget(self.repository)
+        self.directory.cleanup()
+
+    def test_scan(self):
+        # Arrange
+        expected = Index(self.repository).walk()
+
+        # Act
+        index = scanner.scan(self.path)
+
+        # Assert
+        self.assertIsInstance(index, scanner.TreeIndex)
+        self.assertCountEqual(
+            [(e.path, e.size) for e in expected.entries],
+            [(e.path, e.size) for e in index.entries]
+        )
+        self.assertEqual(
+            sorted((r, sorted(d)) for (r, d) in expected.directories),
+            sorted(index.directories)
+        )
+        self.assertEqual(
+            expected.find_directory(['utilities']),
+            index.find_directory(['utilities'])
+        )
+
+    def test_read(self):
+        # Arrange
+        index = scanner.scan(self.path)
+        with open(os.path.join(self.repository, 'projekt.py'), 'rb') as file_:
+            expected = file_.read()
+
+        # Act
+        actual = scanner.read(os.path.join(self.path, 'projekt.py'))
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertIsNone(index.read('missing.py'))
+
+    def test_preload(self):
+        # Act
+        index = scanner.scan(self.path).preload()
+
+        # Assert
+        for entry in index.entries:
+            if entry.language is None:
+                continue
+            path = os.path.join(self.repository, entry.path)
+            with open(path, 'rb') as file_:
+                self.assertEqual(file_.read(), index._contents[entry.path])
+
+    def test_getsize(self):
+        # Assert
+        self.assertEqual(
+            os.path.getsize(os.path.join(self.repository, 'projekt.c')),
+            scanner.getsize(os.path.join(self.path, 'projekt.c'))
+        )
+        self.assertIsNone(
+            scanner.getsize(os.path.join(self.path, '.travis.yml'))
+        )
+        self.assertTrue(scanner.isdir(os.path.join(self.path, 'include')))
+        self.assertFalse(scanner.isdir(os.path.join(self.path, 'projekt.c')))
+
+    def test_utilities(self):
+        # Arrange
+        loc_counter = utilities.LOC_COUNTER
+        utilities.LOC_COUNTER = 'native'
+        try:
+            expected = utilities.get_loc(self.repository)
+            expected_files = utilities.search('projekt', self.repository)
+        finally:
+            utilities.LOC_COUNTER = loc_counter
+            utilities.forget(self.repository)
+
+        # Act
+        actual = utilities.get_loc(self.path)
+        actual_files = utilities.search('projekt', self.path)
+        utilities.forget(self.path)
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertCountEqual(expected_files, actual_files)
+        self.assertEqual(
+            [os.path.join(self.path, 'utilities', 'projekt.js')],
+            utilities.get_files(
+                os.path.join(self.path, 'utilities'), 'JavaScript'
+            )
+        )
+        self.assertEqual(
+            subprocess.check_output(
+                'git rev-parse HEAD^{tree}', cwd=self.repository, shell=True
+            ).decode().strip(),
+            utilities.get_tree_sha(self.path)
+        )
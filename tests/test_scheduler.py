@@ -0,0 +1,38 @@
+import time
+import unittest
+
+from lib import scheduler
+
+
+class SchedulerTestCase(unittest.TestCase):
+    def test_wait(self):
+        # Arrange
+        jobs = [
+            ('fast', MockJob(0.1, (True, 1)), 1),
+            ('slow', MockJob(10, (True, 2)), 0.5),
+            ('failed', MockJob(0.1, None), 1),
+        ]
+        expected = {'fast': (True, 1), 'slow': None, 'failed': None}
+
+        # Act
+        started = time.monotonic()
+        actual = scheduler.wait(jobs, started)
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertLess(time.monotonic() - started, 1)
+
+
+class MockJob(object):
+    def __init__(self, duration, result):
+        self.duration = duration
+        self.result = result
+        self.started = time.monotonic()
+
+    def wait(self, timeout):
+        remaining = self.started + self.duration - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return None
+        time.sleep(max(0, remaining))
+        return self.result
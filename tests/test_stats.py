@@ -0,0 +1,86 @@
+import datetime
+import unittest
+from unittest import mock
+
+from lib import stats
+
+
+class MockCursor(object):
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = list()
+
+    def execute(self, query):
+        self.queries.append(query)
+
+    def fetchall(self):
+        return self.rows
+
+
+class StatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.row = (
+            1, 'https://api.github.com/repos/foo/bar', 'foo', 'bar', 'Python',
+            datetime.datetime(2014, 1, 1), datetime.datetime(2015, 1, 1), 10,
+            2
+        )
+
+    def test_get(self):
+        # Arrange
+        cursor = MockCursor([self.row])
+
+        # Act
+        with mock.patch.object(stats, '_table', None):
+            actual = stats.get(cursor, 1)
+
+        # Assert
+        self.assertEqual('foo', actual.owner)
+        self.assertEqual(10, actual.num_commits)
+        self.assertIn('project_commits', cursor.queries[0])
+
+    def test_get_materialized(self):
+        # Arrange
+        cursor = MockCursor([self.row])
+
+        # Act
+        with mock.patch.object(stats, '_table', 'reaper_sample_stats_1'):
+            actual = stats.get(cursor, 1)
+
+        # Assert
+        self.assertEqual('bar', actual.name)
+        self.assertIn(stats.TABLE, cursor.queries[0])
+        self.assertNotIn('project_commits', cursor.queries[0])
+
+    def test_get_missing(self):
+        # Arrange
+        cursor = MockCursor([])
+
+        # Act
+        with mock.patch.object(stats, '_table', None):
+            actual = stats.get(cursor, 1)
+
+        # Assert
+        self.assertIsNone(actual)
+
+    def test_materialize(self):
+        # Arrange
+        cursor = MockCursor([])
+        samples = list(range(1, stats.BATCH_SIZE + 2))
+
+        # Act
+        with mock.patch.object(stats, '_table', None):
+            stats.materialize(cursor, samples)
+            table = stats._table
+            stats.drop(cursor)
+            dropped = stats._table
+
+        # Assert
+        self.assertTrue(table.startswith(stats.TABLE))
+        self.assertIsNone(dropped)
+        self.assertIn('CREATE TABLE', cursor.queries[0])
+        self.assertEqual(4, len(cursor.queries))
+        self.assertIn('REPLACE INTO {0}'.format(table), cursor.queries[2])
+        self.assertIn('({0})'.format(samples[-1]), cursor.queries[2])
+        self.assertEqual(
+            'DROP TABLE IF EXISTS {0}'.format(table), cursor.queries[3]
+        )
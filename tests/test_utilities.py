@@ -2,8 +2,10 @@ import os
 import unittest
 import tempfile
 import subprocess
+from unittest import mock
 
 from dateutil.relativedelta import relativedelta
+from lib import scanner
 from lib import utilities
 from tests import ASSETS_PATH
 
@@ -62,6 +64,46 @@ class UtilitiesTestCase(unittest.TestCase):
         # Test: Path is not a directory
         self.assertRaises(Exception, utilities.get_loc, '/bin/bash')
 
+    def test_get_loc_native(self):
+        path = os.path.join(ASSETS_PATH, 'projekt')
+        counter = utilities.LOC_COUNTER
+        utilities.LOC_COUNTER = 'native'
+        utilities._loc_cache.clear()
+
+        try:
+            # Test: Get SLOC of source at ./assets/projekt
+            expected = {
+                'C':  {'cloc': 4, 'sloc': 6},
+                'C/C++ Header': {'cloc': 0, 'sloc': 4},
+                'JavaScript': {'cloc': 1, 'sloc': 13},
+                'Python': {'cloc': 1, 'sloc': 2}
+            }
+            self.assertEqual(expected, utilities.get_loc(path))
+
+            # Test: Subsets of files, relative or absolute, are answered from
+            #   the per-file lines-of-code without counting again
+            hits = utilities.get_cache_hits()
+            expected = {
+                'C/C++ Header': {'cloc': 0, 'sloc': 4},
+                'JavaScript': {'cloc': 1, 'sloc': 10},
+            }
+            self.assertEqual(
+                expected,
+                utilities.get_loc(
+                    path, files=[
+                        'include/projekt.h',
+                        os.path.join(path, 'utilities', 'projekt.js')
+                    ]
+                )
+            )
+            self.assertEqual(hits + 1, utilities.get_cache_hits())
+
+            # Test: Missing source directory
+            self.assertRaises(Exception, utilities.get_loc, '/home/nocturnal')
+        finally:
+            utilities.LOC_COUNTER = counter
+            utilities._loc_cache.clear()
+
     def test_search(self):
         path = os.path.join(
             os.path.dirname(__file__),
@@ -115,6 +157,40 @@ class UtilitiesTestCase(unittest.TestCase):
             pattern='#include <stdio.h>', path='/bin/bash',
         )
 
+    def test_search_all(self):
+        path = os.path.join(ASSETS_PATH, 'projekt')
+
+        # Test: Search for several patterns in a single pass
+        expected = {
+            '#include <stdio.h>': ['projekt.c'],
+            'RepoReapers': ['include/projekt.h', 'projekt.js', 'projekt.py'],
+            'XMLHttpRequest': ['utilities/projekt.js'],
+            'ggrep': None
+        }
+        actual = utilities.search_all(
+            list(expected.keys()), path, include=['*.c', '*.h', '*.js', '*.py']
+        )
+        self.assertCountEqual(expected.keys(), actual.keys())
+        for (pattern, files) in expected.items():
+            if files is None:
+                self.assertIsNone(actual[pattern])
+            else:
+                self.assertCountEqual(files, actual[pattern])
+
+        # Test: Search restricted to a sub-directory
+        self.assertListEqual(
+            ['projekt.h'],
+            utilities.search_all(
+                ['RepoReapers'], os.path.join(path, 'include')
+            )['RepoReapers']
+        )
+
+        # Test: Missing source directory
+        self.assertRaises(
+            Exception, utilities.search_all,
+            patterns=['#include <stdio.h>'], path='/home/nocturnal',
+        )
+
     def test_clone(self):
         with tempfile.TemporaryDirectory() as directory:
             # Arrange
@@ -147,6 +223,41 @@ class UtilitiesTestCase(unittest.TestCase):
             actual['sha'] = out
             self.assertEqual(expected, actual)
 
+    def test_clone_modes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            owner = 'andymeneely'
+            name = 'squib'
+            date = '2015-03-31'
+
+            # Act
+            actual = dict()
+            files = dict()
+            with mock.patch.object(
+                utilities, 'MIRROR_ROOT', os.path.join(directory, 'mirrors')
+            ):
+                for mode in utilities.CLONE_MODES:
+                    repository_home = os.path.join(directory, mode)
+                    os.mkdir(repository_home)
+                    repository_path = utilities.clone(
+                        owner, name, repository_home, date, mode
+                    )
+                    actual[mode] = utilities.get_tree_sha(repository_path)
+                    if mode in ['full', 'tree']:
+                        files[mode] = sorted(
+                            entry.path for entry in
+                            scanner.scan(repository_path).entries
+                        )
+                        scanner.forget(repository_path)
+
+            # Assert
+            self.assertIsNotNone(actual['full'])
+            self.assertEqual(actual['full'], actual['partial'])
+            self.assertEqual(actual['full'], actual['shallow'])
+            self.assertEqual(actual['full'], actual['mirror'])
+            self.assertTrue(files['full'])
+            self.assertEqual(files['full'], files['tree'])
+
     def test_read(self):
         # Arrange
         path = os.path.join(ASSETS_PATH, 'test.json')
@@ -0,0 +1,60 @@
+import multiprocessing
+import queue
+import time
+import unittest
+
+from lib import worker
+
+
+def put(outq, value):
+    outq.put(value)
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+class WorkerTestCase(unittest.TestCase):
+    def test_get(self):
+        # Arrange
+        outq = multiprocessing.Queue()
+        process = multiprocessing.Process(target=put, args=(outq, 'result'))
+        process.start()
+
+        # Act
+        result = worker.get(outq, process, 5)
+
+        # Assert
+        self.assertEqual('result', result)
+        process.join()
+
+    def test_get_died(self):
+        # Arrange
+        outq = multiprocessing.Queue()
+        process = multiprocessing.Process(target=sleep, args=(0,))
+        process.start()
+
+        # Act
+        started = time.monotonic()
+        self.assertRaises(queue.Empty, worker.get, outq, process, 30)
+        elapsed = time.monotonic() - started
+
+        # Assert
+        self.assertLess(elapsed, 5)
+        process.join()
+
+    def test_get_timeout(self):
+        # Arrange
+        outq = multiprocessing.Queue()
+        process = multiprocessing.Process(target=sleep, args=(5,))
+        process.start()
+
+        # Act
+        started = time.monotonic()
+        self.assertRaises(queue.Empty, worker.get, outq, process, 0.2)
+        elapsed = time.monotonic() - started
+
+        # Assert
+        self.assertLess(elapsed, 1)
+        process.terminate()
+        process.join()
@@ -0,0 +1,46 @@
+import time
+import unittest
+
+from lib import writer
+
+
+class BufferedWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.batches = list()
+
+    def test_write_size(self):
+        # Act
+        with writer.BufferedWriter(self.batches.append, 2, 60) as _writer:
+            for item in range(5):
+                _writer.write(item)
+
+            # Assert
+            self.assertEqual([[0, 1], [2, 3]], self.batches)
+        self.assertEqual([[0, 1], [2, 3], [4]], self.batches)
+
+    def test_write_interval(self):
+        # Arrange
+        _writer = writer.BufferedWriter(self.batches.append, 100, 0.1)
+
+        # Act
+        _writer.write(0)
+        time.sleep(0.5)
+
+        # Assert
+        self.assertEqual([[0]], self.batches)
+        _writer.close()
+        self.assertEqual([[0]], self.batches)
+
+    def test_write_failure(self):
+        # Arrange
+        def flush(items):
+            self.batches.append(items)
+            raise Exception('Lost connection')
+
+        # Act
+        with writer.BufferedWriter(flush, 1, 60) as _writer:
+            _writer.write(0)
+            _writer.write(1)
+
+        # Assert
+        self.assertEqual([[0], [1]], self.batches)
@@ -1,9 +1,13 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 from attributes.unit_test.discoverer import get_test_discoverer, TestDiscoverer
 from attributes.unit_test.discoverer import (
     c, cpp, csharp, java, javascript, objectivec, php, python, ruby
 )
+from lib import utilities
 
 
 class TestDiscovererTestCase(unittest.TestCase):
@@ -112,3 +116,35 @@ class TestDiscovererTestCase(unittest.TestCase):
 
         # Test: TestDiscoverer.discover is not callable
         self.assertRaises(Exception, discoverer.discover, path='')
+
+    def test_measure_all(self):
+        # Arrange
+        discoverer = python.PythonTestDiscoverer()
+        contents = {
+            'test_a.py': 'import unittest\n\nx = 1\n',
+            'test_b.py': 'import nose\n\ny = 2\nz = 3\n',
+            'c.py': 'import unittestx\n',
+        }
+        with tempfile.TemporaryDirectory() as path:
+            for (name, content) in contents.items():
+                with open(os.path.join(path, name), 'w') as file_:
+                    file_.write(content)
+            sloc = 7
+
+            # Act
+            with mock.patch.object(utilities, 'LOC_COUNTER', 'native'):
+                expected = sum(
+                    framework(path, sloc)
+                    for framework in discoverer.frameworks
+                )
+                with mock.patch.object(
+                    utilities, 'search_all', wraps=utilities.search_all
+                ) as search_all:
+                    actual = discoverer.measure_all(
+                        path, sloc, discoverer.frameworks
+                    )
+
+        # Assert
+        self.assertEqual(1, search_all.call_count)
+        self.assertGreater(actual, 0)
+        self.assertAlmostEqual(expected, actual)